@@ -0,0 +1,280 @@
+"""
+Benchmarks of modelling throughput, memory and startup time.
+
+Usage (from the repository root):
+    python -m benchmarks.run_benchmarks --output bench.json
+    python -m benchmarks.run_benchmarks --quick --compare bench.json
+
+Every case is run `--repeat` times and the best time is kept. Peak memory is measured with tracemalloc
+in a separate run, so it doesn't slow down the timed ones. Results are JSON with environment metadata,
+--compare reports cases which became slower than the baseline file by more than --tolerance.
+"""
+import argparse
+import itertools
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import typing as tp
+from pathlib import Path
+
+import numpy as np
+
+from src.checkout import Checkout, RingBufferCheckout
+from src.customer import Customer
+from src.run import create_model, DEFAULT_MODEL_CONFIG
+from src.supermarket import RingBufferSupermarket, Supermarket
+from src.sweep import code_version
+from src.utils import MINUTES_PER_DAY
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+MODEL_ENGINES = [
+    {'supermarket_engine': 'objects'},
+    {'supermarket_engine': 'ring_buffer'},
+    {'supermarket_engine': 'vectorized'},
+    {'model_engine': 'events'},
+]
+SUITES: tp.Dict[str, tp.Dict[str, tp.List[tp.Any]]] = {
+    'full': {
+        'total_checkouts': [1, 10, 100, 1000],
+        'tick_time': [1, 7, 30],
+        'time_between_customers_range': [(1, 7), (0, 2)],
+        'days': [1, 7],
+    },
+    'quick': {
+        'total_checkouts': [1, 100],
+        'tick_time': [7],
+        'time_between_customers_range': [(1, 7), (0, 2)],
+        'days': [1],
+    },
+}
+STARTUP_IMPORTS = {
+    'python': 'pass',
+    'headless': 'import src.run',
+    'ui': 'import main',
+}
+
+
+def _best_time(run: tp.Callable[[], tp.Any], repeat: int) -> tp.Tuple[float, tp.Any]:
+    best_time, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        best_time = min(best_time, time.perf_counter() - start)
+    return best_time, result
+
+
+def _peak_memory(run: tp.Callable[[], tp.Any]) -> int:
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_model(model_config: tp.Dict[str, tp.Any], days: int, repeat: int) -> tp.Dict[str, tp.Any]:
+    ticks_num = days * MINUTES_PER_DAY // model_config['tick_time']
+
+    def run():
+        model = create_model(model_config)
+        for _ in range(ticks_num):
+            model.tick()
+        return model.total_potential_customers()
+
+    seconds, customers_num = _best_time(run, repeat)
+    return {
+        'seconds': seconds,
+        'ticks': ticks_num,
+        'customers': customers_num,
+        'ticks_per_second': ticks_num / seconds,
+        'customers_per_second': customers_num / seconds,
+        'peak_memory_bytes': _peak_memory(run),
+    }
+
+
+def bench_recieve_customers(
+    supermarket_cls: tp.Type[Supermarket],
+    checkouts_num: int,
+    customers_per_tick: int,
+    ticks_num: int,
+    repeat: int,
+) -> tp.Dict[str, tp.Any]:
+    """Supermarket.recieve_customers only, checkouts are drained by ticks which aren't timed"""
+    rng = np.random.default_rng(0)
+    batches = [
+        [
+            Customer(service_time=int(service_time), remaining_service_time=int(service_time), purchase_cost=100)
+            for service_time in rng.integers(1, 7, size=customers_per_tick, endpoint=True)
+        ]
+        for _ in range(ticks_num)
+    ]
+
+    def run():
+        supermarket = supermarket_cls(
+            checkouts_num=checkouts_num,
+            max_checkout_capacity=5,
+            cashier_salary_per_day=1500,
+            ads_spend_per_day=0,
+            discount_percent=5,
+            profit_per_sale_percent=9,
+        )
+        receive_time = 0.0
+        for batch in batches:
+            start = time.perf_counter()
+            supermarket.recieve_customers(batch)
+            receive_time += time.perf_counter() - start
+            supermarket.tick(7)
+        return receive_time
+
+    seconds = min(run() for _ in range(repeat))
+    customers_num = customers_per_tick * ticks_num
+    return {'seconds': seconds, 'customers': customers_num, 'customers_per_second': customers_num / seconds}
+
+
+def bench_checkout_tick(
+    checkout_cls: tp.Type[Checkout],
+    max_capacity: int,
+    tick_time: int,
+    ticks_num: int,
+    repeat: int,
+) -> tp.Dict[str, tp.Any]:
+    """Checkout.tick with the queue refilled to capacity before every tick (refill isn't timed)"""
+
+    def run():
+        checkout = checkout_cls(max_capacity=max_capacity)
+        tick_time_total = 0.0
+        for _ in range(ticks_num):
+            while checkout.current_workload < max_capacity:
+                checkout.receive(3, 100)
+            start = time.perf_counter()
+            checkout.tick(tick_time)
+            tick_time_total += time.perf_counter() - start
+        return tick_time_total, checkout.total_served_customers
+
+    seconds, served = min(run() for _ in range(repeat))
+    return {
+        'seconds': seconds,
+        'ticks': ticks_num,
+        'ticks_per_second': ticks_num / seconds,
+        'customers_per_second': served / seconds,
+    }
+
+
+def bench_startup(repeat: int) -> tp.Dict[str, tp.Any]:
+    """Wall time of a fresh interpreter importing headless runner or UI (main.py), best of repeat"""
+    results = {}
+    for name, statement in STARTUP_IMPORTS.items():
+        seconds, _ = _best_time(
+            lambda: subprocess.run([sys.executable, '-c', statement], cwd=ROOT_DIR, check=True), repeat
+        )
+        results[name] = {'seconds': seconds}
+    for name in ['headless', 'ui']:
+        results[name]['import_seconds'] = results[name]['seconds'] - results['python']['seconds']
+    return results
+
+
+def _git_commit() -> tp.Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _case_name(kind: str, **params) -> str:
+    return kind + '[' + ','.join(f'{name}={value}' for name, value in params.items()) + ']'
+
+
+def run_benchmarks(suite: str = 'full', repeat: int = 3, with_startup: bool = True) -> tp.Dict[str, tp.Any]:
+    grid = SUITES[suite]
+    cases = {}
+    for engine, checkouts_num, tick_time, time_range, days in itertools.product(
+        MODEL_ENGINES, grid['total_checkouts'], grid['tick_time'], grid['time_between_customers_range'], grid['days']
+    ):
+        model_config = {
+            **DEFAULT_MODEL_CONFIG,
+            **engine,
+            'total_checkouts': checkouts_num,
+            'tick_time': tick_time,
+            'time_between_customers_range': time_range,
+        }
+        engine_name = engine.get('model_engine', engine.get('supermarket_engine'))
+        name = _case_name(
+            'model', engine=engine_name, checkouts=checkouts_num, tick_time=tick_time,
+            time_between_customers=f'{time_range[0]}-{time_range[1]}', days=days,
+        )
+        cases[name] = bench_model(model_config, days, repeat)
+
+    for supermarket_cls, checkouts_num in itertools.product(
+        [Supermarket, RingBufferSupermarket], grid['total_checkouts']
+    ):
+        name = _case_name('recieve_customers', supermarket=supermarket_cls.__name__, checkouts=checkouts_num)
+        cases[name] = bench_recieve_customers(supermarket_cls, checkouts_num, 10, 500, repeat)
+
+    for checkout_cls, tick_time in itertools.product([Checkout, RingBufferCheckout], grid['tick_time']):
+        name = _case_name('checkout_tick', checkout=checkout_cls.__name__, tick_time=tick_time)
+        cases[name] = bench_checkout_tick(checkout_cls, 50, tick_time, 2000, repeat)
+
+    return {
+        'environment': {
+            'python': sys.version,
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'git_commit': _git_commit(),
+            'code_version': code_version(),
+            'suite': suite,
+            'repeat': repeat,
+        },
+        'cases': cases,
+        'startup': bench_startup(repeat) if with_startup else None,
+    }
+
+
+def compare(
+    baseline: tp.Dict[str, tp.Any],
+    current: tp.Dict[str, tp.Any],
+    tolerance: float,
+) -> tp.List[tp.Tuple[str, float, float]]:
+    """Cases present in both results whose time grew more than tolerance (relative): name, old and new seconds"""
+    regressions = []
+    for name, result in current['cases'].items():
+        old_result = baseline['cases'].get(name)
+        if old_result is not None and result['seconds'] > old_result['seconds'] * (1 + tolerance):
+            regressions.append((name, old_result['seconds'], result['seconds']))
+    return regressions
+
+
+def main(argv: tp.Optional[tp.List[str]] = None):
+    parser = argparse.ArgumentParser(description='Benchmark supermarket modelling')
+    parser.add_argument('--quick', action='store_true', help='Small grid of cases')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-startup', action='store_true', help="Don't measure interpreter startup and imports")
+    parser.add_argument('--output', help='Write JSON to this file instead of stdout')
+    parser.add_argument('--compare', help='Baseline JSON, exit with code 1 if some case became slower')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative slowdown for --compare')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks('quick' if args.quick else 'full', repeat=args.repeat, with_startup=not args.no_startup)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(json.load(f), results, args.tolerance)
+        for name, old_seconds, new_seconds in regressions:
+            sys.stderr.write(f'REGRESSION {name}: {old_seconds:.4f}s -> {new_seconds:.4f}s\n')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -15,8 +15,10 @@ from PyQt5.QtCore import (
 
 from src.modelling import SupermarketModel
 from src.ui_v2 import Ui_SupermarketModelUI
+from src.utils import configure_logging
 
 if __name__ == "__main__":
+    configure_logging()
     app = QApplication([])
     window = QMainWindow()
     window.setFixedSize(1200, 800)
@@ -0,0 +1,311 @@
+"""
+Analytic pre-screen of SupermarketModel configs.
+
+Every hour segment (weekday or weekend, hour of day) is approximated by finite-capacity multi-server queue M/M/c/K:
+c = total_checkouts servers, room for c * max_checkout_capacity customers (shortest queue dispatch keeps queues even),
+service rate is 1 / mean service time. Arrival rate is state-dependent as in the model: with n customers
+the shortest queue holds n // c of them and every one of them lowers the flow by FLOW_DECREASE_PER_PERSON_PERCENT.
+Such birth-death process has closed form stationary distribution, so estimate of a config takes microseconds
+and can be used to drop overloaded or idle configs and rank the rest before simulation.
+"""
+import functools
+import typing as tp
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from src.modelling import SupermarketModel
+from src.optimizer import net_profit
+from src.sweep import run_sweep, SweepResult
+from src.utils import HOURS_PER_DAY, MINUTES_PER_DAY, MINUTES_PER_HOUR, TOTAL_MODELLING_MINUTES, Weekday
+
+WEEKEND_DAYS = [Weekday.SATURDAY, Weekday.SUNDAY]
+
+#  Stats compared with simulation in screened sweep
+COMPARED_STATS = [
+    'total_served_customers',
+    'total_lost_customers',
+    'total_potential_customers',
+    'total_earnings',
+    'average_workload',
+]
+
+
+@dataclass
+class SegmentEstimate:
+    is_weekend: bool
+    hour: int
+    arrival_rate: float  # offered customers per minute
+    throughput: float  # served customers per minute
+    utilisation: float
+    loss_probability: float
+    mean_workload: float  # customers per checkout including the one being served
+
+
+@dataclass
+class AnalyticEstimate:
+    segments: tp.List[SegmentEstimate]
+    stats: tp.Dict[str, float]  # same keys as SupermarketModel.stats() totals
+
+    @property
+    def loss_probability(self) -> float:
+        return self.stats['total_lost_customers'] / max(self.stats['total_potential_customers'], 1e-12)
+
+    @property
+    def utilisation(self) -> float:
+        return self.stats['utilisation']
+
+
+@functools.lru_cache(maxsize=4096)
+def tick_arrival_rate(time_between_customers_range: tp.Tuple[int, int], tick_time: int) -> float:
+    """
+    Customers per minute for given gaps range, exactly as CustomerGenerator draws them:
+    first customer at the tick start, then integer gaps uniform in range while their sum is less than tick time.
+    Expected number of customers is the sum of renewal density over minutes of the tick.
+    """
+    low, high = time_between_customers_range
+    high = max(high, 1)
+    gap_probability = 1.0 / (high - low + 1)
+    zero_gap_probability = gap_probability if low == 0 else 0.0
+    renewal_density = [0.0] * tick_time
+    for minute in range(tick_time):
+        density = 1.0 if minute == 0 else 0.0
+        for gap in range(max(low, 1), min(high, minute) + 1):
+            density += gap_probability * renewal_density[minute - gap]
+        renewal_density[minute] = density / (1 - zero_gap_probability)
+    return sum(renewal_density) / tick_time
+
+
+def base_flow_increase_percent(model_config: tp.Dict[str, tp.Any], is_weekend: bool, hour: int) -> float:
+    """Same as SupermarketModel._get_base_flow_increase_percent for given segment"""
+    flow_increase_percent = 0
+    if is_weekend:
+        flow_increase_percent += SupermarketModel.WEEKENDS_FLOW_INCREASE_PERCENT
+    if hour in SupermarketModel.DAYTIME_HOURS_WITH_HIGH_FLOW:
+        flow_increase_percent += SupermarketModel.EVENING_FLOW_INCREASE_PERCENT
+    flow_increase_percent += \
+        (model_config['ads_spend_per_day'] // SupermarketModel.ADS_COST_TO_FLOW_INCREASE) \
+        * SupermarketModel.ADS_FLOW_INCREASE_PERCENT
+    flow_increase_percent += \
+        (model_config['discount_percent'] // SupermarketModel.DISCOUNT_COST_TO_FLOW_INCREASE) \
+        * SupermarketModel.DISCOUNT_FLOW_INCREASE_PERCENT
+    return flow_increase_percent
+
+
+def _scale_time_between_customers(
+    time_between_customers_range: tp.Tuple[int, int],
+    flow_increase_percent: float,
+) -> tp.Tuple[int, int]:
+    return tuple(int(t * 100 / (100 + flow_increase_percent)) for t in time_between_customers_range)
+
+
+def _flow_arrival_rate(
+    time_between_customers_range: tp.Tuple[int, int],
+    tick_time: int,
+    flow_increase_percent: float,
+) -> float:
+    """Arrival rate with flow changed by given percent, decrease by 100% or more stops the flow"""
+    if 100 + flow_increase_percent <= 0:
+        return 0.0
+    scaled_range = _scale_time_between_customers(time_between_customers_range, flow_increase_percent)
+    return tick_arrival_rate(scaled_range, tick_time)
+
+
+def _mean(value_range: tp.Tuple[int, int]) -> float:
+    return (value_range[0] + value_range[1]) / 2
+
+
+@functools.lru_cache(maxsize=4096)
+def _stationary_estimate(
+    checkouts_num: int,
+    capacity: int,
+    mean_service_time: float,
+    time_between_customers_range: tp.Tuple[int, int],
+    tick_time: int,
+    base_flow_increase: float,
+) -> tp.Tuple[float, float, float, float, float]:
+    """
+    Stationary M/M/c/K process with state-dependent arrival rate.
+    Returns arrival rate, throughput, utilisation, loss probability and mean workload per checkout.
+    """
+    service_rate = 1 / max(mean_service_time, 1e-9)
+
+    #  Arrival rate for every possible workload of the shortest queue, then for every customers number
+    min_workload_rates = np.array([
+        _flow_arrival_rate(
+            time_between_customers_range,
+            tick_time,
+            base_flow_increase - min_workload * SupermarketModel.FLOW_DECREASE_PER_PERSON_PERCENT,
+        )
+        for min_workload in range(capacity + 1)
+    ])
+    states = np.arange(checkouts_num * capacity + 1)
+    arrival_rates = min_workload_rates[states // checkouts_num]
+    busy_servers = np.minimum(states, checkouts_num)
+
+    #  Birth-death stationary distribution: pi[n + 1] = pi[n] * arrival_rates[n] / (service_rate * busy[n + 1]),
+    #  states after one with zero arrival rate are unreachable (log ratio -inf gives pi = 0)
+    with np.errstate(divide='ignore'):
+        log_ratios = np.log(arrival_rates[:-1]) - np.log(service_rate * busy_servers[1:])
+    log_pi = np.concatenate([[0.0], np.cumsum(log_ratios)])
+    pi = np.exp(log_pi - log_pi.max())
+    pi /= pi.sum()
+
+    arrival_rate = float(arrival_rates @ pi)
+    throughput = float(service_rate * (busy_servers @ pi))
+    #  Model samples workload at the tick start right after the whole tick of customers came,
+    #  that is about half a tick of service above the time average
+    mean_workload = min(float(states @ pi) + throughput * tick_time / 2, checkouts_num * capacity) / checkouts_num
+    return (
+        arrival_rate,
+        throughput,
+        float(busy_servers @ pi) / checkouts_num,
+        float(arrival_rates[-1] * pi[-1]) / arrival_rate if arrival_rate > 0 else 0.0,
+        mean_workload,
+    )
+
+
+def estimate_segment(model_config: tp.Dict[str, tp.Any], is_weekend: bool, hour: int) -> SegmentEstimate:
+    """Stationary estimate of one hour segment"""
+    arrival_rate, throughput, utilisation, loss_probability, mean_workload = _stationary_estimate(
+        model_config['total_checkouts'],
+        model_config['max_checkout_capacity'],
+        _mean(model_config['customer_service_time_range']),
+        tuple(model_config['time_between_customers_range']),
+        model_config['tick_time'],
+        base_flow_increase_percent(model_config, is_weekend, hour),
+    )
+    return SegmentEstimate(
+        is_weekend=is_weekend,
+        hour=hour,
+        arrival_rate=arrival_rate,
+        throughput=throughput,
+        utilisation=utilisation,
+        loss_probability=loss_probability,
+        mean_workload=mean_workload,
+    )
+
+
+@functools.lru_cache(maxsize=64)
+def _segment_minutes(total_minutes: int) -> tp.Dict[tp.Tuple[bool, int], int]:
+    """Minutes spent in every (is_weekend, hour) segment during modelling, which starts on Monday at 00:00"""
+    minutes: tp.Dict[tp.Tuple[bool, int], int] = {}
+    for hour_idx in range(-(-total_minutes // MINUTES_PER_HOUR)):
+        weekday = hour_idx // HOURS_PER_DAY % len(Weekday)
+        key = (weekday in WEEKEND_DAYS, hour_idx % HOURS_PER_DAY)
+        minutes[key] = minutes.get(key, 0) + min(MINUTES_PER_HOUR, total_minutes - hour_idx * MINUTES_PER_HOUR)
+    return minutes
+
+
+def estimate(model_config: tp.Dict[str, tp.Any], total_minutes: int = TOTAL_MODELLING_MINUTES) -> AnalyticEstimate:
+    """Estimate per segment and totals of the whole run with the same names as model stats"""
+    segment_minutes = _segment_minutes(total_minutes)
+    segments = [estimate_segment(model_config, is_weekend, hour) for is_weekend, hour in segment_minutes]
+
+    served = lost = workload = busy = 0.0
+    for segment in segments:
+        minutes = segment_minutes[(segment.is_weekend, segment.hour)]
+        served += segment.throughput * minutes
+        lost += segment.arrival_rate * segment.loss_probability * minutes
+        workload += segment.mean_workload * minutes
+        busy += segment.utilisation * minutes
+
+    discount_percent = model_config['discount_percent']
+    mean_purchase_price = _mean(model_config['customer_purchase_price_range'])
+    earnings = served * mean_purchase_price * (100 - discount_percent) / 100
+    days_num = total_minutes // MINUTES_PER_DAY
+    stats = {
+        'total_served_customers': served,
+        'total_lost_customers': lost,
+        'total_potential_customers': served + lost,
+        'total_earnings': earnings,
+        'total_profit': earnings * model_config['profit_per_sale_percent'] / 100,
+        'total_spent_on_ads': days_num * model_config['ads_spend_per_day'],
+        'total_spent_on_salaries': days_num * model_config['cashier_salary_per_day'] * model_config['total_checkouts'],
+        'total_spent_on_discounts': (served + lost) * mean_purchase_price * discount_percent / 100,
+        'average_workload': workload / total_minutes,
+        'utilisation': busy / total_minutes,
+    }
+    return AnalyticEstimate(segments=segments, stats=stats)
+
+
+@dataclass
+class ScreenedConfig:
+    model_config: tp.Dict[str, tp.Any]
+    estimate: AnalyticEstimate
+    objective_value: float
+    prune_reason: tp.Optional[str] = None
+
+
+def prescreen(
+    model_configs: tp.Sequence[tp.Dict[str, tp.Any]],
+    total_minutes: int = TOTAL_MODELLING_MINUTES,
+    max_loss_probability: float = 0.5,
+    min_utilisation: float = 0.05,
+    objective: tp.Callable[[tp.Dict[str, tp.Any]], float] = net_profit,
+) -> tp.Tuple[tp.List[ScreenedConfig], tp.List[ScreenedConfig]]:
+    """
+    Split configs into ranked (by estimated objective, the best first) and pruned ones:
+    overloaded (losing more than max_loss_probability of customers) or idle (utilisation below min_utilisation).
+    """
+    ranked, pruned = [], []
+    for model_config in model_configs:
+        config_estimate = estimate(model_config, total_minutes)
+        screened = ScreenedConfig(model_config, config_estimate, objective(config_estimate.stats))
+        if config_estimate.loss_probability > max_loss_probability:
+            screened.prune_reason = f'overloaded: loses {config_estimate.loss_probability:.0%} of customers'
+        elif config_estimate.utilisation < min_utilisation:
+            screened.prune_reason = f'idle: utilisation {config_estimate.utilisation:.1%}'
+        (pruned if screened.prune_reason else ranked).append(screened)
+    ranked.sort(key=lambda screened: screened.objective_value, reverse=True)
+    return ranked, pruned
+
+
+def estimate_errors(analytic_stats: tp.Dict[str, float], sweep_result: SweepResult) -> tp.Dict[str, float]:
+    """Relative error of analytic estimate against mean of simulation replications"""
+    errors = {}
+    for name in COMPARED_STATS:
+        simulated = sweep_result.results.summary[name].mean
+        errors[name] = (analytic_stats[name] - simulated) / simulated if simulated else float('nan')
+    return errors
+
+
+@dataclass
+class ScreenedSweepResult:
+    screened: ScreenedConfig
+    sweep_result: SweepResult
+    errors: tp.Dict[str, float] = field(default_factory=dict)
+
+
+def run_screened_sweep(
+    model_configs: tp.Sequence[tp.Dict[str, tp.Any]],
+    keep: tp.Optional[int] = None,
+    total_minutes: int = TOTAL_MODELLING_MINUTES,
+    max_loss_probability: float = 0.5,
+    min_utilisation: float = 0.05,
+    objective: tp.Callable[[tp.Dict[str, tp.Any]], float] = net_profit,
+    **sweep_kwargs,
+) -> tp.Tuple[tp.List[ScreenedSweepResult], tp.List[ScreenedConfig]]:
+    """
+    Prescreen configs, simulate only `keep` best ranked of them (all not pruned if None) with run_sweep
+    and report relative errors of the estimates. Returns simulated results in rank order and pruned configs.
+    """
+    ranked, pruned = prescreen(
+        model_configs,
+        total_minutes=total_minutes,
+        max_loss_probability=max_loss_probability,
+        min_utilisation=min_utilisation,
+        objective=objective,
+    )
+    selected = ranked if keep is None else ranked[:keep]
+    sweep_results = run_sweep(
+        [screened.model_config for screened in selected], total_minutes=total_minutes, **sweep_kwargs
+    )
+    return [
+        ScreenedSweepResult(
+            screened=screened,
+            sweep_result=sweep_result,
+            errors=estimate_errors(screened.estimate.stats, sweep_result),
+        )
+        for screened, sweep_result in zip(selected, sweep_results)
+    ], pruned
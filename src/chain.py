@@ -0,0 +1,275 @@
+"""
+Chain of stores modelled in parallel.
+
+Stores are split into shards, every shard lives in its own worker process for the whole run
+and is driven by commands over a pipe, so models aren't sent between processes on every step.
+Stores are advanced by modelling minutes, so stores with different tick_time stay in step:
+lock-step mode advances all of them by `step_minutes` and waits for all shards (levers may be changed between steps),
+independent mode sends the whole horizon at once and every shard runs at its own pace.
+"""
+import multiprocessing
+import traceback
+import typing as tp
+from multiprocessing.connection import Connection
+
+import numpy as np
+
+from src.modelling import SupermarketModel, waiting_time_stats
+from src.replications import spawn_seeds
+from src.run import create_model
+from src.sketch import TDigest
+from src.utils import MINUTES_PER_DAY, TOTAL_MODELLING_MINUTES
+
+
+class _Shard:
+    """Stores of one shard and commands which can be sent to them"""
+
+    def __init__(self, store_configs: tp.Dict[int, tp.Dict[str, tp.Any]]):
+        self.models: tp.Dict[int, SupermarketModel] = {
+            store_idx: create_model(model_config) for store_idx, model_config in store_configs.items()
+        }
+
+    def advance_to(self, minute: int) -> int:
+        """Tick every store while its next tick ends not later than minute, return number of ticks"""
+        ticks_num = 0
+        for model in self.models.values():
+            tick_time = model.tick_time()
+            for _ in range((minute - model.current_tick() * tick_time) // tick_time):
+                model.tick()
+                ticks_num += 1
+        return ticks_num
+
+    def set_levers(self, store_levers: tp.Dict[int, tp.Dict[str, tp.Any]]):
+        for store_idx, levers in store_levers.items():
+            if store_idx in self.models:
+                self.models[store_idx].set_levers(**levers)
+
+    def stats(self) -> tp.Dict[int, tp.Dict[str, tp.Any]]:
+        return {store_idx: model.stats() for store_idx, model in self.models.items()}
+
+    def waiting_times(self) -> TDigest:
+        return TDigest.merged(model.waiting_times() for model in self.models.values())
+
+    def execute(self, command: str, *args) -> tp.Any:
+        return getattr(self, command)(*args)
+
+
+def _shard_worker(connection: Connection, store_configs: tp.Dict[int, tp.Dict[str, tp.Any]]):
+    try:
+        shard = _Shard(store_configs)
+    except Exception:
+        connection.send(('error', traceback.format_exc()))
+        return
+    connection.send(('ok', None))
+    while True:
+        command, args = connection.recv()
+        if command == 'close':
+            break
+        try:
+            connection.send(('ok', shard.execute(command, *args)))
+        except Exception:
+            connection.send(('error', traceback.format_exc()))
+    connection.close()
+
+
+def _reply_result(reply: tp.Tuple[str, tp.Any]) -> tp.Any:
+    status, result = reply
+    if status == 'error':
+        raise RuntimeError(f'Chain worker failed:\n{result}')
+    return result
+
+
+class _ProcessShard:
+    def __init__(self, store_configs: tp.Dict[int, tp.Dict[str, tp.Any]], context):
+        self._connection, worker_connection = context.Pipe()
+        self._process = context.Process(target=_shard_worker, args=(worker_connection, store_configs), daemon=True)
+        self._process.start()
+        worker_connection.close()
+        self.receive()
+
+    def send(self, command: str, *args):
+        self._connection.send((command, args))
+
+    def receive_reply(self) -> tp.Tuple[str, tp.Any]:
+        """('ok', result) or ('error', traceback) of the last command"""
+        return self._connection.recv()
+
+    def receive(self) -> tp.Any:
+        return _reply_result(self.receive_reply())
+
+    def close(self):
+        try:
+            self._connection.send(('close', ()))
+        except (BrokenPipeError, OSError):
+            pass
+        self._process.join()
+        self._connection.close()
+
+
+class _LocalShard:
+    """Shard in the current process with the same interface, for workers_num=0 and debugging"""
+
+    def __init__(self, store_configs: tp.Dict[int, tp.Dict[str, tp.Any]]):
+        self._shard = _Shard(store_configs)
+        self._reply: tp.Tuple[str, tp.Any] = ('ok', None)
+
+    def send(self, command: str, *args):
+        try:
+            self._reply = ('ok', self._shard.execute(command, *args))
+        except Exception:
+            self._reply = ('error', traceback.format_exc())
+
+    def receive_reply(self) -> tp.Tuple[str, tp.Any]:
+        return self._reply
+
+    def receive(self) -> tp.Any:
+        return _reply_result(self.receive_reply())
+
+    def close(self):
+        pass
+
+
+class ChainModel:
+    """
+    Many SupermarketModel stores with their own configs modelled in worker processes.
+
+    Usage:
+        with ChainModel(store_configs, workers_num=8, seed=0) as chain:
+            chain.run(total_minutes)                     # independent
+            # or: for _ in chain.run_lockstep(total_minutes, step_minutes=MINUTES_PER_DAY): ...
+            stats = chain.stats()
+    """
+
+    def __init__(
+        self,
+        store_configs: tp.Sequence[tp.Dict[str, tp.Any]],
+        workers_num: tp.Optional[int] = None,
+        seed: tp.Union[int, np.random.SeedSequence, None] = None,
+    ):
+        store_configs = [dict(model_config) for model_config in store_configs]
+        #  Stores without random_state get independent streams spawned from seed
+        for model_config, store_seed in zip(store_configs, spawn_seeds(seed, len(store_configs))):
+            model_config.setdefault('random_state', store_seed)
+        self._store_configs = store_configs
+        self._current_minute = 0
+
+        if workers_num is None:
+            workers_num = multiprocessing.cpu_count()
+        shards_num = max(1, min(workers_num, len(store_configs)))
+        #  Round-robin keeps shards balanced when configs are sorted by size
+        shard_configs = [
+            {store_idx: store_configs[store_idx] for store_idx in range(shard_idx, len(store_configs), shards_num)}
+            for shard_idx in range(shards_num)
+        ]
+        if workers_num == 0:
+            self._shards = [_LocalShard(configs) for configs in shard_configs]
+        else:
+            context = multiprocessing.get_context()
+            self._shards = []
+            try:
+                for configs in shard_configs:
+                    self._shards.append(_ProcessShard(configs, context))
+            except Exception:
+                self.close()
+                raise
+
+    def __enter__(self) -> 'ChainModel':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        for shard in self._shards:
+            shard.close()
+        self._shards = []
+
+    @property
+    def stores_num(self) -> int:
+        return len(self._store_configs)
+
+    @property
+    def current_minute(self) -> int:
+        return self._current_minute
+
+    def _broadcast(self, command: str, *args) -> tp.List[tp.Any]:
+        """
+        Send command to all shards first and only then wait for them, so shards work in parallel.
+        Replies of all shards are read even if some of them failed, so pipes stay in sync for the next commands.
+        """
+        for shard in self._shards:
+            shard.send(command, *args)
+        replies = [shard.receive_reply() for shard in self._shards]
+        errors = [
+            f'Shard {shard_idx}:\n{result}'
+            for shard_idx, (status, result) in enumerate(replies) if status == 'error'
+        ]
+        if errors:
+            raise RuntimeError(
+                f'{len(errors)} of {len(replies)} chain workers failed on {command!r}:\n' + '\n'.join(errors)
+            )
+        return [result for _, result in replies]
+
+    def advance_to(self, minute: int) -> int:
+        """Advance all stores to given modelling minute and wait for them, return number of done ticks"""
+        ticks_num = sum(self._broadcast('advance_to', minute))
+        self._current_minute = max(self._current_minute, minute)
+        return ticks_num
+
+    def run(self, total_minutes: int = TOTAL_MODELLING_MINUTES) -> int:
+        """Independent mode: every shard models the rest of horizon at its own pace"""
+        return self.advance_to(total_minutes)
+
+    def run_lockstep(
+        self,
+        total_minutes: int = TOTAL_MODELLING_MINUTES,
+        step_minutes: int = MINUTES_PER_DAY,
+    ) -> tp.Iterator[int]:
+        """Lock-step mode: yields minute after every step, so levers can be changed between steps"""
+        while self._current_minute < total_minutes:
+            self.advance_to(min(self._current_minute + step_minutes, total_minutes))
+            yield self._current_minute
+
+    def set_levers(self, store_idx: tp.Optional[tp.Sequence[int]] = None, **levers):
+        """Change levers of given stores (all by default), see SupermarketModel.set_levers"""
+        stores = range(self.stores_num) if store_idx is None else store_idx
+        self._broadcast('set_levers', {idx: levers for idx in stores})
+
+    def set_ads_budget(self, ads_budget_per_day: int, weights: tp.Optional[tp.Sequence[float]] = None):
+        """Split chain-wide ads budget per day between stores proportionally to weights (equally by default)"""
+        weights = np.ones(self.stores_num) if weights is None else np.asarray(weights, dtype=np.float64)
+        store_budgets = np.floor(ads_budget_per_day * weights / weights.sum()).astype(np.int64)
+        self._broadcast(
+            'set_levers',
+            {idx: {'ads_spend_per_day': int(budget)} for idx, budget in enumerate(store_budgets)},
+        )
+
+    def store_stats(self) -> tp.List[tp.Dict[str, tp.Any]]:
+        """Stats of every store in order of store configs"""
+        stats: tp.Dict[int, tp.Dict[str, tp.Any]] = {}
+        for shard_stats in self._broadcast('stats'):
+            stats.update(shard_stats)
+        return [stats[store_idx] for store_idx in range(self.stores_num)]
+
+    def waiting_times(self) -> TDigest:
+        """Sketch of customers waiting times over all stores, merged from shards sketches"""
+        return TDigest.merged(self._broadcast('waiting_times'))
+
+    def stats(self) -> tp.Dict[str, tp.Any]:
+        """
+        Chain totals of scalar stats and per-store stats.
+        Average workload is weighted by checkouts, waiting times are taken from the merged sketch of all stores.
+        """
+        stores = self.store_stats()
+        checkouts = np.array([model_config['total_checkouts'] for model_config in self._store_configs])
+        waiting_stats = waiting_time_stats(self.waiting_times())
+        chain = {
+            name: sum(store[name] for store in stores)
+            for name, value in stores[0].items()
+            if isinstance(value, (int, float)) and name != 'average_workload' and name not in waiting_stats
+        }
+        chain['average_workload'] = float(
+            np.dot([store['average_workload'] for store in stores], checkouts) / checkouts.sum()
+        )
+        chain.update(waiting_stats)
+        return {'chain': chain, 'stores': stores}
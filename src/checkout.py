@@ -1,8 +1,12 @@
+import array
 import collections
 import typing as tp
 
 from src.customer import Customer
+from src.metrics import Metric, MetricsRegistry
+from src.sketch import TDigest
 from src.utils import logger
+from src.workload_index import WorkloadIndex
 
 
 class Checkout:
@@ -14,9 +18,15 @@ class Checkout:
 
         self._total_earnings: int = 0
         self._total_served_customers: int = 0
-        self._total_waiting_time: int = 0
+        self._total_idle_time: int = 0
         self._average_queue_size: float = 0.0
         self._total_ticks = 0
+        self._clock = 0
+        self._waiting_times = TDigest()
+        self._workload_index: tp.Optional[WorkloadIndex] = None
+        self._checkout_idx = 0
+        self._served_customers_metric: tp.Optional[Metric] = None
+        self._earnings_metric: tp.Optional[Metric] = None
 
     @property
     def current_customer_progress(self):
@@ -39,28 +49,64 @@ class Checkout:
     def total_served_customers(self):
         return self._total_served_customers
 
+    @property
+    def total_idle_time(self):
+        """Minutes when cashier had no customers"""
+        return self._total_idle_time
+
     @property
     def total_waiting_time(self):
-        return self._total_waiting_time
+        """Old name of total_idle_time, customers waiting times are in waiting_times"""
+        return self._total_idle_time
+
+    @property
+    def waiting_times(self) -> TDigest:
+        """Sketch of minutes customers waited in queue before their service started"""
+        return self._waiting_times
 
     @property
     def average_workload(self):
         return self._average_queue_size
 
+    def attach_workload_index(self, workload_index: WorkloadIndex, checkout_idx: int):
+        """Keep workload of this checkout up to date in the supermarket index"""
+        self._workload_index = workload_index
+        self._checkout_idx = checkout_idx
+
+    def attach_metrics(self, metrics: MetricsRegistry):
+        """Add served customers and earnings of this checkout to the supermarket totals"""
+        self._served_customers_metric = metrics.counter('total_served_customers')
+        self._earnings_metric = metrics.counter('total_earnings')
+
     def receive_customer(self, new_customer: Customer) -> bool:
         """Add customer to the end of checkout"""
         if len(self._queue) == self._queue.maxlen:
             return False
+        new_customer.arrival_time = self._clock
         self._queue.appendleft(new_customer)
+        if len(self._queue) == 1:
+            #  Service starts right away
+            self._waiting_times.update(0)
+        if self._workload_index is not None:
+            self._workload_index.update(self._checkout_idx, len(self._queue))
         return True
 
+    def receive(self, service_time: int, purchase_cost: int) -> bool:
+        """Add customer with given service time and purchase cost to the end of checkout"""
+        return self.receive_customer(
+            Customer(service_time=service_time, remaining_service_time=service_time, purchase_cost=purchase_cost)
+        )
+
     def _serve_customer(self):
         """Add money to total earnings and increase customers counter and remove customer from queue"""
         cur_customer = self._queue.pop()
         self._total_earnings += cur_customer.purchase_cost
         self._total_served_customers += 1
+        if self._earnings_metric is not None:
+            self._earnings_metric.value += cur_customer.purchase_cost
+            self._served_customers_metric.value += 1
 
-        logger.debug(f"Serve customer with profit: {cur_customer.purchase_cost}")
+        logger.debug("Serve customer with profit: %s", cur_customer.purchase_cost)
 
     def tick(self, tick_time: int):
         """
@@ -71,10 +117,155 @@ class Checkout:
         while len(self._queue) != 0 and remaining_time >= self._queue[-1].remaining_service_time:
             remaining_time -= self._queue[-1].remaining_service_time
             self._serve_customer()
+            if len(self._queue) != 0:
+                #  Service of the next customer starts when the previous one leaves
+                self._waiting_times.update(self._clock + tick_time - remaining_time - self._queue[-1].arrival_time)
         if len(self._queue) != 0:
             self._queue[-1].remaining_service_time -= remaining_time
         else:
-            self._total_waiting_time += remaining_time
+            self._total_idle_time += remaining_time
+        self._total_ticks += 1
+        self._clock += tick_time
+        if self._workload_index is not None:
+            self._workload_index.update(self._checkout_idx, len(self._queue))
+
+        logger.debug('Load at end of tick: %s', self._queue)
+
+
+class RingBufferCheckout:
+    """
+    Checkout with the same API as Checkout, but the queue is a ring buffer over preallocated arrays
+    of service times, remaining service times and purchase costs, so customers aren't stored as objects.
+    """
+
+    def __init__(
+        self,
+        max_capacity: int,
+    ):
+        self._max_capacity = max_capacity
+        self._service_times = array.array('q', [0]) * max_capacity
+        self._remaining_service_times = array.array('q', [0]) * max_capacity
+        self._purchase_costs = array.array('q', [0]) * max_capacity
+        self._arrival_times = array.array('q', [0]) * max_capacity
+        self._head = 0
+        self._size = 0
+
+        self._total_earnings: int = 0
+        self._total_served_customers: int = 0
+        self._total_idle_time: int = 0
+        self._average_queue_size: float = 0.0
+        self._total_ticks = 0
+        self._clock = 0
+        self._waiting_times = TDigest()
+        self._workload_index: tp.Optional[WorkloadIndex] = None
+        self._checkout_idx = 0
+        self._served_customers_metric: tp.Optional[Metric] = None
+        self._earnings_metric: tp.Optional[Metric] = None
+
+    @property
+    def current_customer_progress(self):
+        if self._size == 0:
+            return 0
+        else:
+            total_time = self._service_times[self._head]
+            rem_time = self._remaining_service_times[self._head]
+            return int(rem_time / total_time * 100.0)
+
+    @property
+    def current_workload(self):
+        return self._size
+
+    @property
+    def total_earnings(self):
+        return self._total_earnings
+
+    @property
+    def total_served_customers(self):
+        return self._total_served_customers
+
+    @property
+    def total_idle_time(self):
+        """Minutes when cashier had no customers"""
+        return self._total_idle_time
+
+    @property
+    def total_waiting_time(self):
+        """Old name of total_idle_time, customers waiting times are in waiting_times"""
+        return self._total_idle_time
+
+    @property
+    def waiting_times(self) -> TDigest:
+        """Sketch of minutes customers waited in queue before their service started"""
+        return self._waiting_times
+
+    @property
+    def average_workload(self):
+        return self._average_queue_size
+
+    def attach_workload_index(self, workload_index: WorkloadIndex, checkout_idx: int):
+        """Keep workload of this checkout up to date in the supermarket index"""
+        self._workload_index = workload_index
+        self._checkout_idx = checkout_idx
+
+    def attach_metrics(self, metrics: MetricsRegistry):
+        """Add served customers and earnings of this checkout to the supermarket totals"""
+        self._served_customers_metric = metrics.counter('total_served_customers')
+        self._earnings_metric = metrics.counter('total_earnings')
+
+    def receive(self, service_time: int, purchase_cost: int, remaining_service_time: tp.Optional[int] = None) -> bool:
+        """Add customer to the end of checkout"""
+        if self._size == self._max_capacity:
+            return False
+        tail = (self._head + self._size) % self._max_capacity
+        self._service_times[tail] = service_time
+        self._remaining_service_times[tail] = service_time if remaining_service_time is None else remaining_service_time
+        self._purchase_costs[tail] = purchase_cost
+        self._arrival_times[tail] = self._clock
+        self._size += 1
+        if self._size == 1:
+            #  Service starts right away
+            self._waiting_times.update(0)
+        if self._workload_index is not None:
+            self._workload_index.update(self._checkout_idx, self._size)
+        return True
+
+    def receive_customer(self, new_customer: Customer) -> bool:
+        """Add customer to the end of checkout"""
+        return self.receive(new_customer.service_time, new_customer.purchase_cost, new_customer.remaining_service_time)
+
+    def _serve_customer(self):
+        """Add money to total earnings and increase customers counter and remove customer from queue"""
+        purchase_cost = self._purchase_costs[self._head]
+        self._total_earnings += purchase_cost
+        self._total_served_customers += 1
+        if self._earnings_metric is not None:
+            self._earnings_metric.value += purchase_cost
+            self._served_customers_metric.value += 1
+        self._head = (self._head + 1) % self._max_capacity
+        self._size -= 1
+
+        logger.debug("Serve customer with profit: %s", purchase_cost)
+
+    def tick(self, tick_time: int):
+        """
+        Serve customers and write stats
+        """
+        remaining_time = tick_time
+        self._average_queue_size -= (self._average_queue_size - self._size) / (self._total_ticks + 1)
+        remaining_service_times = self._remaining_service_times
+        while self._size != 0 and remaining_time >= remaining_service_times[self._head]:
+            remaining_time -= remaining_service_times[self._head]
+            self._serve_customer()
+            if self._size != 0:
+                #  Service of the next customer starts when the previous one leaves
+                self._waiting_times.update(self._clock + tick_time - remaining_time - self._arrival_times[self._head])
+        if self._size != 0:
+            remaining_service_times[self._head] -= remaining_time
+        else:
+            self._total_idle_time += remaining_time
         self._total_ticks += 1
+        self._clock += tick_time
+        if self._workload_index is not None:
+            self._workload_index.update(self._checkout_idx, self._size)
 
-        logger.debug(f'Load at end of tick: {self._queue}')
\ No newline at end of file
+        logger.debug('Load at end of tick: %s', self._size)
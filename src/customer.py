@@ -1,8 +1,21 @@
 from dataclasses import dataclass
 
+import numpy as np
+
 
 @dataclass
 class Customer:
     service_time: int
     remaining_service_time: int
     purchase_cost: int
+    arrival_time: int = 0  # set by checkout which accepted customer
+
+
+@dataclass
+class CustomerBatch:
+    """Customers generated at once, stored column-wise"""
+    service_times: np.ndarray
+    purchase_costs: np.ndarray
+
+    def __len__(self):
+        return len(self.service_times)
@@ -0,0 +1,250 @@
+import typing as tp
+
+import numpy as np
+
+from src.customer import CustomerBatch
+
+
+class CustomerGenerator:
+    """
+    Draws customers for one or many ticks with numpy.random.Generator.
+
+    Within a tick the first customer comes at the tick start, next ones come after random gaps
+    while total time of gaps is less than tick time (the same rule as the old per-customer loop).
+    Gaps are drawn with reserve, the unused ones are kept for the next tick with the same range of gaps.
+    """
+    GAPS_RESERVE_FACTOR = 1.5
+
+    def __init__(
+        self,
+        rng: np.random.Generator,
+        customer_service_time_range: tp.Tuple[int, int],
+        customer_purchase_price_range: tp.Tuple[int, int],
+    ):
+        self._rng = rng
+        self._customer_service_time_range = customer_service_time_range
+        self._customer_purchase_price_range = customer_purchase_price_range
+        self._gaps = np.empty(0, dtype=np.int64)
+        self._gaps_range: tp.Optional[tp.Tuple[int, int]] = None
+
+    def _draw_gaps(self, time_between_customers_range: tp.Tuple[int, int], size: int) -> np.ndarray:
+        low, high = time_between_customers_range
+        #  Zero gaps only would never fill the tick
+        high = max(high, 1)
+        return self._rng.integers(low, high, size=size, endpoint=True)
+
+    def _peek_gaps(self, time_between_customers_range: tp.Tuple[int, int], size: int) -> np.ndarray:
+        """Next size gaps without consuming them, gaps left from another range are dropped"""
+        if time_between_customers_range != self._gaps_range:
+            self._gaps = np.empty(0, dtype=np.int64)
+            self._gaps_range = time_between_customers_range
+        if len(self._gaps) < size:
+            self._gaps = np.concatenate((
+                self._gaps, self._draw_gaps(time_between_customers_range, size - len(self._gaps))
+            ))
+        return self._gaps[:size]
+
+    def _expected_gaps(self, time_between_customers_range: tp.Tuple[int, int], total_time: int) -> int:
+        mean_gap = max(sum(time_between_customers_range) / 2, 1)
+        return int(total_time / mean_gap * self.GAPS_RESERVE_FACTOR) + 1
+
+    def _draw_batch(self, customers_num: int) -> CustomerBatch:
+        return CustomerBatch(
+            service_times=self._rng.integers(*self._customer_service_time_range, size=customers_num, endpoint=True),
+            purchase_costs=self._rng.integers(
+                *self._customer_purchase_price_range, size=customers_num, endpoint=True
+            ),
+        )
+
+    def next_gap(self, time_between_customers_range: tp.Tuple[int, int]) -> int:
+        """Draw time until the next customer"""
+        low, high = time_between_customers_range
+        return int(self._rng.integers(low, max(high, 1), endpoint=True))
+
+    def next_customer(self) -> tp.Tuple[int, int]:
+        """Draw service time and purchase cost of one customer"""
+        return (
+            int(self._rng.integers(*self._customer_service_time_range, endpoint=True)),
+            int(self._rng.integers(*self._customer_purchase_price_range, endpoint=True)),
+        )
+
+    def _count_customers_per_tick(
+        self,
+        ticks_num: int,
+        tick_time: int,
+        time_between_customers_range: tp.Tuple[int, int],
+    ) -> np.ndarray:
+        """
+        Gaps of all ticks are taken from one stream: a tick takes gaps until their cumulative sum
+        reaches tick time, the gap which overflows the tick is dropped.
+        """
+        gaps_num = self._expected_gaps(time_between_customers_range, ticks_num * tick_time) + ticks_num
+        gaps_cumsum = np.cumsum(self._peek_gaps(time_between_customers_range, gaps_num))
+        counts = np.empty(ticks_num, dtype=np.int64)
+        tick_start_idx = 0
+        tick_start_time = 0
+        for tick_idx in range(ticks_num):
+            overflow_idx = np.searchsorted(gaps_cumsum, tick_start_time + tick_time, side='left')
+            while overflow_idx == len(gaps_cumsum):
+                gaps_num += self._expected_gaps(time_between_customers_range, (ticks_num - tick_idx) * tick_time)
+                gaps_cumsum = np.cumsum(self._peek_gaps(time_between_customers_range, gaps_num))
+                overflow_idx = np.searchsorted(gaps_cumsum, tick_start_time + tick_time, side='left')
+            counts[tick_idx] = overflow_idx - tick_start_idx + 1
+            tick_start_idx = overflow_idx + 1
+            tick_start_time = gaps_cumsum[overflow_idx]
+        self._gaps = self._gaps[tick_start_idx:]
+        return counts
+
+    def generate(self, tick_time: int, time_between_customers_range: tp.Tuple[int, int]) -> CustomerBatch:
+        """Generate customers arriving during one tick"""
+        customers_num = self._count_customers_per_tick(1, tick_time, time_between_customers_range)[0]
+        return self._draw_batch(customers_num)
+
+    def generate_many(
+        self,
+        ticks_num: int,
+        tick_time: int,
+        time_between_customers_range: tp.Tuple[int, int],
+    ) -> tp.List[CustomerBatch]:
+        """Generate customers for several ticks with the same flow at once"""
+        counts = self._count_customers_per_tick(ticks_num, tick_time, time_between_customers_range)
+        batch = self._draw_batch(int(counts.sum()))
+        split_idx = np.cumsum(counts)[:-1]
+        return [
+            CustomerBatch(service_times=service_times, purchase_costs=purchase_costs)
+            for service_times, purchase_costs in zip(
+                np.split(batch.service_times, split_idx),
+                np.split(batch.purchase_costs, split_idx),
+            )
+        ]
+
+
+#  Added to seed entropy of common random numbers streams ('CRN' in ASCII)
+COMMON_RANDOM_STREAMS_TAG = 0x43524E
+
+
+class UniformStream:
+    """Uniform numbers of one generator consumed strictly in order, drawn in blocks, mirrored (1 - u) if antithetic"""
+    BLOCK_SIZE = 1024
+
+    def __init__(self, rng: np.random.Generator, antithetic: bool = False):
+        self._rng = rng
+        self._antithetic = antithetic
+        self._block = np.empty(0, dtype=np.float64)
+        self._position = 0
+
+    def peek(self, size: int) -> np.ndarray:
+        """Next size numbers without consuming them"""
+        available = len(self._block) - self._position
+        if available < size:
+            uniforms = self._rng.random(max(self.BLOCK_SIZE, size - available))
+            if self._antithetic:
+                uniforms = 1.0 - uniforms
+            self._block = np.concatenate((self._block[self._position:], uniforms))
+            self._position = 0
+        return self._block[self._position:self._position + size]
+
+    def take(self, size: int) -> np.ndarray:
+        values = self.peek(size)
+        self._position += size
+        return values
+
+
+def uniform_to_integers(uniforms: np.ndarray, low: int, high: int) -> np.ndarray:
+    """Integers in [low, high] by inversion, so the same uniform gives close values for close ranges"""
+    #  Mirrored uniforms may be exactly 1
+    return np.minimum(low + (uniforms * (high - low + 1)).astype(np.int64), high)
+
+
+class CommonRandomNumbersGenerator(CustomerGenerator):
+    """
+    Customer generator for common random numbers: gaps between customers, service times and purchase costs
+    have their own streams, every value takes exactly one uniform number and integers are drawn by inversion.
+    So the k-th customer of two models with the same seed has the same service time and purchase cost,
+    and arrivals stay aligned even when flow differs because of different queues or levers.
+    """
+
+    def __init__(
+        self,
+        gaps_stream: UniformStream,
+        service_times_stream: UniformStream,
+        purchase_costs_stream: UniformStream,
+        customer_service_time_range: tp.Tuple[int, int],
+        customer_purchase_price_range: tp.Tuple[int, int],
+    ):
+        super().__init__(None, customer_service_time_range, customer_purchase_price_range)
+        self._gaps_stream = gaps_stream
+        self._service_times_stream = service_times_stream
+        self._purchase_costs_stream = purchase_costs_stream
+
+    def _draw_batch(self, customers_num: int) -> CustomerBatch:
+        return CustomerBatch(
+            service_times=uniform_to_integers(
+                self._service_times_stream.take(customers_num), *self._customer_service_time_range
+            ),
+            purchase_costs=uniform_to_integers(
+                self._purchase_costs_stream.take(customers_num), *self._customer_purchase_price_range
+            ),
+        )
+
+    def next_gap(self, time_between_customers_range: tp.Tuple[int, int]) -> int:
+        low, high = time_between_customers_range
+        return int(uniform_to_integers(self._gaps_stream.take(1), low, max(high, 1))[0])
+
+    def next_customer(self) -> tp.Tuple[int, int]:
+        batch = self._draw_batch(1)
+        return int(batch.service_times[0]), int(batch.purchase_costs[0])
+
+    def _count_tick_customers(self, tick_time: int, time_between_customers_range: tp.Tuple[int, int]) -> int:
+        """Gaps are consumed up to the one which overflows the tick, as in CustomerGenerator"""
+        low, high = time_between_customers_range
+        high = max(high, 1)
+        chunk_size = self._expected_gaps(time_between_customers_range, tick_time)
+        customers_num = 1
+        elapsed_time = 0
+        while True:
+            gaps_cumsum = elapsed_time + np.cumsum(uniform_to_integers(self._gaps_stream.peek(chunk_size), low, high))
+            overflow_idx = int(np.searchsorted(gaps_cumsum, tick_time, side='left'))
+            if overflow_idx < chunk_size:
+                self._gaps_stream.take(overflow_idx + 1)
+                return customers_num + overflow_idx
+            self._gaps_stream.take(chunk_size)
+            customers_num += chunk_size
+            elapsed_time = gaps_cumsum[-1]
+
+    def _count_customers_per_tick(
+        self,
+        ticks_num: int,
+        tick_time: int,
+        time_between_customers_range: tp.Tuple[int, int],
+    ) -> np.ndarray:
+        return np.array(
+            [self._count_tick_customers(tick_time, time_between_customers_range) for _ in range(ticks_num)],
+            dtype=np.int64,
+        )
+
+
+def common_random_streams(
+    random_state: tp.Union[int, np.random.SeedSequence, None],
+    antithetic: bool = False,
+) -> tp.List[UniformStream]:
+    """
+    Gaps, service times and purchase costs streams for CommonRandomNumbersGenerator.
+    They are derived from random_state seed without spawning, so the same SeedSequence object passed
+    to several models gives them the same streams. Entropy is tagged, so streams don't repeat children
+    spawned from the same seed (replication seeds). Antithetic streams mirror every uniform of plain ones.
+    """
+    if isinstance(random_state, np.random.SeedSequence):
+        seed_sequence = random_state
+    else:
+        seed_sequence = np.random.SeedSequence(random_state)
+    entropy = seed_sequence.entropy
+    entropy = [entropy] if isinstance(entropy, int) else list(entropy)
+    return [
+        UniformStream(np.random.default_rng(np.random.SeedSequence(
+            entropy + [COMMON_RANDOM_STREAMS_TAG],
+            spawn_key=seed_sequence.spawn_key + (stream_idx,),
+            pool_size=seed_sequence.pool_size,
+        )), antithetic=antithetic)
+        for stream_idx in range(3)
+    ]
@@ -0,0 +1,117 @@
+"""
+Largest-Triangle-Three-Buckets downsampling (Steinarsson, 2013).
+
+Keeps the first and the last points and one point from each of the other buckets: the one forming
+the largest triangle with the previously kept point and the average of the next bucket.
+Peaks and drops stay visible on the chart, unlike with every-n-th point or averaging.
+StreamingLTTB downsamples a growing series without reading its old points again.
+"""
+import typing as tp
+
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of at most threshold points to keep, in increasing order"""
+    points_num = len(x)
+    if threshold >= points_num or threshold < 3:
+        return np.arange(points_num)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    #  Middle points are split into threshold - 2 buckets [edges[i], edges[i + 1])
+    edges = np.linspace(1, points_num - 1, threshold - 1).astype(np.int64)
+    bucket_sizes = np.diff(edges)
+    #  reduceat sums the last edge up to the end of array (the last point), this sum is dropped
+    average_x = np.add.reduceat(x, edges)[:-1] / bucket_sizes
+    average_y = np.add.reduceat(y, edges)[:-1] / bucket_sizes
+    #  For the last bucket the next "bucket" is the last point
+    next_x = np.append(average_x[1:], x[-1])
+    next_y = np.append(average_y[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = points_num - 1
+    previous = 0
+    for bucket_idx in range(threshold - 2):
+        low, high = edges[bucket_idx], edges[bucket_idx + 1]
+        previous_x, previous_y = x[previous], y[previous]
+        #  Doubled triangle areas, constant factor doesn't change argmax
+        areas = np.abs(
+            (previous_x - next_x[bucket_idx]) * (y[low:high] - previous_y)
+            - (previous_x - x[low:high]) * (next_y[bucket_idx] - previous_y)
+        )
+        previous = low + int(areas.argmax())
+        selected[bucket_idx + 1] = previous
+    return selected
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> tuple:
+    """Downsampled (x, y)"""
+    indices = lttb_indices(x, y, threshold)
+    return np.asarray(x)[indices], np.asarray(y)[indices]
+
+
+class StreamingLTTB:
+    """
+    LTTB of a series which only grows, e.g. a recorder column. Buckets have fixed size (stride), a bucket
+    is reduced to one point as soon as the next bucket is complete. When too many points are kept,
+    they are downsampled by half with lttb and the stride doubles, so at most threshold points are returned.
+    Every call reads only new points and the not reduced tail, which is shorter than two strides.
+    """
+    #  Room for the first, the most distinct and the last point of the tail
+    TAIL_POINTS = 3
+
+    def __init__(self, threshold: int):
+        if threshold < 2 * self.TAIL_POINTS:
+            raise ValueError(f'Threshold must be at least {2 * self.TAIL_POINTS}, got {threshold}')
+        self.threshold = threshold
+        self._stride = 1
+        self._kept_x: tp.List[float] = []
+        self._kept_y: tp.List[float] = []
+        self._reduced_num = 0  # points of series before the tail
+
+    def _reduce_bucket(self, x: np.ndarray, y: np.ndarray):
+        low = self._reduced_num
+        high = low + self._stride
+        if self._stride == 1:
+            selected = low
+        else:
+            next_x = float(np.mean(x[high:high + self._stride]))
+            next_y = float(np.mean(y[high:high + self._stride]))
+            previous_x, previous_y = self._kept_x[-1], self._kept_y[-1]
+            areas = np.abs(
+                (previous_x - next_x) * (y[low:high] - previous_y) - (previous_x - x[low:high]) * (next_y - previous_y)
+            )
+            selected = low + int(areas.argmax())
+        self._kept_x.append(float(x[selected]))
+        self._kept_y.append(float(y[selected]))
+        self._reduced_num = high
+
+    def _compact(self):
+        kept_x, kept_y = np.array(self._kept_x), np.array(self._kept_y)
+        indices = lttb_indices(kept_x, kept_y, (self.threshold - self.TAIL_POINTS) // 2)
+        self._kept_x, self._kept_y = kept_x[indices].tolist(), kept_y[indices].tolist()
+        self._stride *= 2
+
+    def downsample(self, x: np.ndarray, y: np.ndarray) -> tp.Tuple[np.ndarray, np.ndarray]:
+        """Downsampled (x, y) of the whole series, x and y must start with the points of the previous call"""
+        points_num = len(x)
+        if points_num == 0:
+            return np.empty(0), np.empty(0)
+        if not self._kept_x:
+            self._kept_x.append(float(x[0]))
+            self._kept_y.append(float(y[0]))
+            self._reduced_num = 1
+        while self._reduced_num + 2 * self._stride <= points_num:
+            self._reduce_bucket(x, y)
+            if len(self._kept_x) > self.threshold - self.TAIL_POINTS:
+                self._compact()
+
+        tail_x = np.asarray(x[self._reduced_num:], dtype=np.float64)
+        tail_y = np.asarray(y[self._reduced_num:], dtype=np.float64)
+        tail_indices = lttb_indices(tail_x, tail_y, self.TAIL_POINTS)
+        return (
+            np.concatenate((self._kept_x, tail_x[tail_indices])),
+            np.concatenate((self._kept_y, tail_y[tail_indices])),
+        )
@@ -0,0 +1,52 @@
+import typing as tp
+
+
+class Metric:
+    """Running total which is updated where the value changes, so reading it is O(1)"""
+    __slots__ = ('name', 'value')
+
+    def __init__(self, name: str, value: tp.Union[int, float] = 0):
+        self.name = name
+        self.value = value
+
+    def add(self, amount: tp.Union[int, float]):
+        self.value += amount
+
+
+class MetricsRegistry:
+    """
+    Single place where model stats are registered.
+    Counters are Metric objects updated by their owners, derived metrics are computed from counters on read.
+    """
+
+    def __init__(self):
+        self._entries: tp.Dict[str, tp.Union[Metric, tp.Callable[[], tp.Any]]] = {}
+
+    def counter(self, name: str, initial: tp.Union[int, float] = 0) -> Metric:
+        """Register counter (or get already registered one)"""
+        entry = self._entries.get(name)
+        if entry is None:
+            entry = self._entries[name] = Metric(name, initial)
+        elif not isinstance(entry, Metric):
+            raise ValueError(f'Metric {name!r} is already registered as derived one')
+        return entry
+
+    def derived(self, name: str, getter: tp.Callable[[], tp.Any]):
+        if name in self._entries:
+            raise ValueError(f'Metric {name!r} is already registered')
+        self._entries[name] = getter
+
+    def __getitem__(self, name: str) -> tp.Any:
+        entry = self._entries[name]
+        return entry.value if isinstance(entry, Metric) else entry()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    @property
+    def names(self) -> tp.List[str]:
+        return list(self._entries)
+
+    def snapshot(self) -> tp.Dict[str, tp.Any]:
+        """Values of all metrics in order of registration"""
+        return {name: self[name] for name in self._entries}
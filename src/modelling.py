@@ -1,17 +1,41 @@
-import random
-import sys
 import typing as tp
 
-from src.customer import Customer
-from src.supermarket import Supermarket
+import numpy as np
+
+from src.customer import CustomerBatch
+from src.customer_generator import CommonRandomNumbersGenerator, common_random_streams, CustomerGenerator
+from src.metrics import MetricsRegistry
+from src.profiling import PhaseProfiler, PhaseStats
+from src.sketch import TDigest
+from src.supermarket import RingBufferSupermarket, Supermarket
+from src.vectorized_supermarket import VectorizedSupermarket
 from src.utils import (
     logger,
-    HOURS_PER_DAY,
     MINUTES_PER_DAY,
     MINUTES_PER_HOUR,
     Weekday,
 )
 
+SUPERMARKET_ENGINES: tp.Dict[str, tp.Type[Supermarket]] = {
+    'objects': Supermarket,
+    'ring_buffer': RingBufferSupermarket,
+    'vectorized': VectorizedSupermarket,
+}
+
+#  Parameters which can be changed in running model, see SupermarketModel.set_levers
+SUPERMARKET_LEVERS = ['ads_spend_per_day', 'discount_percent', 'cashier_salary_per_day', 'profit_per_sale_percent']
+CUSTOMER_LEVERS = ['time_between_customers_range', 'customer_service_time_range', 'customer_purchase_price_range']
+WAITING_TIME_QUANTILES = (0.5, 0.9, 0.99)
+
+
+def waiting_time_stats(waiting_times: TDigest) -> tp.Dict[str, tp.Optional[float]]:
+    """Mean and WAITING_TIME_QUANTILES of sketch, None if nobody has waited yet (NaN isn't valid JSON)"""
+    is_empty = waiting_times.count == 0
+    stats = {'average_waiting_time': None if is_empty else waiting_times.mean}
+    for quantile in WAITING_TIME_QUANTILES:
+        stats[f'waiting_time_p{quantile * 100:g}'] = None if is_empty else waiting_times.quantile(quantile)
+    return stats
+
 
 class SupermarketModel:
     ADS_FLOW_INCREASE_PERCENT = 10
@@ -38,9 +62,13 @@ class SupermarketModel:
         profit_per_sale_percent: float,
         cashier_salary_per_day: int,
         tick_time: int,
-        random_state: int = None
+        random_state: tp.Union[int, np.random.SeedSequence, None] = None,
+        supermarket_engine: str = 'objects',
+        common_random_numbers: bool = False,
+        antithetic: bool = False,
     ):
-        self._supermarket = Supermarket(
+        self._supermarket = self._create_supermarket(
+            supermarket_engine,
             checkouts_num=total_checkouts,
             max_checkout_capacity=max_checkout_capacity,
             ads_spend_per_day=ads_spend_per_day,
@@ -56,14 +84,70 @@ class SupermarketModel:
         self._current_daytime_minutes = 0  # in minutes
         self._current_tick = 0
         self._passed_days = 0
+        self._observers: tp.List[tp.Callable[['SupermarketModel'], None]] = []
+        self._profiler: tp.Optional[PhaseProfiler] = None
+        self._last_profiler: tp.Optional[PhaseProfiler] = None
+        #  Antithetic run mirrors uniforms of common random numbers streams
+        self._common_random_numbers = common_random_numbers or antithetic
+        self._antithetic = antithetic
+        self._rng = np.random.default_rng(random_state)
+        self._random_streams = common_random_streams(random_state, antithetic) if self._common_random_numbers else None
+        self._customer_generator = self._create_customer_generator()
         logger.debug(
-            f"Model with parameters: tick_time={self._tick_time}, "
-            f"time_btw_cust = {self._time_between_customers_range}")
-        # if random_state:
-        #     random.setstate(random_state)
+            "Model with parameters: tick_time=%s, time_btw_cust = %s",
+            self._tick_time, self._time_between_customers_range,
+        )
 
-    def _get_updated_time_between_customers(self):
-        current_time_between_customers_range = self._time_between_customers_range
+    @staticmethod
+    def _create_supermarket(supermarket_engine: str, **supermarket_kwargs) -> Supermarket:
+        if supermarket_engine not in SUPERMARKET_ENGINES:
+            raise ValueError(
+                f'Unknown supermarket engine {supermarket_engine!r}, expected one of {list(SUPERMARKET_ENGINES)}'
+            )
+        return SUPERMARKET_ENGINES[supermarket_engine](**supermarket_kwargs)
+
+    def _create_customer_generator(self) -> CustomerGenerator:
+        if self._random_streams is not None:
+            return CommonRandomNumbersGenerator(
+                *self._random_streams,
+                customer_service_time_range=self._customer_service_time_range,
+                customer_purchase_price_range=self._customer_purchase_price_range,
+            )
+        return CustomerGenerator(
+            rng=self._rng,
+            customer_service_time_range=self._customer_service_time_range,
+            customer_purchase_price_range=self._customer_purchase_price_range,
+        )
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        #  Observers (recorders, UI callbacks) belong to the current run, not to the model state
+        state['_observers'] = []
+        return state
+
+    def reseed(self, random_state: tp.Union[int, np.random.SeedSequence, None]):
+        """Continue modelling with new random stream"""
+        self._rng = np.random.default_rng(random_state)
+        if self._common_random_numbers:
+            self._random_streams = common_random_streams(random_state, self._antithetic)
+        self._customer_generator = self._create_customer_generator()
+
+    def set_levers(self, **levers):
+        """
+        Change store parameters of running model: ads, discount, salary, profit per sale
+        and time between customers, service time and purchase price ranges.
+        """
+        for name, value in levers.items():
+            if name in SUPERMARKET_LEVERS:
+                setattr(self._supermarket, name, value)
+            elif name in CUSTOMER_LEVERS:
+                setattr(self, f'_{name}', tuple(value))
+            else:
+                raise ValueError(f'Unknown lever {name!r}, expected one of {SUPERMARKET_LEVERS + CUSTOMER_LEVERS}')
+        self._customer_generator = self._create_customer_generator()
+
+    def _get_base_flow_increase_percent(self) -> float:
+        """Flow increase which doesn't depend on checkouts workload (weekday, daytime, ads and discounts)"""
         flow_increase_percent = 0
 
         #  Day/week time flow increase
@@ -81,13 +165,14 @@ class SupermarketModel:
         flow_increase_percent += \
             (discount_percent // self.DISCOUNT_COST_TO_FLOW_INCREASE) * self.DISCOUNT_FLOW_INCREASE_PERCENT
 
-        #  Current workload flow decrease (min queue in checkouts -> -X% per each person
-        min_checkout_workload = min(self._supermarket.current_checkouts_workload)
-        flow_increase_percent -= min_checkout_workload * self.FLOW_DECREASE_PER_PERSON_PERCENT
-
         logger.debug(
-            f"ADS FLOW increase percent = {(ads_spend_per_day // self.ADS_COST_TO_FLOW_INCREASE) * self.ADS_FLOW_INCREASE_PERCENT}")
-        logger.debug(f"FLOW increase percent = {flow_increase_percent}")
+            "ADS FLOW increase percent = %s",
+            (ads_spend_per_day // self.ADS_COST_TO_FLOW_INCREASE) * self.ADS_FLOW_INCREASE_PERCENT,
+        )
+        return flow_increase_percent
+
+    def _scale_time_between_customers(self, flow_increase_percent: float) -> tp.Tuple[int, int]:
+        logger.debug("FLOW increase percent = %s", flow_increase_percent)
         return tuple(
             map(
                 int,
@@ -95,26 +180,21 @@ class SupermarketModel:
             )
         )
 
-    def _generate_customers(self) -> tp.List[Customer]:
+    def _get_updated_time_between_customers(self):
+        flow_increase_percent = self._get_base_flow_increase_percent()
+
+        #  Current workload flow decrease (min queue in checkouts -> -X% per each person
+        min_checkout_workload = self._supermarket.min_checkout_workload
+        flow_increase_percent -= min_checkout_workload * self.FLOW_DECREASE_PER_PERSON_PERCENT
+
+        return self._scale_time_between_customers(flow_increase_percent)
+
+    def _generate_customers(self) -> CustomerBatch:
         """
         Generate customers with given random parameters.
         """
-        remaining_time = self._tick_time
-        generated_customers = []
         updated_time_between_customers_range = self._get_updated_time_between_customers()
-
-        while remaining_time > 0:
-            customer_service_time = random.randint(*self._customer_service_time_range)
-            generated_customers.append(
-                Customer(
-                    service_time=customer_service_time,
-                    remaining_service_time=customer_service_time,
-                    purchase_cost=random.randint(*self._customer_purchase_price_range)
-                )
-            )
-            time_between_customers = random.randint(*updated_time_between_customers_range)
-            remaining_time -= time_between_customers
-        return generated_customers
+        return self._customer_generator.generate(self._tick_time, updated_time_between_customers_range)
 
     def tick(self):
         """
@@ -122,10 +202,17 @@ class SupermarketModel:
         generate new customers based on this, weekday, ads and discounts.
         Then makes supermarket tick.
         """
+        if self._profiler is not None:
+            self._profiled_tick()
+            return
         generated_customers = self._generate_customers()
-        logger.debug(f'TICK# {self._current_tick + 1}: generated_customers = {generated_customers}')
-        self._supermarket.recieve_customers(generated_customers)
+        logger.debug('TICK# %s: generated_customers = %s', self._current_tick + 1, generated_customers)
+        self._supermarket.recieve_customer_batch(generated_customers)
         self._supermarket.tick(self._tick_time)
+        self._advance_clock()
+        self._notify_observers()
+
+    def _advance_clock(self):
         self._current_daytime_minutes += self._tick_time
         if self._current_daytime_minutes >= MINUTES_PER_DAY:
             self._current_daytime_minutes %= MINUTES_PER_DAY
@@ -134,8 +221,91 @@ class SupermarketModel:
             self._current_weekday %= len(Weekday)
         self._current_tick += 1
 
+    def _profiled_tick(self):
+        """Same as tick, but time of every phase is added to profiler"""
+        profiler = self._profiler
+        clock = profiler.clock
+        served_customers = self._supermarket.metrics['total_served_customers']
+
+        start = clock()
+        time_between_customers_range = self._get_updated_time_between_customers()
+        flow_end = clock()
+        profiler.add('flow', flow_end - start)
+
+        generated_customers = self._customer_generator.generate(self._tick_time, time_between_customers_range)
+        generation_end = clock()
+        profiler.add('generation', generation_end - flow_end, len(generated_customers))
+
+        self._supermarket.recieve_customer_batch(generated_customers)
+        dispatch_end = clock()
+        profiler.add('dispatch', dispatch_end - generation_end, len(generated_customers))
+
+        self._supermarket.tick(self._tick_time)
+        serving_end = clock()
+        profiler.add(
+            'serving', serving_end - dispatch_end,
+            self._supermarket.metrics['total_served_customers'] - served_customers,
+        )
+
+        self._advance_clock()
+        clock_end = clock()
+        profiler.add('clock', clock_end - serving_end)
+
+        if self._observers:
+            self._notify_observers()
+            profiler.add('observers', clock() - clock_end, len(self._observers))
+
+    def enable_profiling(self, profiler: tp.Optional[PhaseProfiler] = None) -> PhaseProfiler:
+        """Measure time of tick phases from now on, profile() returns the totals"""
+        self._profiler = profiler or self._profiler or PhaseProfiler()
+        return self._profiler
+
+    def disable_profiling(self):
+        """Stop measuring (already collected totals are kept)"""
+        self._last_profiler = self._profiler or self._last_profiler
+        self._profiler = None
+
+    def profile(self) -> tp.Dict[str, PhaseStats]:
+        """Cumulative time, calls and items of every tick phase measured so far"""
+        profiler = self._profiler or self._last_profiler
+        return {} if profiler is None else profiler.stats()
+
+    def add_observer(self, observer: tp.Callable[['SupermarketModel'], None]):
+        """Call observer with the model after every tick"""
+        self._observers.append(observer)
+
+    def remove_observer(self, observer: tp.Callable[['SupermarketModel'], None]):
+        self._observers.remove(observer)
+
+    def _notify_observers(self):
+        for observer in self._observers:
+            observer(self)
+
+    # Clock sections
+
+    def tick_time(self) -> int:
+        return self._tick_time
+
+    def current_tick(self) -> int:
+        return self._current_tick
+
+    def current_weekday(self) -> Weekday:
+        return Weekday(self._current_weekday)
+
+    def current_daytime_minutes(self) -> int:
+        return self._current_daytime_minutes
+
+    def passed_days(self) -> int:
+        return self._passed_days
+
+    def total_checkouts(self) -> int:
+        return self._supermarket.checkouts_num
+
     # Stats sections
 
+    def metrics(self) -> MetricsRegistry:
+        return self._supermarket.metrics
+
     def average_checkouts_workload(self) -> tp.List[float]:
         return self._supermarket.average_checkouts_workload
 
@@ -145,8 +315,11 @@ class SupermarketModel:
     def total_lost_customers(self) -> int:
         return self._supermarket.total_lost_customers
 
+    def average_workload(self) -> float:
+        return self._supermarket.metrics['average_workload']
+
     def total_potential_customers(self) -> int:
-        return self._supermarket.total_lost_customers + self._supermarket.total_served_customers
+        return self._supermarket.metrics['total_potential_customers']
 
     def total_earnings(self) -> int:
         return self._supermarket.total_earnings
@@ -163,8 +336,23 @@ class SupermarketModel:
     def total_spent_on_discounts(self):
         return self._supermarket.total_spent_on_discounts
 
+    def checkouts_waiting_times(self) -> tp.List[TDigest]:
+        """Sketches of minutes customers waited in queue of every checkout before their service started"""
+        return self._supermarket.checkouts_waiting_times
+
+    def waiting_times(self) -> TDigest:
+        """Sketch of customers waiting times in the whole store, mergeable with sketches of other runs"""
+        return self._supermarket.waiting_times()
+
     def checkouts_current_workload(self) -> tp.List[int]:
         return self._supermarket.current_checkouts_workload
 
     def current_checkouts_customer_progress(self) -> tp.List[int]:
         return self._supermarket.current_checkouts_customer_progress
+
+    def stats(self) -> tp.Dict[str, tp.Any]:
+        """Collect all final stats into plain dict (same values as shown in UI results)"""
+        stats = self._supermarket.metrics.snapshot()
+        stats['average_checkouts_workload'] = self.average_checkouts_workload()
+        stats.update(waiting_time_stats(self.waiting_times()))
+        return stats
@@ -0,0 +1,133 @@
+"""
+Simulation-based search of store levers maximizing net profit.
+
+Uses successive halving over replications: many random configs get a few replications,
+only the best part of them (and those not clearly worse than the leader) get more replications on the next rung.
+"""
+import typing as tp
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.replications import run_jobs, spawn_seeds
+from src.stats import StatSummary, summarize
+from src.utils import TOTAL_MODELLING_MINUTES
+
+
+@dataclass
+class Parameter:
+    low: float
+    high: float
+    is_integer: bool = True
+
+    def sample(self, rng: np.random.Generator) -> tp.Union[int, float]:
+        if self.is_integer:
+            return int(rng.integers(self.low, self.high, endpoint=True))
+        return float(rng.uniform(self.low, self.high))
+
+
+DEFAULT_SEARCH_SPACE: tp.Dict[str, Parameter] = {
+    'total_checkouts': Parameter(1, 10),
+    'ads_spend_per_day': Parameter(0, 70000),
+    'discount_percent': Parameter(0.0, 30.0, is_integer=False),
+}
+
+
+def net_profit(stats: tp.Dict[str, tp.Any]) -> float:
+    """Profit from sales minus spends on ads, salaries and discounts"""
+    return (
+        stats['total_profit']
+        - stats['total_spent_on_ads']
+        - stats['total_spent_on_salaries']
+        - stats['total_spent_on_discounts']
+    )
+
+
+def successive_halving_rungs(configs_num: int, reduction_factor: int) -> int:
+    """Rungs until one config is left (survivors are divided by reduction_factor on every rung), and the last one"""
+    rungs_num = 1
+    while configs_num > 1:
+        configs_num = max(1, configs_num // reduction_factor)
+        rungs_num += 1
+    return rungs_num
+
+
+@dataclass
+class Candidate:
+    model_config: tp.Dict[str, tp.Any]
+    objective_values: tp.List[float]
+    summary: tp.Optional[StatSummary] = None
+
+
+@dataclass
+class OptimizationResult:
+    best: Candidate
+    candidates: tp.List[Candidate]
+    total_simulations: int
+
+
+def optimize(
+    base_config: tp.Dict[str, tp.Any],
+    search_space: tp.Optional[tp.Dict[str, Parameter]] = None,
+    configs_num: int = 27,
+    min_replications: int = 2,
+    reduction_factor: int = 3,
+    objective: tp.Callable[[tp.Dict[str, tp.Any]], float] = net_profit,
+    seed: int = 0,
+    total_minutes: int = TOTAL_MODELLING_MINUTES,
+    max_workers: tp.Optional[int] = None,
+    confidence: float = 0.95,
+) -> OptimizationResult:
+    """
+    Successive halving: on every rung survivors get replications up to min_replications * reduction_factor ** rung,
+    then only 1 / reduction_factor best of them by mean objective survive.
+    Candidates whose confidence interval lies fully below the leader's one are dropped even if they are in the top.
+    All candidates share replication seeds, so they are compared on the same random streams.
+    """
+    search_space = search_space or DEFAULT_SEARCH_SPACE
+    rng = np.random.default_rng(seed)
+    candidates = [
+        Candidate(
+            model_config={**base_config, **{name: param.sample(rng) for name, param in search_space.items()}},
+            objective_values=[],
+        )
+        for _ in range(configs_num)
+    ]
+    rungs_num = successive_halving_rungs(configs_num, reduction_factor)
+    seeds = spawn_seeds(seed, min_replications * reduction_factor ** (rungs_num - 1))
+
+    total_simulations = 0
+    survivors = list(candidates)
+    for rung in range(rungs_num):
+        replications_num = min_replications * reduction_factor ** rung
+        jobs = [
+            (candidate, {**candidate.model_config, 'random_state': seeds[replication_idx]})
+            for candidate in survivors
+            for replication_idx in range(len(candidate.objective_values), replications_num)
+        ]
+        jobs_stats = run_jobs(
+            [model_config for _, model_config in jobs],
+            total_minutes=total_minutes,
+            max_workers=max_workers,
+        )
+        total_simulations += len(jobs)
+        for (candidate, _), stats in zip(jobs, jobs_stats):
+            candidate.objective_values.append(objective(stats))
+        for candidate in survivors:
+            candidate.summary = summarize(candidate.objective_values, confidence=confidence)
+
+        survivors.sort(key=lambda candidate: candidate.summary.mean, reverse=True)
+        if len(survivors) == 1:
+            break
+        leader = survivors[0].summary
+        survivors = [
+            candidate
+            for candidate in survivors[:max(1, len(survivors) // reduction_factor)]
+            if leader.samples_num < 2 or candidate.summary.ci_high >= leader.ci_low
+        ]
+
+    return OptimizationResult(
+        best=survivors[0],
+        candidates=candidates,
+        total_simulations=total_simulations,
+    )
@@ -0,0 +1,70 @@
+import time
+import typing as tp
+from dataclasses import dataclass
+
+
+@dataclass
+class PhaseStats:
+    name: str
+    total_seconds: float = 0.0
+    calls: int = 0
+    items: int = 0
+
+    @property
+    def seconds_per_call(self) -> float:
+        return self.total_seconds / self.calls if self.calls else 0.0
+
+    @property
+    def seconds_per_item(self) -> float:
+        return self.total_seconds / self.items if self.items else 0.0
+
+
+class PhaseProfiler:
+    """
+    Cumulative time, calls and processed items per phase of model tick.
+    Model measures phases only while profiler is enabled, see SupermarketModel.enable_profiling.
+    """
+
+    def __init__(self, clock: tp.Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self._phases: tp.Dict[str, PhaseStats] = {}
+
+    def add(self, phase: str, seconds: float, items: int = 0):
+        stats = self._phases.get(phase)
+        if stats is None:
+            stats = self._phases[phase] = PhaseStats(phase)
+        stats.total_seconds += seconds
+        stats.calls += 1
+        stats.items += items
+
+    def reset(self):
+        self._phases.clear()
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(stats.total_seconds for stats in self._phases.values())
+
+    def stats(self) -> tp.Dict[str, PhaseStats]:
+        """Phases in order of their first call"""
+        return dict(self._phases)
+
+    def to_dict(self) -> tp.Dict[str, tp.Dict[str, float]]:
+        return {
+            name: {'total_seconds': stats.total_seconds, 'calls': stats.calls, 'items': stats.items}
+            for name, stats in self._phases.items()
+        }
+
+    def report(self) -> str:
+        return format_report(self._phases)
+
+
+def format_report(phases: tp.Dict[str, PhaseStats]) -> str:
+    """Table of phases with share of total time"""
+    total_seconds = sum(stats.total_seconds for stats in phases.values()) or 1.0
+    lines = [f'{"phase":<20}{"seconds":>12}{"share":>8}{"calls":>10}{"items":>12}{"us/call":>10}']
+    for stats in phases.values():
+        lines.append(
+            f'{stats.name:<20}{stats.total_seconds:>12.4f}{stats.total_seconds / total_seconds:>8.1%}'
+            f'{stats.calls:>10}{stats.items:>12}{stats.seconds_per_call * 1e6:>10.2f}'
+        )
+    return '\n'.join(lines)
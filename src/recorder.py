@@ -0,0 +1,182 @@
+"""
+Per-tick time series of a model run.
+
+Recorder is attached as model observer and appends one row per tick into preallocated numpy columns,
+which grow twice when full. With memmap_dir columns are memory-mapped files, so multi-year runs don't need RAM.
+"""
+import typing as tp
+from pathlib import Path
+
+import numpy as np
+
+from src.utils import MINUTES_PER_DAY, Weekday
+
+if tp.TYPE_CHECKING:
+    from src.modelling import SupermarketModel
+
+#  Per-tick values are differences of these model totals between consecutive ticks
+DELTA_COLUMNS: tp.Dict[str, str] = {
+    'arrivals': 'total_generated_customers',
+    'served': 'total_served_customers',
+    'lost': 'total_lost_customers',
+    'earnings': 'total_earnings',
+    'profit': 'total_profit',
+    'spent_on_ads': 'total_spent_on_ads',
+    'spent_on_salaries': 'total_spent_on_salaries',
+    'spent_on_discounts': 'total_spent_on_discounts',
+}
+
+#  Running totals of these delta columns are recorded too as 'total_<name>', so charts don't sum the whole history
+CUMULATIVE_COLUMNS = ('lost', 'profit')
+
+COLUMN_DTYPES: tp.Dict[str, np.dtype] = {
+    'tick': np.dtype(np.int64),
+    'weekday': np.dtype(np.int8),
+    'minute_of_day': np.dtype(np.int16),
+    'total_workload': np.dtype(np.int64),
+    **{name: np.dtype(np.int64) for name in DELTA_COLUMNS},
+}
+COLUMN_DTYPES['profit'] = np.dtype(np.float64)
+COLUMN_DTYPES['spent_on_discounts'] = np.dtype(np.float64)
+COLUMN_DTYPES.update({f'total_{name}': COLUMN_DTYPES[name] for name in CUMULATIVE_COLUMNS})
+WORKLOAD_DTYPE = np.dtype(np.int32)
+
+
+class TimeSeriesRecorder:
+    """
+    Records model state after every tick: tick number, weekday and minute of day of the tick start,
+    arrivals, served and lost customers, earnings, profit and spends during the tick, total lost customers
+    and profit, and workload of checkouts at the end of the tick (total one and of every checkout,
+    or of the first workload_checkouts of them).
+
+    Usage:
+        recorder = TimeSeriesRecorder(model.total_checkouts())
+        model.add_observer(recorder)
+        ...
+        recorder.to_npz('run.npz')
+    """
+
+    def __init__(
+        self,
+        checkouts_num: int,
+        capacity: int = 1024,
+        memmap_dir: tp.Union[str, Path, None] = None,
+        workload_checkouts: tp.Optional[int] = None,
+    ):
+        self._checkouts_num = checkouts_num if workload_checkouts is None else min(checkouts_num, workload_checkouts)
+        self._capacity = max(1, capacity)
+        self._size = 0
+        self._memmap_dir = None if memmap_dir is None else Path(memmap_dir)
+        if self._memmap_dir is not None:
+            self._memmap_dir.mkdir(parents=True, exist_ok=True)
+        self._columns: tp.Dict[str, np.ndarray] = {
+            name: self._allocate(name, dtype, (self._capacity,)) for name, dtype in COLUMN_DTYPES.items()
+        }
+        self._workload = self._allocate('workload', WORKLOAD_DTYPE, (self._capacity, self._checkouts_num))
+        self._last_totals = dict.fromkeys(DELTA_COLUMNS, 0)
+
+    def _allocate(self, name: str, dtype: np.dtype, shape: tp.Tuple[int, ...]) -> np.ndarray:
+        if self._memmap_dir is None:
+            return np.zeros(shape, dtype=dtype)
+        path = self._memmap_dir / f'{name}.bin'
+        with open(path, 'ab') as f:
+            f.truncate(int(np.prod(shape)) * dtype.itemsize)
+        return np.memmap(path, dtype=dtype, mode='r+', shape=shape)
+
+    def _grow(self):
+        """Double capacity. Memory-mapped files are extended in place, so old rows aren't copied"""
+        capacity = self._capacity * 2
+        for name, column in self._columns.items():
+            self._columns[name] = self._resize(name, column, (capacity,))
+        self._workload = self._resize('workload', self._workload, (capacity, self._checkouts_num))
+        self._capacity = capacity
+
+    def _resize(self, name: str, column: np.ndarray, shape: tp.Tuple[int, ...]) -> np.ndarray:
+        if self._memmap_dir is None:
+            resized = np.zeros(shape, dtype=column.dtype)
+            resized[:self._size] = column[:self._size]
+            return resized
+        column.flush()
+        return self._allocate(name, column.dtype, shape)
+
+    def __call__(self, model: 'SupermarketModel'):
+        self.record(model)
+
+    def record(self, model: 'SupermarketModel'):
+        if self._size == self._capacity:
+            self._grow()
+        row = self._size
+        columns = self._columns
+
+        minute_of_day = model.current_daytime_minutes() - model.tick_time()
+        weekday = int(model.current_weekday())
+        while minute_of_day < 0:
+            minute_of_day += MINUTES_PER_DAY
+            weekday = (weekday - 1) % len(Weekday)
+        columns['tick'][row] = model.current_tick()
+        columns['weekday'][row] = weekday
+        columns['minute_of_day'][row] = minute_of_day
+
+        stats = model.metrics()
+        for name, total_name in DELTA_COLUMNS.items():
+            total = stats[total_name]
+            columns[name][row] = total - self._last_totals[name]
+            self._last_totals[name] = total
+        for name in CUMULATIVE_COLUMNS:
+            columns[f'total_{name}'][row] = self._last_totals[name]
+        workload = model.checkouts_current_workload()
+        columns['total_workload'][row] = sum(workload)
+        self._workload[row] = workload[:self._checkouts_num]
+        self._size += 1
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def checkouts_num(self) -> int:
+        """Number of checkouts with recorded workload"""
+        return self._checkouts_num
+
+    def columns(self) -> tp.Dict[str, np.ndarray]:
+        """Recorded columns (views, not copies), 'workload' is 2D array of shape (ticks, checkouts)"""
+        columns = {name: column[:self._size] for name, column in self._columns.items()}
+        columns['workload'] = self._workload[:self._size]
+        return columns
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns()[name]
+
+    def flush(self):
+        """Write memory-mapped columns to disk"""
+        if self._memmap_dir is not None:
+            for column in [*self._columns.values(), self._workload]:
+                column.flush()
+
+    def to_npz(self, path: tp.Union[str, Path], compressed: bool = True):
+        save = np.savez_compressed if compressed else np.savez
+        save(path, **self.columns())
+
+    def to_arrow(self):
+        """Columns as pyarrow.Table, workload of every checkout is a separate 'workload_<idx>' column"""
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError('pyarrow is required for Arrow/Parquet export: pip install pyarrow') from e
+        columns = self.columns()
+        workload = columns.pop('workload')
+        arrays = {name: pa.array(column) for name, column in columns.items()}
+        for checkout_idx in range(self._checkouts_num):
+            arrays[f'workload_{checkout_idx}'] = pa.array(workload[:, checkout_idx])
+        return pa.table(arrays)
+
+    def to_parquet(self, path: tp.Union[str, Path]):
+        table = self.to_arrow()
+        import pyarrow.parquet as pq
+        pq.write_table(table, str(path))
+
+    def save(self, path: tp.Union[str, Path]):
+        """Export by file extension: .parquet or .npz"""
+        if Path(path).suffix == '.parquet':
+            self.to_parquet(path)
+        else:
+            self.to_npz(path)
@@ -0,0 +1,154 @@
+"""
+Monte Carlo replications of SupermarketModel.
+
+Every replication gets its own RNG stream spawned from one SeedSequence,
+so results are reproducible for the same seed and independent between replications
+regardless of which process runs them.
+"""
+import typing as tp
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.run import run_model
+from src.sketch import TDigest
+from src.stats import StatSummary, summarize
+from src.utils import TOTAL_MODELLING_MINUTES
+
+
+@dataclass
+class ReplicationResults:
+    replications: tp.List[tp.Dict[str, tp.Any]]
+    summary: tp.Dict[str, StatSummary]
+    waiting_times: tp.Optional[TDigest] = None  # merged over replications
+
+
+def _run_job(job: tp.Tuple[tp.Dict[str, tp.Any], int, bool]) -> tp.Dict[str, tp.Any]:
+    model_config, total_minutes, with_waiting_times = job
+    return run_model(model_config, total_minutes=total_minutes, with_waiting_times=with_waiting_times)
+
+
+def run_jobs(
+    model_configs: tp.Sequence[tp.Dict[str, tp.Any]],
+    total_minutes: int = TOTAL_MODELLING_MINUTES,
+    max_workers: tp.Optional[int] = None,
+    with_waiting_times: bool = False,
+) -> tp.List[tp.Dict[str, tp.Any]]:
+    """Run every config (with its own random_state) on process pool, return stats in the same order"""
+    jobs = [(model_config, total_minutes, with_waiting_times) for model_config in model_configs]
+    if max_workers == 1:
+        return [_run_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_run_job, jobs))
+
+
+def spawn_seeds(
+    seed: tp.Union[int, np.random.SeedSequence, None],
+    replications_num: int,
+) -> tp.List[np.random.SeedSequence]:
+    seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    return seed_sequence.spawn(replications_num)
+
+
+def _scalar_stats(replications: tp.List[tp.Dict[str, tp.Any]]) -> tp.List[str]:
+    """Stats which are numbers in every replication (waiting times are None in runs where nobody waited)"""
+    return [
+        name for name in replications[0]
+        if all(isinstance(replication[name], (int, float)) for replication in replications)
+    ]
+
+
+def summarize_replications(
+    replications: tp.List[tp.Dict[str, tp.Any]],
+    confidence: float = 0.95,
+) -> tp.Dict[str, StatSummary]:
+    """Summary for every scalar stat of model"""
+    scalar_stats = _scalar_stats(replications)
+    return {
+        name: summarize([replication[name] for replication in replications], confidence=confidence)
+        for name in scalar_stats
+    }
+
+
+def run_replications(
+    model_config: tp.Dict[str, tp.Any],
+    replications_num: int,
+    seed: tp.Union[int, np.random.SeedSequence, None] = None,
+    total_minutes: int = TOTAL_MODELLING_MINUTES,
+    max_workers: tp.Optional[int] = None,
+    confidence: float = 0.95,
+    with_waiting_times: bool = False,
+) -> ReplicationResults:
+    """
+    Run independent replications of one config, random_state of config is replaced by spawned seeds.
+    With with_waiting_times=True waiting times sketches of replications are merged into one.
+    """
+    model_configs = [
+        {**model_config, 'random_state': replication_seed}
+        for replication_seed in spawn_seeds(seed, replications_num)
+    ]
+    replications = run_jobs(
+        model_configs, total_minutes=total_minutes, max_workers=max_workers, with_waiting_times=with_waiting_times
+    )
+    waiting_times = None
+    if with_waiting_times:
+        waiting_times = TDigest.merged(
+            TDigest.from_dict(replication.pop('waiting_times')) for replication in replications
+        )
+    return ReplicationResults(
+        replications=replications,
+        summary=summarize_replications(replications, confidence=confidence),
+        waiting_times=waiting_times,
+    )
+
+
+@dataclass
+class PairedComparison:
+    """Replications of configs A and B run with the same seeds and summary of per-replication differences B - A"""
+    replications_a: tp.List[tp.Dict[str, tp.Any]]
+    replications_b: tp.List[tp.Dict[str, tp.Any]]
+    differences: tp.Dict[str, StatSummary]
+
+    def variance_reduction(self, name: str) -> float:
+        """
+        Variance of difference of independent runs (var A + var B) divided by variance of paired difference,
+        i.e. how many times fewer replications pairing needs for the same confidence interval
+        """
+        variance_a = summarize([replication[name] for replication in self.replications_a]).variance
+        variance_b = summarize([replication[name] for replication in self.replications_b]).variance
+        paired_variance = self.differences[name].variance
+        return (variance_a + variance_b) / paired_variance if paired_variance > 0 else float('inf')
+
+
+def compare_paired(
+    model_config_a: tp.Dict[str, tp.Any],
+    model_config_b: tp.Dict[str, tp.Any],
+    replications_num: int,
+    seed: tp.Union[int, np.random.SeedSequence, None] = None,
+    total_minutes: int = TOTAL_MODELLING_MINUTES,
+    max_workers: tp.Optional[int] = None,
+    confidence: float = 0.95,
+    common_random_numbers: bool = True,
+) -> PairedComparison:
+    """
+    Compare two configs on the same random numbers: replication i of both configs gets the same spawned seed
+    and, with common_random_numbers, the same customers, so noise mostly cancels out in the differences.
+    """
+    seeds = spawn_seeds(seed, replications_num)
+    model_configs = [
+        {**model_config, 'random_state': replication_seed, 'common_random_numbers': common_random_numbers}
+        for model_config in [model_config_a, model_config_b]
+        for replication_seed in seeds
+    ]
+    replications = run_jobs(model_configs, total_minutes=total_minutes, max_workers=max_workers)
+    replications_a, replications_b = replications[:replications_num], replications[replications_num:]
+    scalar_stats = _scalar_stats(replications)
+    differences = {
+        name: summarize(
+            [replication_b[name] - replication_a[name] for replication_a, replication_b in zip(replications_a, replications_b)],
+            confidence=confidence,
+        )
+        for name in scalar_stats
+    }
+    return PairedComparison(replications_a=replications_a, replications_b=replications_b, differences=differences)
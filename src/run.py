@@ -0,0 +1,183 @@
+"""
+Headless batch runner for SupermarketModel.
+
+Usage: python -m src.run --total-checkouts 5 --ads-spend-per-day 7000 --output stats.json
+       python -m src.run --days 3650 --streaming-stats
+
+Doesn't import PyQt5, so it can be used on machines without display and called from scripts.
+"""
+import argparse
+import json
+import logging
+import sys
+import typing as tp
+
+from src.event_modelling import EventSupermarketModel
+from src.modelling import SUPERMARKET_ENGINES, SupermarketModel
+from src.profiling import format_report, PhaseStats
+from src.recorder import TimeSeriesRecorder
+from src.streaming_stats import StreamingStatsObserver
+from src.utils import configure_logging, MINUTES_PER_DAY, TOTAL_MODELLING_MINUTES
+
+DEFAULT_MODEL_CONFIG: tp.Dict[str, tp.Any] = {
+    'total_checkouts': 1,
+    'max_checkout_capacity': 5,
+    'time_between_customers_range': (1, 7),
+    'customer_service_time_range': (1, 7),
+    'customer_purchase_price_range': (30, 9000),
+    'ads_spend_per_day': 0,
+    'discount_percent': 0,
+    'profit_per_sale_percent': 9,
+    'cashier_salary_per_day': 1500,
+    'tick_time': 7,
+    'random_state': 42,
+    'supermarket_engine': 'objects',
+}
+
+MODEL_ENGINES: tp.Dict[str, tp.Type[SupermarketModel]] = {
+    'ticks': SupermarketModel,
+    'events': EventSupermarketModel,
+}
+
+
+def create_model(model_config: tp.Dict[str, tp.Any]) -> SupermarketModel:
+    """Create model from config, optional 'model_engine' key selects fixed-tick or discrete-event model"""
+    model_config = dict(model_config)
+    model_engine = model_config.pop('model_engine', 'ticks')
+    if model_engine not in MODEL_ENGINES:
+        raise ValueError(f'Unknown model engine {model_engine!r}, expected one of {list(MODEL_ENGINES)}')
+    return MODEL_ENGINES[model_engine](**model_config)
+
+
+def run_model(
+    model_config: tp.Dict[str, tp.Any],
+    total_minutes: int = TOTAL_MODELLING_MINUTES,
+    observers: tp.Sequence[tp.Callable[[SupermarketModel], None]] = (),
+    profile: bool = False,
+    with_waiting_times: bool = False,
+) -> tp.Dict[str, tp.Any]:
+    """
+    Run model with given config for total_minutes and return its final stats.
+    With profile=True stats also have 'profile' with time, calls and items of every tick phase,
+    with with_waiting_times=True - 'waiting_times' with state of waiting times sketch (TDigest.to_dict).
+    """
+    model = create_model(model_config)
+    for observer in observers:
+        model.add_observer(observer)
+    if profile:
+        profiler = model.enable_profiling()
+    for _ in range(total_minutes // model_config['tick_time']):
+        model.tick()
+    stats = model.stats()
+    if profile:
+        stats['profile'] = profiler.to_dict()
+    if with_waiting_times:
+        stats['waiting_times'] = model.waiting_times().to_dict()
+    return stats
+
+
+def parse_args(argv: tp.Optional[tp.List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Run supermarket modelling without UI')
+    parser.add_argument('--total-checkouts', type=int, default=DEFAULT_MODEL_CONFIG['total_checkouts'])
+    parser.add_argument('--max-checkout-capacity', type=int, default=DEFAULT_MODEL_CONFIG['max_checkout_capacity'])
+    parser.add_argument(
+        '--time-between-customers-range', type=int, nargs=2, metavar=('LOW', 'HIGH'),
+        default=DEFAULT_MODEL_CONFIG['time_between_customers_range'],
+    )
+    parser.add_argument(
+        '--customer-service-time-range', type=int, nargs=2, metavar=('LOW', 'HIGH'),
+        default=DEFAULT_MODEL_CONFIG['customer_service_time_range'],
+    )
+    parser.add_argument(
+        '--customer-purchase-price-range', type=int, nargs=2, metavar=('LOW', 'HIGH'),
+        default=DEFAULT_MODEL_CONFIG['customer_purchase_price_range'],
+    )
+    parser.add_argument('--ads-spend-per-day', type=int, default=DEFAULT_MODEL_CONFIG['ads_spend_per_day'])
+    parser.add_argument('--discount-percent', type=float, default=DEFAULT_MODEL_CONFIG['discount_percent'])
+    parser.add_argument(
+        '--profit-per-sale-percent', type=float, default=DEFAULT_MODEL_CONFIG['profit_per_sale_percent']
+    )
+    parser.add_argument(
+        '--cashier-salary-per-day', type=int, default=DEFAULT_MODEL_CONFIG['cashier_salary_per_day']
+    )
+    parser.add_argument('--tick-time', type=int, default=DEFAULT_MODEL_CONFIG['tick_time'])
+    parser.add_argument('--random-state', type=int, default=DEFAULT_MODEL_CONFIG['random_state'])
+    parser.add_argument(
+        '--supermarket-engine', choices=sorted(SUPERMARKET_ENGINES),
+        default=DEFAULT_MODEL_CONFIG['supermarket_engine'],
+    )
+    parser.add_argument('--model-engine', choices=sorted(MODEL_ENGINES), default='ticks')
+    parser.add_argument(
+        '--common-random-numbers', action='store_true',
+        help='Separate random streams for arrivals, service times and purchase costs, for paired comparisons',
+    )
+    horizon = parser.add_mutually_exclusive_group()
+    horizon.add_argument('--total-minutes', type=int, default=TOTAL_MODELLING_MINUTES)
+    horizon.add_argument('--days', type=int, help='Modelling horizon in days, e.g. 3650 for ten years')
+    parser.add_argument('--output', help='Write stats as JSON to this file instead of stdout')
+    parser.add_argument('--timeseries', help='Write per-tick time series to this .npz or .parquet file')
+    parser.add_argument('--timeseries-memmap-dir', help='Keep time series in memory-mapped files in this directory')
+    parser.add_argument('--profile', action='store_true', help='Measure tick phases, print table to stderr')
+    parser.add_argument(
+        '--streaming-stats', action='store_true',
+        help='Add mean, std and quantiles of queue length, arrivals and daily profit per weekday and hour to stats',
+    )
+    parser.add_argument(
+        '--log-level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+        help='Enable model logs of this level (disabled by default)',
+    )
+    parser.add_argument('--logs-path', help='Directory for log files, logs go to stderr if not set')
+    return parser.parse_args(argv)
+
+
+def config_from_args(args: argparse.Namespace) -> tp.Dict[str, tp.Any]:
+    return {
+        'total_checkouts': args.total_checkouts,
+        'max_checkout_capacity': args.max_checkout_capacity,
+        'time_between_customers_range': tuple(args.time_between_customers_range),
+        'customer_service_time_range': tuple(args.customer_service_time_range),
+        'customer_purchase_price_range': tuple(args.customer_purchase_price_range),
+        'ads_spend_per_day': args.ads_spend_per_day,
+        'discount_percent': args.discount_percent,
+        'profit_per_sale_percent': args.profit_per_sale_percent,
+        'cashier_salary_per_day': args.cashier_salary_per_day,
+        'tick_time': args.tick_time,
+        'random_state': args.random_state,
+        'supermarket_engine': args.supermarket_engine,
+        'model_engine': args.model_engine,
+        'common_random_numbers': args.common_random_numbers,
+    }
+
+
+def main(argv: tp.Optional[tp.List[str]] = None):
+    args = parse_args(argv)
+    if args.log_level is not None:
+        configure_logging(level=getattr(logging, args.log_level), logs_path=args.logs_path)
+    observers = []
+    if args.timeseries:
+        recorder = TimeSeriesRecorder(args.total_checkouts, memmap_dir=args.timeseries_memmap_dir)
+        observers.append(recorder)
+    if args.streaming_stats:
+        streaming_stats = StreamingStatsObserver()
+        observers.append(streaming_stats)
+    total_minutes = args.total_minutes if args.days is None else args.days * MINUTES_PER_DAY
+    stats = run_model(
+        config_from_args(args), total_minutes=total_minutes, observers=observers, profile=args.profile
+    )
+    if args.streaming_stats:
+        stats['streaming'] = streaming_stats.summary()
+    if args.profile:
+        phases = {name: PhaseStats(name, **values) for name, values in stats['profile'].items()}
+        sys.stderr.write(format_report(phases) + '\n')
+    if args.timeseries:
+        recorder.save(args.timeseries)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(stats, f, indent=2)
+    else:
+        json.dump(stats, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
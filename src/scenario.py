@@ -0,0 +1,216 @@
+"""
+Declarative scenario files: model configs, replications, horizon and outputs in YAML, JSON or TOML.
+
+Config values are in model units (rubles per day, percents, minutes), the same as DEFAULT_MODEL_CONFIG,
+not in UI units such as thousands of rubles. Example (YAML):
+
+    name: ads_vs_checkouts      # defaults to file name
+    priority: 10                # scenarios with higher priority run first
+    seed: 0                     # replication seeds are spawned from it
+    replications: 20
+    days: 14                    # or total_minutes
+    config:                     # on top of DEFAULT_MODEL_CONFIG
+      total_checkouts: 3
+      customer_purchase_price_range: [30, 9000]
+    variants:                   # optional, each variant is config overrides with optional name and priority
+      - {name: base}
+      - {name: discount, discount_percent: 5, priority: 20}
+    grid:                       # optional, every variant is run with every combination
+      ads_spend_per_day: [0, 5000, 10000]
+    outputs:
+      replications: true        # stats of every replication besides the summary
+      waiting_times: false      # merged waiting times sketch
+
+YAML needs PyYAML, TOML uses tomllib (or tomli before Python 3.11).
+"""
+import json
+import re
+import typing as tp
+from dataclasses import dataclass
+from pathlib import Path
+
+from src.run import DEFAULT_MODEL_CONFIG, MODEL_ENGINES
+from src.sweep import config_key, expand_grid
+from src.utils import MINUTES_PER_DAY, TOTAL_MODELLING_MINUTES
+
+SCENARIO_SUFFIXES = ('.json', '.toml', '.yaml', '.yml')
+
+MODEL_CONFIG_KEYS = frozenset(DEFAULT_MODEL_CONFIG) | {'model_engine', 'common_random_numbers', 'antithetic'}
+RANGE_KEYS = ('time_between_customers_range', 'customer_service_time_range', 'customer_purchase_price_range')
+SCENARIO_KEYS = frozenset({
+    'name', 'priority', 'seed', 'replications', 'days', 'total_minutes', 'config', 'variants', 'grid', 'outputs',
+})
+DEFAULT_OUTPUTS: tp.Dict[str, bool] = {'replications': True, 'waiting_times': False}
+
+
+@dataclass
+class ScenarioJob:
+    """One model config of scenario with its replications, result is written to one file"""
+    scenario: str
+    name: str
+    model_config: tp.Dict[str, tp.Any]
+    replications_num: int
+    seed: int
+    total_minutes: int
+    priority: int
+    outputs: tp.Dict[str, bool]
+
+    @property
+    def job_id(self) -> str:
+        return f'{self.scenario}/{self.name}'
+
+    @property
+    def key(self) -> str:
+        """Changes when config, seed, replications, horizon or model code change, so old results are not reused"""
+        return config_key(self.model_config, self.seed, self.replications_num, self.total_minutes)
+
+
+def _load_yaml(path: Path) -> tp.Any:
+    try:
+        import yaml
+    except ImportError as e:
+        raise ImportError('PyYAML is required for YAML scenarios: pip install pyyaml') from e
+    with open(path, encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
+def _load_toml(path: Path) -> tp.Any:
+    try:
+        import tomllib
+    except ImportError:
+        try:
+            import tomli as tomllib
+        except ImportError as e:
+            raise ImportError('tomli is required for TOML scenarios before Python 3.11: pip install tomli') from e
+    with open(path, 'rb') as f:
+        return tomllib.load(f)
+
+
+def _load_json(path: Path) -> tp.Any:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+SCENARIO_LOADERS: tp.Dict[str, tp.Callable[[Path], tp.Any]] = {
+    '.json': _load_json,
+    '.toml': _load_toml,
+    '.yaml': _load_yaml,
+    '.yml': _load_yaml,
+}
+
+
+def safe_name(name: str) -> str:
+    """Name usable as file name"""
+    return re.sub(r'[^\w.=-]+', '_', name).strip('._') or '_'
+
+
+def _model_config(overrides: tp.Dict[str, tp.Any], source: str) -> tp.Dict[str, tp.Any]:
+    unknown_keys = set(overrides) - MODEL_CONFIG_KEYS
+    if unknown_keys:
+        raise ValueError(f'{source}: unknown config keys {sorted(unknown_keys)}, expected {sorted(MODEL_CONFIG_KEYS)}')
+    model_config = {**DEFAULT_MODEL_CONFIG, **overrides}
+    for name in RANGE_KEYS:
+        model_config[name] = tuple(model_config[name])
+    if model_config.get('model_engine', 'ticks') not in MODEL_ENGINES:
+        raise ValueError(f'{source}: unknown model engine {model_config["model_engine"]!r}')
+    return model_config
+
+
+def _int_value(values: tp.Dict[str, tp.Any], name: str, default: int, source: str) -> int:
+    """Integer field, missing one is default, null or other types are rejected (null seed isn't a random seed)"""
+    value = values.get(name, default)
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f'{source}: {name} must be an integer, got {value!r} (omit it to use default {default})')
+    return value
+
+
+def _total_minutes(scenario: tp.Dict[str, tp.Any], source: str) -> int:
+    if 'days' in scenario and 'total_minutes' in scenario:
+        raise ValueError(f'{source}: set either days or total_minutes')
+    if 'days' in scenario:
+        return _int_value(scenario, 'days', TOTAL_MODELLING_MINUTES // MINUTES_PER_DAY, source) * MINUTES_PER_DAY
+    return _int_value(scenario, 'total_minutes', TOTAL_MODELLING_MINUTES, source)
+
+
+def _grid_name(config: tp.Dict[str, tp.Any], grid: tp.Dict[str, tp.Sequence[tp.Any]]) -> str:
+    return ','.join(f'{name}={config[name]}' for name in grid)
+
+
+def parse_scenario(scenario: tp.Dict[str, tp.Any], default_name: str, source: str = '') -> tp.List[ScenarioJob]:
+    """Jobs for every variant and grid point of scenario loaded from file"""
+    source = source or default_name
+    if not isinstance(scenario, dict):
+        raise ValueError(f'{source}: scenario must be a mapping')
+    unknown_keys = set(scenario) - SCENARIO_KEYS
+    if unknown_keys:
+        raise ValueError(f'{source}: unknown scenario keys {sorted(unknown_keys)}, expected {sorted(SCENARIO_KEYS)}')
+    unknown_outputs = set(scenario.get('outputs', {})) - set(DEFAULT_OUTPUTS)
+    if unknown_outputs:
+        raise ValueError(f'{source}: unknown outputs {sorted(unknown_outputs)}, expected {sorted(DEFAULT_OUTPUTS)}')
+
+    scenario_name = safe_name(str(scenario.get('name', default_name)))
+    priority = _int_value(scenario, 'priority', 0, source)
+    seed = _int_value(scenario, 'seed', 0, source)
+    base_config = dict(scenario.get('config', {}))
+    grid = dict(scenario.get('grid', {}))
+    variants = list(scenario.get('variants', [{}]))
+    if not variants:
+        raise ValueError(f'{source}: variants list is empty')
+    replications_num = _int_value(scenario, 'replications', 1, source)
+    if replications_num < 1:
+        raise ValueError(f'{source}: replications must be positive')
+    total_minutes = _total_minutes(scenario, source)
+    outputs = {**DEFAULT_OUTPUTS, **scenario.get('outputs', {})}
+
+    jobs = []
+    for variant_idx, variant in enumerate(variants):
+        variant = dict(variant)
+        variant_priority = _int_value(variant, 'priority', priority, f'{source} (variant {variant_idx})')
+        variant.pop('priority', None)
+        variant_name = str(variant.pop('name', variant_idx if len(variants) > 1 else ''))
+        for grid_config in expand_grid({**base_config, **variant}, grid):
+            name = '_'.join(part for part in [variant_name, _grid_name(grid_config, grid)] if part) or 'default'
+            jobs.append(ScenarioJob(
+                scenario=scenario_name,
+                name=safe_name(name),
+                model_config=_model_config(grid_config, f'{source} ({name})'),
+                replications_num=replications_num,
+                seed=seed,
+                total_minutes=total_minutes,
+                priority=variant_priority,
+                outputs=outputs,
+            ))
+    return jobs
+
+
+def load_scenario_file(path: tp.Union[str, Path]) -> tp.List[ScenarioJob]:
+    path = Path(path)
+    if path.suffix not in SCENARIO_LOADERS:
+        raise ValueError(f'{path}: unknown scenario format, expected one of {list(SCENARIO_LOADERS)}')
+    return parse_scenario(SCENARIO_LOADERS[path.suffix](path), default_name=path.stem, source=str(path))
+
+
+def find_scenario_files(paths: tp.Iterable[tp.Union[str, Path]]) -> tp.List[Path]:
+    """Scenario files among paths, directories are searched recursively"""
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(
+                file_path for file_path in path.rglob('*') if file_path.suffix in SCENARIO_SUFFIXES
+            ))
+        else:
+            files.append(path)
+    return files
+
+
+def load_scenarios(paths: tp.Iterable[tp.Union[str, Path]]) -> tp.List[ScenarioJob]:
+    """Jobs of all scenario files, all files are validated before anything runs"""
+    jobs = []
+    job_sources: tp.Dict[str, Path] = {}
+    for file_path in find_scenario_files(paths):
+        for job in load_scenario_file(file_path):
+            if job.job_id in job_sources:
+                raise ValueError(f'{file_path}: job {job.job_id} is already defined in {job_sources[job.job_id]}')
+            job_sources[job.job_id] = file_path
+            jobs.append(job)
+    return jobs
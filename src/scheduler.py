@@ -0,0 +1,267 @@
+"""
+Batch scheduler for scenario files, see src.scenario for the format.
+
+Usage: python -m src.scheduler scenarios/ --output results/ --workers 8
+       python -m src.scheduler scenarios/ --output results/ --dry-run
+
+Every replication of every job is a separate task on a bounded process pool, tasks of jobs with higher priority
+are submitted first. Each finished replication is saved to <output>/<scenario>/<job>.parts/<idx>.json and
+each finished job to <output>/<scenario>/<job>.json, so after interruption the same command continues
+where it stopped, and jobs with up-to-date results are skipped. Results become stale when config, seed,
+replications, horizon or model code change.
+"""
+import argparse
+import dataclasses
+import heapq
+import json
+import logging
+import os
+import shutil
+import sys
+import traceback
+import typing as tp
+from concurrent.futures import Future, FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from src.replications import spawn_seeds, summarize_replications
+from src.run import run_model
+from src.scenario import load_scenarios, ScenarioJob
+from src.sketch import TDigest
+from src.utils import configure_logging, logger
+
+#  Tasks submitted ahead per worker, so workers don't wait for the scheduler between tasks
+TASKS_PER_WORKER = 2
+
+
+@dataclass
+class SchedulerReport:
+    done: tp.List[str] = field(default_factory=list)
+    pending: tp.List[str] = field(default_factory=list)  # jobs which would run, filled by dry run only
+    skipped: tp.List[str] = field(default_factory=list)
+    failed: tp.Dict[str, str] = field(default_factory=dict)  # job id -> error
+
+
+@dataclass
+class _JobState:
+    job: ScenarioJob
+    result_path: Path
+    parts_dir: Path
+    seeds: tp.List[np.random.SeedSequence]
+    replications: tp.List[tp.Optional[tp.Dict[str, tp.Any]]]
+
+    @property
+    def remaining_num(self) -> int:
+        return sum(replication is None for replication in self.replications)
+
+
+class _InProcessExecutor:
+    """Runs tasks right away in this process, for max_workers=1 and debugging"""
+
+    def submit(self, fn: tp.Callable, *args) -> Future:
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False):
+        pass
+
+
+def _run_replication(
+    model_config: tp.Dict[str, tp.Any],
+    total_minutes: int,
+    with_waiting_times: bool,
+) -> tp.Dict[str, tp.Any]:
+    return run_model(model_config, total_minutes=total_minutes, with_waiting_times=with_waiting_times)
+
+
+def _write_json(path: Path, data: tp.Any):
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _read_json_with_key(path: Path, key: str) -> tp.Optional[tp.Dict[str, tp.Any]]:
+    """Content of result file if it was computed for the same job key"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if data.get('key') == key else None
+
+
+def job_paths(job: ScenarioJob, output_dir: Path) -> tp.Tuple[Path, Path]:
+    """Result file and directory of finished replications of job"""
+    scenario_dir = Path(output_dir) / job.scenario
+    return scenario_dir / f'{job.name}.json', scenario_dir / f'{job.name}.parts'
+
+
+def _job_state(job: ScenarioJob, output_dir: Path) -> _JobState:
+    result_path, parts_dir = job_paths(job, output_dir)
+    key = job.key
+    replications = []
+    for replication_idx in range(job.replications_num):
+        part = _read_json_with_key(parts_dir / f'{replication_idx}.json', key)
+        replications.append(None if part is None else part['stats'])
+    return _JobState(
+        job=job,
+        result_path=result_path,
+        parts_dir=parts_dir,
+        seeds=spawn_seeds(job.seed, job.replications_num),
+        replications=replications,
+    )
+
+
+def job_result(job: ScenarioJob, replications: tp.List[tp.Dict[str, tp.Any]]) -> tp.Dict[str, tp.Any]:
+    """Content of job result file: config, summary and replications or waiting times if scenario outputs ask for them"""
+    waiting_times = None
+    if job.outputs['waiting_times']:
+        waiting_times = TDigest.merged(
+            TDigest.from_dict(replication.pop('waiting_times')) for replication in replications
+        )
+    result = {
+        'key': job.key,
+        'scenario': job.scenario,
+        'name': job.name,
+        'config': {name: value for name, value in job.model_config.items() if name != 'random_state'},
+        'seed': job.seed,
+        'replications_num': job.replications_num,
+        'total_minutes': job.total_minutes,
+        'summary': {
+            name: dataclasses.asdict(summary) for name, summary in summarize_replications(replications).items()
+        },
+    }
+    if job.outputs['replications']:
+        result['replications'] = replications
+    if waiting_times is not None:
+        result['waiting_times'] = waiting_times.to_dict()
+    return result
+
+
+def _finish_job(state: _JobState):
+    _write_json(state.result_path, job_result(state.job, state.replications))
+    shutil.rmtree(state.parts_dir, ignore_errors=True)
+
+
+def run_scheduler(
+    paths: tp.Iterable[tp.Union[str, Path]],
+    output_dir: tp.Union[str, Path],
+    max_workers: tp.Optional[int] = None,
+    dry_run: bool = False,
+) -> SchedulerReport:
+    """
+    Run all jobs of scenario files and directories in paths which have no up-to-date result in output_dir.
+    A failed replication fails its job only, other jobs keep running. With dry_run nothing is run,
+    report tells which jobs are up to date (skipped) and which would run (pending).
+    """
+    output_dir = Path(output_dir)
+    jobs = sorted(load_scenarios(paths), key=lambda job: -job.priority)
+    report = SchedulerReport()
+    states: tp.List[_JobState] = []
+    for job in jobs:
+        result_path, _ = job_paths(job, output_dir)
+        if _read_json_with_key(result_path, job.key) is not None:
+            report.skipped.append(job.job_id)
+        else:
+            states.append(_job_state(job, output_dir))
+    if dry_run:
+        report.pending.extend(state.job.job_id for state in states)
+        return report
+
+    tasks: tp.List[tp.Tuple[int, int, int]] = []  # (-priority, state idx, replication idx)
+    for state_idx, state in enumerate(states):
+        state.result_path.parent.mkdir(parents=True, exist_ok=True)
+        if state.remaining_num == 0:
+            #  Interrupted between the last replication and the result file
+            _finish_job(state)
+            report.done.append(state.job.job_id)
+            continue
+        state.parts_dir.mkdir(exist_ok=True)
+        for replication_idx, replication in enumerate(state.replications):
+            if replication is None:
+                tasks.append((-state.job.priority, state_idx, replication_idx))
+    heapq.heapify(tasks)
+    logger.info(
+        '%s jobs to run (%s replications), %s jobs are up to date', len(states), len(tasks), len(report.skipped)
+    )
+
+    executor = _InProcessExecutor() if max_workers == 1 else ProcessPoolExecutor(max_workers=max_workers)
+    max_in_flight = TASKS_PER_WORKER * (max_workers or os.cpu_count() or 1)
+    in_flight: tp.Dict[Future, tp.Tuple[int, int]] = {}
+    try:
+        while tasks or in_flight:
+            while tasks and len(in_flight) < max_in_flight:
+                _, state_idx, replication_idx = heapq.heappop(tasks)
+                state = states[state_idx]
+                if state.job.job_id in report.failed:
+                    continue
+                future = executor.submit(
+                    _run_replication,
+                    {**state.job.model_config, 'random_state': state.seeds[replication_idx]},
+                    state.job.total_minutes,
+                    state.job.outputs['waiting_times'],
+                )
+                in_flight[future] = (state_idx, replication_idx)
+            finished, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for future in finished:
+                state_idx, replication_idx = in_flight.pop(future)
+                state = states[state_idx]
+                if state.job.job_id in report.failed:
+                    continue
+                error = future.exception()
+                if error is not None:
+                    report.failed[state.job.job_id] = repr(error)
+                    logger.error(
+                        'Job %s failed on replication %s:\n%s',
+                        state.job.job_id, replication_idx, ''.join(traceback.format_exception(error)),
+                    )
+                    continue
+                state.replications[replication_idx] = future.result()
+                _write_json(
+                    state.parts_dir / f'{replication_idx}.json',
+                    {'key': state.job.key, 'stats': state.replications[replication_idx]},
+                )
+                if state.remaining_num == 0:
+                    _finish_job(state)
+                    report.done.append(state.job.job_id)
+                    logger.info('Job %s done (%s/%s)', state.job.job_id, len(report.done), len(states))
+    except BaseException:
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+    return report
+
+
+def parse_args(argv: tp.Optional[tp.List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Run scenario files with replications on process pool')
+    parser.add_argument('paths', nargs='+', help='Scenario files or directories with them')
+    parser.add_argument('--output', required=True, help='Directory for job results, also used to resume')
+    parser.add_argument('--workers', type=int, help='Number of worker processes, all CPUs by default')
+    parser.add_argument('--dry-run', action='store_true', help='Only validate scenarios and list jobs to run')
+    parser.add_argument(
+        '--log-level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], default='INFO',
+        help='Scheduler log level, logs go to --logs-path or stderr',
+    )
+    parser.add_argument('--logs-path', help='Directory for log files, logs go to stderr if not set')
+    return parser.parse_args(argv)
+
+
+def main(argv: tp.Optional[tp.List[str]] = None):
+    args = parse_args(argv)
+    configure_logging(level=getattr(logging, args.log_level), logs_path=args.logs_path)
+    report = run_scheduler(args.paths, args.output, max_workers=args.workers, dry_run=args.dry_run)
+    json.dump(dataclasses.asdict(report), sys.stdout, indent=2)
+    sys.stdout.write('\n')
+    if report.failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
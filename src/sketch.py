@@ -0,0 +1,153 @@
+"""
+Mergeable quantile sketch (merging t-digest) for waiting times and other long streams.
+
+Values are buffered and periodically merged into at most ~compression centroids, which are small near
+the tails (k1 scale function), so p99 stays accurate. Sketches of checkouts, stores or parallel replications
+are merged by merging their centroids, memory doesn't depend on the number of values.
+"""
+import math
+import typing as tp
+
+import numpy as np
+
+
+class TDigest:
+
+    def __init__(self, compression: float = 100.0, buffer_size: tp.Optional[int] = None):
+        self.compression = compression
+        self._buffer_size = int(2 * compression) if buffer_size is None else buffer_size
+        self._buffer: tp.List[float] = []
+        self._means = np.empty(0, dtype=np.float64)
+        self._weights = np.empty(0, dtype=np.float64)
+        self._count = 0
+        self._sum = 0.0
+        self._min = math.inf
+        self._max = -math.inf
+
+    def update(self, value: float):
+        self._buffer.append(value)
+        if len(self._buffer) >= self._buffer_size:
+            self._flush()
+
+    def update_many(self, values: tp.Iterable[float]):
+        self._buffer.extend(values)
+        if len(self._buffer) >= self._buffer_size:
+            self._flush()
+
+    def merge(self, other: 'TDigest') -> 'TDigest':
+        """Add all values of other sketch into this one, return self"""
+        other._flush()
+        self._flush()
+        if other._count == 0:
+            return self
+        self._count += other._count
+        self._sum += other._sum
+        self._min = min(self._min, other._min)
+        self._max = max(self._max, other._max)
+        self._compress(np.concatenate([self._means, other._means]), np.concatenate([self._weights, other._weights]))
+        return self
+
+    @classmethod
+    def merged(cls, digests: tp.Iterable['TDigest'], compression: float = 100.0) -> 'TDigest':
+        merged = cls(compression)
+        for digest in digests:
+            merged.merge(digest)
+        return merged
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        values = np.asarray(self._buffer, dtype=np.float64)
+        self._buffer = []
+        self._count += len(values)
+        self._sum += float(values.sum())
+        self._min = min(self._min, float(values.min()))
+        self._max = max(self._max, float(values.max()))
+        self._compress(np.concatenate([self._means, values]), np.concatenate([self._weights, np.ones(len(values))]))
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray):
+        """Greedily merge sorted centroids while every centroid spans at most 1 in k1 scale"""
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order].tolist(), weights[order].tolist()
+        total_weight = sum(weights)
+        scale = self.compression / (2 * math.pi)
+
+        new_means, new_weights = [], []
+        current_mean, current_weight = means[0], weights[0]
+        weight_before = 0.0
+        weight_limit = total_weight * self._q_limit(0.0, scale)
+        for mean, weight in zip(means[1:], weights[1:]):
+            if weight_before + current_weight + weight <= weight_limit:
+                current_weight += weight
+                current_mean += (mean - current_mean) * weight / current_weight
+            else:
+                new_means.append(current_mean)
+                new_weights.append(current_weight)
+                weight_before += current_weight
+                weight_limit = total_weight * self._q_limit(weight_before / total_weight, scale)
+                current_mean, current_weight = mean, weight
+        new_means.append(current_mean)
+        new_weights.append(current_weight)
+        self._means = np.array(new_means)
+        self._weights = np.array(new_weights)
+
+    @staticmethod
+    def _q_limit(q: float, scale: float) -> float:
+        """Quantile at which a centroid starting at q must end: k1(q_limit) = k1(q) + 1"""
+        k = scale * math.asin(2 * min(q, 1.0) - 1) + 1
+        if k >= scale * math.pi / 2:
+            return 1.0
+        return (math.sin(k / scale) + 1) / 2
+
+    @property
+    def count(self) -> int:
+        return self._count + len(self._buffer)
+
+    @property
+    def mean(self) -> float:
+        self._flush()
+        return self._sum / self._count if self._count else math.nan
+
+    @property
+    def centroids_num(self) -> int:
+        self._flush()
+        return len(self._means)
+
+    def quantile(self, q: float) -> float:
+        """Interpolated between centroid centers, with exact min and max at the ends"""
+        self._flush()
+        if self._count == 0:
+            return math.nan
+        centers = np.cumsum(self._weights) - self._weights / 2
+        return float(np.interp(
+            q * self._count,
+            np.concatenate([[0.0], centers, [self._count]]),
+            np.concatenate([[self._min], self._means, [self._max]]),
+        ))
+
+    def quantiles(self, qs: tp.Sequence[float]) -> tp.List[float]:
+        return [self.quantile(q) for q in qs]
+
+    def to_dict(self) -> tp.Dict[str, tp.Any]:
+        """JSON-serializable state, see from_dict"""
+        self._flush()
+        return {
+            'compression': self.compression,
+            'means': self._means.tolist(),
+            'weights': self._weights.tolist(),
+            'count': self._count,
+            'sum': self._sum,
+            'min': self._min if self._count else None,
+            'max': self._max if self._count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, state: tp.Dict[str, tp.Any]) -> 'TDigest':
+        digest = cls(state['compression'])
+        digest._means = np.asarray(state['means'], dtype=np.float64)
+        digest._weights = np.asarray(state['weights'], dtype=np.float64)
+        digest._count = state['count']
+        digest._sum = state['sum']
+        if state['count']:
+            digest._min, digest._max = state['min'], state['max']
+        return digest
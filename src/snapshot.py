@@ -0,0 +1,102 @@
+"""
+Snapshots of running SupermarketModel.
+
+Snapshot is zlib-compressed pickle of the whole model state: supermarket with checkout queues and accumulators,
+model clock and random generator state. Forks are models restored from one snapshot with their own levers and seeds,
+so many what-if continuations start from the same warmed-up store without modelling the warm-up again.
+"""
+import pickle
+import typing as tp
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from src.modelling import SupermarketModel
+from src.replications import spawn_seeds
+
+SNAPSHOT_MAGIC = b'SMS1'
+
+ModelSource = tp.Union[SupermarketModel, bytes]
+
+
+def snapshot(model: SupermarketModel, compress_level: int = 6) -> bytes:
+    """Model state without observers as bytes"""
+    return SNAPSHOT_MAGIC + zlib.compress(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL), compress_level)
+
+
+def restore(data: bytes) -> SupermarketModel:
+    if not data.startswith(SNAPSHOT_MAGIC):
+        raise ValueError('Not a supermarket model snapshot')
+    return pickle.loads(zlib.decompress(data[len(SNAPSHOT_MAGIC):]))
+
+
+def save_snapshot(model: SupermarketModel, path: tp.Union[str, Path]):
+    Path(path).write_bytes(snapshot(model))
+
+
+def load_snapshot(path: tp.Union[str, Path]) -> SupermarketModel:
+    return restore(Path(path).read_bytes())
+
+
+def fork(
+    source: ModelSource,
+    random_state: tp.Union[int, np.random.SeedSequence, None] = None,
+    **levers,
+) -> SupermarketModel:
+    """
+    Independent copy of model with changed levers (see SupermarketModel.set_levers).
+    Without random_state the copy continues the same random stream as the source.
+    """
+    model = restore(source if isinstance(source, bytes) else snapshot(source))
+    if random_state is not None:
+        model.reseed(random_state)
+    if levers:
+        model.set_levers(**levers)
+    return model
+
+
+def fork_many(
+    source: ModelSource,
+    variants: tp.Sequence[tp.Dict[str, tp.Any]],
+    seed: tp.Union[int, np.random.SeedSequence, None] = None,
+) -> tp.List[SupermarketModel]:
+    """
+    Fork for every dict of levers. Variants without 'random_state' get seeds spawned from seed,
+    so forks with different levers are compared on different streams only if asked to.
+    """
+    data = source if isinstance(source, bytes) else snapshot(source)
+    seeds = spawn_seeds(seed, len(variants))
+    return [
+        fork(data, **{'random_state': variant_seed, **variant})
+        for variant, variant_seed in zip(variants, seeds)
+    ]
+
+
+def _run_fork_job(job: tp.Tuple[bytes, tp.Dict[str, tp.Any], int]) -> tp.Dict[str, tp.Any]:
+    data, variant, total_minutes = job
+    model = fork(data, **variant)
+    for _ in range(total_minutes // model.tick_time()):
+        model.tick()
+    return model.stats()
+
+
+def run_forks(
+    source: ModelSource,
+    variants: tp.Sequence[tp.Dict[str, tp.Any]],
+    total_minutes: int,
+    seed: tp.Union[int, np.random.SeedSequence, None] = None,
+    max_workers: tp.Optional[int] = None,
+) -> tp.List[tp.Dict[str, tp.Any]]:
+    """Continue every fork for total_minutes on process pool, return final stats in the order of variants"""
+    data = source if isinstance(source, bytes) else snapshot(source)
+    seeds = spawn_seeds(seed, len(variants))
+    jobs = [
+        (data, {'random_state': variant_seed, **variant}, total_minutes)
+        for variant, variant_seed in zip(variants, seeds)
+    ]
+    if max_workers == 1:
+        return [_run_fork_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_run_fork_job, jobs))
@@ -0,0 +1,96 @@
+import math
+import typing as tp
+from dataclasses import dataclass
+
+
+def _incomplete_beta_fraction(a: float, b: float, x: float) -> float:
+    """Continued fraction of regularized incomplete beta function (modified Lentz's method)"""
+    tiny = 1e-300
+    c = 1.0
+    d = 1 - (a + b) * x / (a + 1)
+    d = 1 / (d if abs(d) > tiny else tiny)
+    fraction = d
+    for m in range(1, 300):
+        for numerator in (
+            m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+            -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1)),
+        ):
+            d = 1 + numerator * d
+            d = 1 / (d if abs(d) > tiny else tiny)
+            c = 1 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            fraction *= c * d
+        if abs(c * d - 1) < 1e-15:
+            break
+    return fraction
+
+
+def regularized_incomplete_beta(a: float, b: float, x: float) -> float:
+    """I_x(a, b)"""
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+    log_front = math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log1p(-x)
+    if x < (a + 1) / (a + b + 2):
+        return math.exp(log_front) * _incomplete_beta_fraction(a, b, x) / a
+    return 1 - math.exp(log_front) * _incomplete_beta_fraction(b, a, 1 - x) / b
+
+
+def t_cdf(t: float, df: int) -> float:
+    """Cumulative distribution function of Student's t-distribution"""
+    tail = regularized_incomplete_beta(df / 2, 0.5, df / (df + t * t)) / 2
+    return 1 - tail if t > 0 else tail
+
+
+def t_quantile(p: float, df: int) -> float:
+    """
+    Quantile of Student's t-distribution.
+    Closed form for df <= 2, otherwise bisection of t_cdf (exact to about 1e-12).
+    """
+    if df == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if df == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    if p < 0.5:
+        return -t_quantile(1 - p, df)
+    low, high = 0.0, 1.0
+    while t_cdf(high, df) < p:
+        low, high = high, high * 2
+    while high - low > 1e-12 * max(1.0, high):
+        middle = (low + high) / 2
+        if t_cdf(middle, df) < p:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+@dataclass
+class StatSummary:
+    mean: float
+    variance: float
+    ci_low: float
+    ci_high: float
+    samples_num: int
+
+    @property
+    def half_width(self) -> float:
+        return (self.ci_high - self.ci_low) / 2
+
+
+def summarize(samples: tp.Sequence[float], confidence: float = 0.95) -> StatSummary:
+    """Mean, unbiased variance and t confidence interval of the mean"""
+    samples_num = len(samples)
+    mean = sum(samples) / samples_num
+    if samples_num < 2:
+        return StatSummary(mean=mean, variance=0.0, ci_low=mean, ci_high=mean, samples_num=samples_num)
+    variance = sum((sample - mean) ** 2 for sample in samples) / (samples_num - 1)
+    half_width = t_quantile((1 + confidence) / 2, samples_num - 1) * math.sqrt(variance / samples_num)
+    return StatSummary(
+        mean=mean,
+        variance=variance,
+        ci_low=mean - half_width,
+        ci_high=mean + half_width,
+        samples_num=samples_num,
+    )
@@ -0,0 +1,246 @@
+"""
+Streaming statistics with constant memory, so steady-state answers don't need every tick stored.
+
+Welford keeps mean and variance, P2Quantile estimates a quantile with 5 markers (Jain & Chlamtac P² algorithm),
+StreamingStatsObserver is a model observer which summarizes queue length, arrivals per tick and daily profit
+overall, per weekday and per hour of day.
+"""
+import math
+import typing as tp
+
+from src.utils import HOURS_PER_DAY, MINUTES_PER_DAY, MINUTES_PER_HOUR, Weekday
+
+if tp.TYPE_CHECKING:
+    from src.modelling import SupermarketModel
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+
+class Welford:
+    """Count, mean, variance, min and max of a stream, updated in O(1) and mergeable"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: 'Welford'):
+        """Add other stream (Chan et al. pairwise update)"""
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self) -> float:
+        """Sample variance"""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class P2Quantile:
+    """
+    Quantile estimate of a stream with 5 markers whose heights are adjusted by piecewise-parabolic interpolation.
+    The first 5 values are kept exactly, so small samples give exact quantiles.
+    """
+
+    def __init__(self, quantile: float):
+        if not 0 < quantile < 1:
+            raise ValueError(f'Quantile must be in (0, 1), got {quantile}')
+        self.quantile = quantile
+        self.count = 0
+        self._heights: tp.List[float] = []
+        self._positions = [0, 1, 2, 3, 4]
+        self._initial_desired = [0.0, 2 * quantile, 4 * quantile, 2 + 2 * quantile, 4.0]
+        self._increments = [0.0, quantile / 2, quantile, (1 + quantile) / 2, 1.0]
+
+    def update(self, value: float):
+        self.count += 1
+        heights = self._heights
+        if self.count <= 5:
+            heights.append(value)
+            heights.sort()
+            return
+
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        elif value < heights[2]:
+            cell = 0 if value < heights[1] else 1
+        else:
+            cell = 2 if value < heights[3] else 3
+        positions = self._positions
+        for idx in range(cell + 1, 5):
+            positions[idx] += 1
+
+        #  Desired marker positions grow linearly with the number of values
+        updates_num = self.count - 5
+        for idx in range(1, 4):
+            shift = self._initial_desired[idx] + updates_num * self._increments[idx] - positions[idx]
+            if (shift >= 1 and positions[idx + 1] - positions[idx] > 1) or (
+                shift <= -1 and positions[idx - 1] - positions[idx] < -1
+            ):
+                step = 1 if shift > 0 else -1
+                height = self._parabolic(idx, step)
+                if not heights[idx - 1] < height < heights[idx + 1]:
+                    height = heights[idx] + step * (heights[idx + step] - heights[idx]) / (
+                        positions[idx + step] - positions[idx]
+                    )
+                heights[idx] = height
+                positions[idx] += step
+
+    def _parabolic(self, idx: int, step: int) -> float:
+        heights, positions = self._heights, self._positions
+        return heights[idx] + step / (positions[idx + 1] - positions[idx - 1]) * (
+            (positions[idx] - positions[idx - 1] + step) * (heights[idx + 1] - heights[idx])
+            / (positions[idx + 1] - positions[idx])
+            + (positions[idx + 1] - positions[idx] - step) * (heights[idx] - heights[idx - 1])
+            / (positions[idx] - positions[idx - 1])
+        )
+
+    @property
+    def value(self) -> tp.Optional[float]:
+        """None for empty stream"""
+        if self.count == 0:
+            return None
+        if self.count <= 5:
+            #  Linear interpolation between order statistics, as numpy.quantile does
+            rank = self.quantile * (self.count - 1)
+            low = int(rank)
+            high = min(low + 1, self.count - 1)
+            return self._heights[low] + (rank - low) * (self._heights[high] - self._heights[low])
+        return self._heights[2]
+
+
+class StreamingSummary:
+    """Welford moments and P² quantiles of one stream"""
+
+    def __init__(self, quantiles: tp.Sequence[float] = DEFAULT_QUANTILES):
+        self.moments = Welford()
+        self.quantiles = [P2Quantile(quantile) for quantile in quantiles]
+
+    def update(self, value: float):
+        self.moments.update(value)
+        for quantile in self.quantiles:
+            quantile.update(value)
+
+    def to_dict(self) -> tp.Dict[str, tp.Optional[float]]:
+        """Stats of empty stream (e.g. weekday not reached yet) are None, so summary stays valid JSON"""
+        moments = self.moments
+        is_empty = moments.count == 0
+        summary = {
+            'count': moments.count,
+            'mean': None if is_empty else moments.mean,
+            'std': None if is_empty else moments.std,
+            'min': None if is_empty else moments.min,
+            'max': None if is_empty else moments.max,
+        }
+        for quantile in self.quantiles:
+            summary[f'p{quantile.quantile * 100:g}'] = quantile.value
+        return summary
+
+
+class GroupedSummary:
+    """StreamingSummary of the whole stream, per weekday and optionally per hour of day"""
+
+    def __init__(self, quantiles: tp.Sequence[float] = DEFAULT_QUANTILES, by_hour: bool = True):
+        self.total = StreamingSummary(quantiles)
+        self.by_weekday = [StreamingSummary(quantiles) for _ in Weekday]
+        self.by_hour = [StreamingSummary(quantiles) for _ in range(HOURS_PER_DAY)] if by_hour else None
+
+    def update(self, value: float, weekday: int, hour: int = 0):
+        self.total.update(value)
+        self.by_weekday[weekday].update(value)
+        if self.by_hour is not None:
+            self.by_hour[hour].update(value)
+
+    def to_dict(self) -> tp.Dict[str, tp.Any]:
+        summary = {
+            'all': self.total.to_dict(),
+            'by_weekday': {weekday.name: self.by_weekday[weekday].to_dict() for weekday in Weekday},
+        }
+        if self.by_hour is not None:
+            summary['by_hour'] = {hour: stats.to_dict() for hour, stats in enumerate(self.by_hour)}
+        return summary
+
+
+class StreamingStatsObserver:
+    """
+    Model observer with constant memory: average queue length per checkout at the end of every tick
+    and arrivals per tick (grouped by weekday and hour of the tick start) and profit of every finished day
+    (grouped by weekday). A day is finished when its last tick ends on the day boundary
+    or, if ticks cross the boundary, when the first tick of the next day is observed.
+
+    Usage:
+        streaming_stats = StreamingStatsObserver()
+        model.add_observer(streaming_stats)
+        ...
+        streaming_stats.summary()
+    """
+
+    def __init__(self, quantiles: tp.Sequence[float] = DEFAULT_QUANTILES):
+        self.queue_length = GroupedSummary(quantiles)
+        self.arrivals = GroupedSummary(quantiles)
+        self.daily_profit = GroupedSummary(quantiles, by_hour=False)
+        self._last_arrivals = 0
+        self._last_profit = 0.0
+        self._day_profit = 0.0
+        self._day: tp.Optional[int] = None
+        self._day_weekday = 0
+
+    def __call__(self, model: 'SupermarketModel'):
+        self.record(model)
+
+    def record(self, model: 'SupermarketModel'):
+        #  Tick is attributed to its start, as in TimeSeriesRecorder
+        start_minute = model.passed_days() * MINUTES_PER_DAY + model.current_daytime_minutes() - model.tick_time()
+        day, minute_of_day = divmod(start_minute, MINUTES_PER_DAY)
+        weekday = (int(model.current_weekday()) - (model.passed_days() - day)) % len(Weekday)
+        hour = minute_of_day // MINUTES_PER_HOUR
+
+        metrics = model.metrics()
+        arrivals = metrics['total_generated_customers']
+        profit = metrics['total_profit']
+        self.arrivals.update(arrivals - self._last_arrivals, weekday, hour)
+        self.queue_length.update(sum(model.checkouts_current_workload()) / model.total_checkouts(), weekday, hour)
+
+        if day != self._day:
+            if self._day is not None:
+                self.daily_profit.update(self._day_profit, self._day_weekday)
+            self._day, self._day_weekday, self._day_profit = day, weekday, 0.0
+        self._day_profit += profit - self._last_profit
+        self._last_arrivals, self._last_profit = arrivals, profit
+        if (start_minute + model.tick_time()) % MINUTES_PER_DAY == 0:
+            #  The last tick of the day, so the day is counted even if modelling stops here
+            self.daily_profit.update(self._day_profit, self._day_weekday)
+            self._day = None
+
+    def summary(self) -> tp.Dict[str, tp.Any]:
+        return {
+            'queue_length': self.queue_length.to_dict(),
+            'arrivals_per_tick': self.arrivals.to_dict(),
+            'daily_profit': self.daily_profit.to_dict(),
+        }
@@ -2,13 +2,17 @@ import typing as tp
 
 import numpy as np
 
-from src.checkout import Checkout
-from src.customer import Customer
+from src.checkout import Checkout, RingBufferCheckout
+from src.customer import Customer, CustomerBatch
+from src.metrics import MetricsRegistry
+from src.sketch import TDigest
 from src.utils import logger, MINUTES_PER_DAY
+from src.workload_index import WorkloadIndex
 
 
 class Supermarket:
     MAX_CHECKOUTS_CAPACITY_DIFF: int = 3
+    CHECKOUT_CLS: tp.Type[Checkout] = Checkout
 
     def __init__(
         self,
@@ -19,27 +23,70 @@ class Supermarket:
         discount_percent: float,
         profit_per_sale_percent: int,
     ):
-        self._checkouts: tp.List[Checkout] = [
-            Checkout(max_capacity=max_checkout_capacity)
-            for _ in range(checkouts_num)
-        ]
+        self.checkouts_num = checkouts_num
+        self.max_checkout_capacity = max_checkout_capacity
         self.ads_spend_per_day = ads_spend_per_day
         self.discount_percent = discount_percent
         self.cashier_salary_per_day = cashier_salary_per_day
         self.profit_per_sale_percent = profit_per_sale_percent
-        self._total_lost_customers = 0
-        self._total_spent_on_ads = 0
-        self._total_spent_on_salaries = 0
-        self._total_spent_on_discounts = 0
+        self.metrics = MetricsRegistry()
+        self._register_metrics()
+        self._create_checkouts(checkouts_num, max_checkout_capacity)
         self._current_day_time = 0
 
-        logger.debug(f'Created Supermarket with {checkouts_num} checkouts(max_capacity={max_checkout_capacity})')
+        logger.debug('Created Supermarket with %s checkouts(max_capacity=%s)', checkouts_num, max_checkout_capacity)
+
+    def _register_metrics(self):
+        """All supermarket stats, checkouts and model update and read them here"""
+        self._total_served_customers = self.metrics.counter('total_served_customers')
+        self._total_lost_customers = self.metrics.counter('total_lost_customers')
+        self.metrics.derived('total_potential_customers', self._get_total_potential_customers)
+        self._total_earnings = self.metrics.counter('total_earnings')
+        self.metrics.derived('total_profit', self._get_total_profit)
+        self._total_spent_on_ads = self.metrics.counter('total_spent_on_ads')
+        self._total_spent_on_salaries = self.metrics.counter('total_spent_on_salaries')
+        self._total_spent_on_discounts = self.metrics.counter('total_spent_on_discounts')
+        self._register_average_workload()
+        #  Totals of all generated customers (before discount), their expectations are known from config
+        self._total_generated_customers = self.metrics.counter('total_generated_customers')
+        self._total_generated_service_time = self.metrics.counter('total_generated_service_time')
+        self._total_generated_purchase_cost = self.metrics.counter('total_generated_purchase_cost')
+
+    def _register_average_workload(self):
+        """Average queue size over all checkouts and ticks"""
+        self._average_workload = self.metrics.counter('average_workload', 0.0)
+        self._average_workload_ticks = 0
+
+    def _current_total_workload(self) -> int:
+        return self._workload_index.total_workload
+
+    def _update_average_workload(self):
+        current_workload = self._current_total_workload() / self.checkouts_num
+        self._average_workload.value -= \
+            (self._average_workload.value - current_workload) / (self._average_workload_ticks + 1)
+        self._average_workload_ticks += 1
+
+    def _get_total_potential_customers(self) -> int:
+        return self._total_served_customers.value + self._total_lost_customers.value
+
+    def _get_total_profit(self) -> float:
+        return self._total_earnings.value * self.profit_per_sale_percent / 100.0
+
+    def _create_checkouts(self, checkouts_num: int, max_checkout_capacity: int):
+        self._checkouts: tp.List[Checkout] = [
+            self.CHECKOUT_CLS(max_capacity=max_checkout_capacity)
+            for _ in range(checkouts_num)
+        ]
+        self._workload_index = WorkloadIndex(checkouts_num)
+        for idx, checkout in enumerate(self._checkouts):
+            checkout.attach_workload_index(self._workload_index, idx)
+            checkout.attach_metrics(self.metrics)
 
     def _apply_discount_to_customer(self, customer: Customer) -> Customer:
         new_purchase_cost = int(customer.purchase_cost * (100 - self.discount_percent) / 100.0)
         if new_purchase_cost != customer.purchase_cost:
-            logger.debug(f"Applied discount to customer: {customer.purchase_cost} -> {new_purchase_cost}")
-        self._total_spent_on_discounts += customer.purchase_cost - new_purchase_cost
+            logger.debug("Applied discount to customer: %s -> %s", customer.purchase_cost, new_purchase_cost)
+        self._total_spent_on_discounts.value += customer.purchase_cost - new_purchase_cost
 
         return Customer(
             purchase_cost=new_purchase_cost,
@@ -47,37 +94,80 @@ class Supermarket:
             service_time=customer.service_time,
         )
 
+    def _apply_discount_to_batch(self, batch: CustomerBatch) -> np.ndarray:
+        """Return discounted purchase costs of batch"""
+        new_purchase_costs = (batch.purchase_costs * (100 - self.discount_percent) / 100.0).astype(np.int64)
+        self._total_spent_on_discounts.value += int((batch.purchase_costs - new_purchase_costs).sum())
+        return new_purchase_costs
+
+    def _dispatch_customer(self, customer: Customer):
+        _, possible_checkout = self._workload_index.min()
+        is_customer_recieved = self._checkouts[possible_checkout].receive_customer(customer)
+        logger.debug("Sending customer in checkout № %s with status %s", possible_checkout, is_customer_recieved)
+        if not is_customer_recieved:
+            self._total_lost_customers.value += 1
+
+    def _dispatch(self, service_time: int, purchase_cost: int):
+        _, possible_checkout = self._workload_index.min()
+        is_customer_recieved = self._checkouts[possible_checkout].receive(service_time, purchase_cost)
+        logger.debug("Sending customer in checkout № %s with status %s", possible_checkout, is_customer_recieved)
+        if not is_customer_recieved:
+            self._total_lost_customers.value += 1
+
     def recieve_customers(self, customers: tp.List[Customer]):
         """Send customer to some checkout or add to lost clients"""
         for customer in customers:
+            self._total_generated_customers.value += 1
+            self._total_generated_service_time.value += customer.remaining_service_time
+            self._total_generated_purchase_cost.value += customer.purchase_cost
             updated_customer = self._apply_discount_to_customer(customer)
-            logger.debug(f"Recieve customer {customer}, update to {updated_customer}")
-            possible_checkout: int = np.argmin(self.current_checkouts_workload)
-            is_customer_recieved = self._checkouts[possible_checkout].receive_customer(updated_customer)
-            logger.debug(f"Sending customer in checkout № {possible_checkout} with status {is_customer_recieved}")
-            if not is_customer_recieved:
-                self._total_lost_customers += 1
+            logger.debug("Recieve customer %s, update to %s", customer, updated_customer)
+            self._dispatch_customer(updated_customer)
+
+    def recieve_customer_batch(self, batch: CustomerBatch):
+        """Same as recieve_customers, but discount is applied to the whole batch at once"""
+        self._total_generated_customers.value += len(batch)
+        self._total_generated_service_time.value += int(batch.service_times.sum())
+        self._total_generated_purchase_cost.value += int(batch.purchase_costs.sum())
+        self._dispatch_batch(batch.service_times, self._apply_discount_to_batch(batch))
+
+    def _dispatch_batch(self, service_times: np.ndarray, purchase_costs: np.ndarray):
+        """Send customers one by one to the shortest queue"""
+        customers_num = len(service_times)
+        for position, (service_time, purchase_cost) in enumerate(zip(service_times.tolist(), purchase_costs.tolist())):
+            if self.min_checkout_workload == self.max_checkout_capacity:
+                #  All queues are full, so the rest of batch is lost at once
+                self._total_lost_customers.value += customers_num - position
+                logger.debug("All checkouts are full, lost %s customers", customers_num - position)
+                return
+            self._dispatch(service_time, purchase_cost)
+
+    def _tick_checkouts(self, tick_time: int):
+        for checkout in self._checkouts:
+            checkout.tick(tick_time)
 
     def tick(self, tick_time: int):
         logger.debug('Supermarket tick')
-        for idx, checkout in enumerate(self._checkouts):
-            logger.debug(f"Tick in checkout #{idx}")
-            checkout.tick(tick_time)
+        self._update_average_workload()
+        self._tick_checkouts(tick_time)
         self._current_day_time += tick_time
         if self._current_day_time > MINUTES_PER_DAY:
             logger.debug(
-                f'Day passed ->'
-                f' +{self.ads_spend_per_day} on ads,'
-                f' +{self.cashier_salary_per_day * len(self._checkouts)} on salaries'
+                'Day passed -> +%s on ads, +%s on salaries',
+                self.ads_spend_per_day, self.cashier_salary_per_day * self.checkouts_num,
             )
             self._current_day_time %= MINUTES_PER_DAY
-            self._total_spent_on_ads += self.ads_spend_per_day
-            self._total_spent_on_salaries += self.cashier_salary_per_day * len(self._checkouts)
+            self._total_spent_on_ads.value += self.ads_spend_per_day
+            self._total_spent_on_salaries.value += self.cashier_salary_per_day * self.checkouts_num
 
     @property
     def current_checkouts_workload(self) -> tp.List[int]:
         return [checkout.current_workload for checkout in self._checkouts]
 
+    @property
+    def min_checkout_workload(self) -> int:
+        return self._workload_index.min()[0]
+
     @property
     def current_checkouts_customer_progress(self) -> tp.List[int]:
         return [checkout.current_customer_progress for checkout in self._checkouts]
@@ -90,36 +180,44 @@ class Supermarket:
             for checkout in self._checkouts
         ]
 
+    @property
+    def checkouts_waiting_times(self) -> tp.List[TDigest]:
+        """Sketches of customers waiting times in queue of every checkout"""
+        return [checkout.waiting_times for checkout in self._checkouts]
+
+    def waiting_times(self) -> TDigest:
+        """Sketch of customers waiting times over all checkouts (a new merged one)"""
+        return TDigest.merged(self.checkouts_waiting_times)
+
     @property
     def total_served_customers(self):
-        return sum(
-            (checkout.total_served_customers for checkout in self._checkouts),
-            start=0
-        )
+        return self._total_served_customers.value
 
     @property
     def total_earnings(self):
-        return sum(
-            (checkout.total_earnings for checkout in self._checkouts),
-            start=0
-        )
+        return self._total_earnings.value
 
     @property
     def total_profit(self):
-        return self.total_earnings * self.profit_per_sale_percent / 100.0
+        return self._get_total_profit()
 
     @property
     def total_lost_customers(self):
-        return self._total_lost_customers
+        return self._total_lost_customers.value
 
     @property
     def total_spent_on_ads(self):
-        return self._total_spent_on_ads
+        return self._total_spent_on_ads.value
 
     @property
     def total_spent_on_salaries(self):
-        return self._total_spent_on_salaries
+        return self._total_spent_on_salaries.value
 
     @property
     def total_spent_on_discounts(self):
-        return self._total_spent_on_discounts
+        return self._total_spent_on_discounts.value
+
+
+class RingBufferSupermarket(Supermarket):
+    """Supermarket with checkouts queues stored in preallocated ring buffers"""
+    CHECKOUT_CLS = RingBufferCheckout
@@ -0,0 +1,163 @@
+"""
+Parameter sweeps over model configs with on-disk result cache.
+
+Configs have the same shape as `model_config` built in Ui_SupermarketModelUI.setup_model.
+Results are cached in files named by hash of config, seed, replications number, horizon and code version,
+so repeated sweeps only run new points.
+"""
+import functools
+import hashlib
+import itertools
+import json
+import os
+import typing as tp
+from dataclasses import dataclass
+from pathlib import Path
+
+from src.replications import ReplicationResults, run_jobs, spawn_seeds, summarize_replications
+from src.utils import TOTAL_MODELLING_MINUTES
+
+DEFAULT_CACHE_DIR = Path('./.sweep_cache')
+
+#  Sources which define results of a replication: model, its engines and the job runner.
+#  UI and analysis modules aren't here, so editing them doesn't make cached results stale.
+MODEL_SOURCES = (
+    'checkout.py',
+    'customer.py',
+    'customer_generator.py',
+    'event_modelling.py',
+    'metrics.py',
+    'modelling.py',
+    'profiling.py',
+    'replications.py',
+    'run.py',
+    'sketch.py',
+    'supermarket.py',
+    'utils.py',
+    'vectorized_supermarket.py',
+    'workload_index.py',
+)
+
+
+@dataclass
+class SweepResult:
+    model_config: tp.Dict[str, tp.Any]
+    results: ReplicationResults
+    cached: bool
+
+
+def expand_grid(
+    base_config: tp.Dict[str, tp.Any],
+    grid: tp.Dict[str, tp.Sequence[tp.Any]],
+) -> tp.List[tp.Dict[str, tp.Any]]:
+    """All combinations of grid values on top of base config"""
+    names = list(grid)
+    return [
+        {**base_config, **dict(zip(names, values))}
+        for values in itertools.product(*(grid[name] for name in names))
+    ]
+
+
+@functools.lru_cache(maxsize=None)
+def code_version() -> str:
+    """Hash of MODEL_SOURCES, cached results become stale when any of them changes"""
+    digest = hashlib.sha256()
+    for source_name in MODEL_SOURCES:
+        source_path = Path(__file__).parent / source_name
+        digest.update(source_name.encode())
+        digest.update(source_path.read_bytes())
+    return digest.hexdigest()
+
+
+def config_key(
+    model_config: tp.Dict[str, tp.Any],
+    seed: int,
+    replications_num: int,
+    total_minutes: int,
+) -> str:
+    config = {name: value for name, value in model_config.items() if name != 'random_state'}
+    payload = json.dumps(
+        {
+            'config': config,
+            'seed': seed,
+            'replications_num': replications_num,
+            'total_minutes': total_minutes,
+            'code_version': code_version(),
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _load_cached(cache_path: Path) -> tp.Optional[tp.List[tp.Dict[str, tp.Any]]]:
+    if not cache_path.exists():
+        return None
+    with open(cache_path, encoding='utf-8') as f:
+        return json.load(f)['replications']
+
+
+def _save_cached(cache_path: Path, model_config: tp.Dict[str, tp.Any], replications: tp.List[tp.Dict[str, tp.Any]]):
+    tmp_path = cache_path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'config': model_config, 'replications': replications}, f)
+    os.replace(tmp_path, cache_path)
+
+
+def run_sweep(
+    model_configs: tp.Sequence[tp.Dict[str, tp.Any]],
+    seed: int = 0,
+    replications_num: int = 1,
+    total_minutes: int = TOTAL_MODELLING_MINUTES,
+    cache_dir: tp.Optional[Path] = DEFAULT_CACHE_DIR,
+    max_workers: tp.Optional[int] = None,
+    confidence: float = 0.95,
+) -> tp.List[SweepResult]:
+    """
+    Run replications of every config in parallel, taking already computed points from cache.
+    Every config uses the same replication seeds spawned from `seed`. cache_dir=None disables cache.
+    """
+    if cache_dir is not None:
+        cache_dir = Path(cache_dir)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+
+    cached_replications: tp.List[tp.Optional[tp.List[tp.Dict[str, tp.Any]]]] = []
+    cache_paths: tp.List[tp.Optional[Path]] = []
+    for model_config in model_configs:
+        if cache_dir is None:
+            cache_paths.append(None)
+            cached_replications.append(None)
+        else:
+            cache_path = cache_dir / f'{config_key(model_config, seed, replications_num, total_minutes)}.json'
+            cache_paths.append(cache_path)
+            cached_replications.append(_load_cached(cache_path))
+
+    seeds = spawn_seeds(seed, replications_num)
+    missing_idx = [idx for idx, replications in enumerate(cached_replications) if replications is None]
+    jobs = [
+        {**model_configs[idx], 'random_state': replication_seed}
+        for idx in missing_idx
+        for replication_seed in seeds
+    ]
+    jobs_stats = run_jobs(jobs, total_minutes=total_minutes, max_workers=max_workers) if jobs else []
+
+    results = []
+    computed = {
+        idx: jobs_stats[job_idx * replications_num:(job_idx + 1) * replications_num]
+        for job_idx, idx in enumerate(missing_idx)
+    }
+    for idx, model_config in enumerate(model_configs):
+        is_cached = idx not in computed
+        replications = cached_replications[idx] if is_cached else computed[idx]
+        if not is_cached and cache_paths[idx] is not None:
+            _save_cached(cache_paths[idx], model_config, replications)
+        results.append(
+            SweepResult(
+                model_config=model_config,
+                results=ReplicationResults(
+                    replications=replications,
+                    summary=summarize_replications(replications, confidence=confidence),
+                ),
+                cached=is_cached,
+            )
+        )
+    return results
@@ -0,0 +1,119 @@
+import typing as tp
+
+import numpy as np
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from src.lttb import StreamingLTTB
+from src.recorder import TimeSeriesRecorder
+from src.utils import MINUTES_PER_DAY
+
+Series = tp.Dict[str, tp.Tuple[np.ndarray, np.ndarray]]
+
+SERIES_COLORS = [
+    QtGui.QColor(40, 40, 40),
+    QtGui.QColor(255, 140, 0),
+    QtGui.QColor(30, 120, 220),
+    QtGui.QColor(40, 170, 70),
+    QtGui.QColor(200, 40, 40),
+    QtGui.QColor(140, 70, 200),
+]
+
+
+class ChartsCollector:
+    """
+    Charts data of recorder over modelling days: queue length (average and of recorded checkouts),
+    cumulative profit and lost customers. Every series is downsampled with StreamingLTTB to points_num points,
+    which reads only new ticks, so refresh cost doesn't grow with the number of ticks.
+    Returned arrays are copies, not views of the recorder.
+    """
+
+    def __init__(self, recorder: TimeSeriesRecorder, total_checkouts: int, tick_time: int, points_num: int):
+        self._recorder = recorder
+        self._total_checkouts = total_checkouts
+        self._tick_time = tick_time
+        self._points_num = points_num
+        self._downsamplers: tp.Dict[str, StreamingLTTB] = {}
+
+    def _series(
+        self, name: str, ticks: np.ndarray, values: np.ndarray, scale: float = 1.0,
+    ) -> tp.Tuple[np.ndarray, np.ndarray]:
+        """Days and scaled values are linear in ticks and values, so they are downsampled as recorded"""
+        if name not in self._downsamplers:
+            self._downsamplers[name] = StreamingLTTB(self._points_num)
+        ticks, values = self._downsamplers[name].downsample(ticks, values)
+        return ticks * self._tick_time / MINUTES_PER_DAY, values * scale
+
+    def collect(self) -> tp.Dict[str, Series]:
+        if len(self._recorder) == 0:
+            return {}
+        columns = self._recorder.columns()
+        ticks = columns['tick']
+        queue_series = {
+            'Средняя': self._series('Средняя', ticks, columns['total_workload'], 1 / self._total_checkouts),
+        }
+        for checkout_idx in range(self._recorder.checkouts_num):
+            name = f'Касса {checkout_idx + 1}'
+            queue_series[name] = self._series(name, ticks, columns['workload'][:, checkout_idx])
+        return {
+            'queue': queue_series,
+            'profit': {'Прибыль': self._series('Прибыль', ticks, columns['total_profit'])},
+            'lost': {'Упущено': self._series('Упущено', ticks, columns['total_lost'])},
+        }
+
+
+class TimeSeriesChart(QtWidgets.QWidget):
+    """Line chart drawn with QPainter, series are (x, y) arrays which are already downsampled"""
+    MARGIN = 4
+
+    def __init__(self, title: str, parent: tp.Optional[QtWidgets.QWidget] = None):
+        super().__init__(parent)
+        self._title = title
+        self._series: Series = {}
+
+    def set_series(self, series: Series):
+        self._series = series
+        self.update()
+
+    def clear(self):
+        self.set_series({})
+
+    def paintEvent(self, event: QtGui.QPaintEvent):
+        painter = QtGui.QPainter(self)
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        painter.fillRect(self.rect(), QtCore.Qt.white)
+        painter.setPen(QtCore.Qt.gray)
+        painter.drawRect(self.rect().adjusted(0, 0, -1, -1))
+
+        font_height = painter.fontMetrics().height()
+        plot = QtCore.QRectF(self.rect()).adjusted(
+            self.MARGIN, self.MARGIN + font_height, -self.MARGIN, -self.MARGIN - font_height
+        )
+        painter.setPen(QtCore.Qt.black)
+        painter.drawText(self.MARGIN, font_height, self._title)
+
+        series = [(name, x, y) for name, (x, y) in self._series.items() if len(x) > 0]
+        if not series:
+            return
+        x_max = max(float(x[-1]) for _, x, _ in series)
+        x_min = min(float(x[0]) for _, x, _ in series)
+        y_max = max(float(y.max()) for _, _, y in series)
+        y_min = min(0.0, min(float(y.min()) for _, _, y in series))
+        x_span = (x_max - x_min) or 1.0
+        y_span = (y_max - y_min) or 1.0
+
+        for series_idx, (name, x, y) in enumerate(series):
+            screen_x = plot.left() + (x - x_min) / x_span * plot.width()
+            screen_y = plot.bottom() - (y - y_min) / y_span * plot.height()
+            polyline = QtGui.QPolygonF([QtCore.QPointF(px, py) for px, py in zip(screen_x, screen_y)])
+            painter.setPen(QtGui.QPen(SERIES_COLORS[series_idx % len(SERIES_COLORS)], 1))
+            painter.drawPolyline(polyline)
+
+        painter.setPen(QtCore.Qt.darkGray)
+        painter.drawText(
+            QtCore.QRectF(plot.left(), 0, plot.width(), font_height + self.MARGIN),
+            QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter, f'{y_max:.6g}',
+        )
+        painter.drawText(
+            QtCore.QRectF(plot.left(), plot.bottom(), plot.width(), font_height + self.MARGIN),
+            QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter, f'{x_max:.1f} дн.',
+        )
@@ -18,6 +18,26 @@ class UIConfig:
     CHECKOUTS_X: int = 550
     CHECKOUTS_Y: int = 100
     CHECKOUTS_DISTANCE: int = 70
+    CHECKOUTS_AREA_X: int = 430
+    CHECKOUTS_AREA_WIDTH: int = 470
+    CHECKOUTS_AREA_HEIGHT: int = 700
+    MAX_CHECKOUTS: int = 5000
+    MAX_FPS: int = 20
+    MAX_MODELLING_DAYS: int = 3650
+
+    CHARTS_TITLES = {
+        'queue': 'Длина очереди',
+        'profit': 'Прибыль (руб.)',
+        'lost': 'Упущено клиентов',
+    }
+    CHARTS_X: int = 920
+    CHARTS_Y: int = 400
+    CHARTS_DISTANCE: int = 105
+    CHART_WIDTH: int = 270
+    CHART_HEIGHT: int = 100
+    CHART_POINTS: int = 270
+    CHART_CHECKOUTS: int = 4
+    CHART_INTERVAL: float = 0.25
 
     @staticmethod
     def title_font():
@@ -0,0 +1,88 @@
+import typing as tp
+
+from PyQt5 import QtCore, QtWidgets
+
+from src.ui_charts import TimeSeriesChart
+from src.ui_worker import ModelView
+
+
+class ThrottledRenderer(QtCore.QObject):
+    """
+    Shows the latest submitted ModelView not more often than max_fps times per second.
+    Views submitted between frames replace each other, and only widgets whose shown value changed are updated,
+    so the model may run thousands of ticks per frame.
+    """
+
+    def __init__(
+        self,
+        results: tp.Dict[str, QtWidgets.QPlainTextEdit],
+        checkouts_current_load: tp.Dict[int, QtWidgets.QLCDNumber],
+        checkouts_customer_progress: tp.Dict[int, QtWidgets.QProgressBar],
+        max_fps: int,
+        charts: tp.Optional[tp.Dict[str, TimeSeriesChart]] = None,
+        parent: tp.Optional[QtCore.QObject] = None,
+    ):
+        super().__init__(parent)
+        self._results = results
+        self._charts = charts or {}
+        self._checkouts_current_load = checkouts_current_load
+        self._checkouts_customer_progress = checkouts_customer_progress
+        self._pending_view: tp.Optional[ModelView] = None
+        self._shown_results: tp.Dict[str, str] = {}
+        self._shown_load: tp.Dict[int, int] = {}
+        self._shown_progress: tp.Dict[int, int] = {}
+
+        self._timer = QtCore.QTimer(self)
+        self._timer.setInterval(max(1, 1000 // max_fps))
+        self._timer.timeout.connect(self.flush)
+        self._timer.start()
+
+    def submit(self, view: ModelView):
+        """Remember view to show on the next frame"""
+        self._pending_view = view
+
+    def flush(self):
+        """Show pending view right now"""
+        if self._pending_view is not None:
+            view, self._pending_view = self._pending_view, None
+            self._render(view)
+
+    def reset(self):
+        """Forget pending view and shown values, e.g. after widgets were cleared outside of renderer"""
+        self._pending_view = None
+        self._shown_results.clear()
+        self._shown_load.clear()
+        self._shown_progress.clear()
+        for chart in self._charts.values():
+            chart.clear()
+
+    def _render(self, view: ModelView):
+        results = {
+            'total_served': str(view.total_served),
+            'total_lost': str(view.total_lost),
+            'total_profit': str(view.total_profit),
+            'average_load': str(round(view.average_load, 2)),
+            'total_spent_ads': str(view.total_spent_ads),
+            'total_spent_salaries': str(view.total_spent_salaries),
+            'total_spent_discount': str(view.total_spent_discount),
+        }
+        for name, text in results.items():
+            if self._shown_results.get(name) != text:
+                self._results[name].setPlainText(text)
+                self._shown_results[name] = text
+
+        shown_load = self._shown_load
+        for idx, load in enumerate(view.checkouts_workload):
+            if shown_load.get(idx) != load:
+                self._checkouts_current_load[idx].display(str(load))
+                shown_load[idx] = load
+
+        shown_progress = self._shown_progress
+        for idx, progress in enumerate(view.checkouts_customer_progress):
+            if shown_progress.get(idx) != progress:
+                self._checkouts_customer_progress[idx].setValue(progress)
+                shown_progress[idx] = progress
+
+        if view.charts is not None:
+            for name, series in view.charts.items():
+                self._charts[name].set_series(series)
@@ -13,8 +13,12 @@ from functools import partial
 from PyQt5 import QtCore, QtGui, QtWidgets
 
 from src.modelling import SupermarketModel
+from src.recorder import TimeSeriesRecorder
+from src.ui_charts import ChartsCollector, TimeSeriesChart
 from src.ui_config import UIConfig, gen_results_palette, gen_queue_palette
-from src.utils import logger, TOTAL_MODELLING_MINUTES
+from src.ui_renderer import ThrottledRenderer
+from src.ui_worker import ModelRun, ModelView, collect_view
+from src.utils import DEFAULT_MODELLING_DAYS, logger, MINUTES_PER_DAY
 
 
 class Ui_SupermarketModelUI(object):
@@ -33,7 +37,8 @@ class Ui_SupermarketModelUI(object):
         cashier_salary_per_day = int(float(self.salary_per_day.text().replace(',', '.')) * 1000)
         tick_time = int(self.tick_minutes.text())
 
-        self.total_ticks = TOTAL_MODELLING_MINUTES // tick_time
+        self.total_minutes = self.modelling_days.value() * MINUTES_PER_DAY
+        self.total_ticks = self.total_minutes // tick_time
         self.model_config = {
             'total_checkouts': checkouts_num,
             'max_checkout_capacity': int(self.queue_max_length.text()),
@@ -48,42 +53,86 @@ class Ui_SupermarketModelUI(object):
             'random_state': 42,
         }
 
+        self.create_model()
+
+    def create_model(self):
+        """Model with recorder of time series and collector of charts data from it"""
         self.model: SupermarketModel = SupermarketModel(
             **self.model_config,
         )
+        self.recorder = TimeSeriesRecorder(
+            self.model_config['total_checkouts'], workload_checkouts=UIConfig.CHART_CHECKOUTS
+        )
+        self.model.add_observer(self.recorder)
+        self.charts_collector = ChartsCollector(
+            self.recorder, self.model_config['total_checkouts'], self.model_config['tick_time'], UIConfig.CHART_POINTS
+        )
 
     def model_tick(self):
         self.model.tick()
-        average_load = self.model.average_checkouts_workload()
-        average_load = sum(average_load) / len(average_load)
-
-        self.results['total_served'].setPlainText(str(self.model.total_served_customers()))
-        self.results['total_lost'].setPlainText(str(self.model.total_lost_customers()))
-        self.results['total_profit'].setPlainText(str(self.model.total_profit()))
-
-        self.results['average_load'].setPlainText(str(round(average_load, 2)))
-        self.results['total_spent_ads'].setPlainText(str(self.model.total_spent_on_ads()))
-        self.results['total_spent_salaries'].setPlainText(str(self.model.total_spent_on_salaries()))
-        self.results['total_spent_discount'].setPlainText(str(self.model.total_spent_on_discounts()))
-
-        current_load = self.model.checkouts_current_workload()
-        for idx, load in enumerate(current_load):
-            self.checkouts_current_load[idx].display(str(load))
-
-        cur_customer_progress = self.model.current_checkouts_customer_progress()
-        for idx, progress in enumerate(cur_customer_progress):
-            self.checkouts_customer_progress[idx].setValue(progress)
-
-        logger.debug(f"TOTAL PROFIT = {self.model.total_profit()}")
+        self.total_ticks -= 1
+        self.show_view(collect_view(self.model, self.charts_collector))
+        self.renderer.flush()
+        if self.total_ticks <= 0:
+            self.tick.setEnabled(False)
+            self.to_end.setEnabled(False)
+
+    def show_view(self, view: ModelView):
+        """Widgets are updated by renderer on its next frame"""
+        self.renderer.submit(view)
+        logger.debug("TOTAL PROFIT = %s", view.total_profit)
 
     def to_the_end(self):
-        while self.total_ticks > 0:
-            self.model_tick()
-            self.total_ticks -= 1
+        """Run the rest of modelling in background thread, Step, To the end and Restart are locked until it ends"""
+        if self.model_run is not None or self.total_ticks <= 0:
+            return
+        self.set_run_controls_locked(True)
+        self.run_progress.setRange(0, self.total_ticks)
+        self.run_progress.setValue(0)
+
+        self.model_run = ModelRun(
+            self.model,
+            self.total_ticks,
+            view_interval=1 / UIConfig.MAX_FPS,
+            charts=self.charts_collector,
+            chart_interval=UIConfig.CHART_INTERVAL,
+        )
+        self.model_run.progress.connect(self.on_run_progress)
+        self.model_run.view_ready.connect(self.show_view)
+        self.model_run.finished.connect(self.on_run_finished)
+        self.model_run.start()
+
+    def set_run_controls_locked(self, is_locked: bool):
+        self.tick.setDisabled(is_locked)
+        self.to_end.setDisabled(is_locked)
+        self.restart.setDisabled(is_locked)
+        self.cancel_run.setEnabled(is_locked)
+
+    def on_run_progress(self, done_ticks: int, total_ticks: int):
+        self.run_progress.setValue(done_ticks)
+
+    def on_run_finished(self, done_ticks: int, is_cancelled: bool):
+        logger.debug('Background run finished after %s ticks, cancelled: %s', done_ticks, is_cancelled)
+        self.model_run = None
+        self.total_ticks -= done_ticks
+        self.set_run_controls_locked(False)
+        self.renderer.flush()
+        if self.total_ticks <= 0:
+            self.tick.setEnabled(False)
+            self.to_end.setEnabled(False)
+
+    def stop_run(self):
+        """Cancel background run (if any) and wait until the model stops, its queued progress and views are dropped"""
+        if self.model_run is not None:
+            self.model_run.discard()
+            self.model_run = None
+            self.set_run_controls_locked(False)
 
     def restart_modelling(self):
-        self.model = SupermarketModel(**self.model_config)
-        self.total_ticks = TOTAL_MODELLING_MINUTES // self.model_config['tick_time']
+        self.stop_run()
+        self.run_progress.setValue(0)
+        self.create_model()
+        self.total_ticks = self.total_minutes // self.model_config['tick_time']
 
         for _, res_widget in self.results.items():
             res_widget.setPlainText('0')
@@ -93,6 +142,7 @@ class Ui_SupermarketModelUI(object):
         ):
             checkout_load.display(str(0))
             checkout_cust_progress.setValue(0)
+        self.renderer.reset()
 
     def setup_results(self, window):
         _translate = QtCore.QCoreApplication.translate
@@ -126,60 +176,84 @@ class Ui_SupermarketModelUI(object):
             self.results_labels[result_name].setObjectName("{result_name}_label")
             self.mainLayout.addWidget(self.results_labels[result_name])
 
+    def setup_charts(self, window):
+        self.charts: tp.Dict[str, TimeSeriesChart] = dict()
+        for idx, (chart_name, chart_title) in enumerate(UIConfig.CHARTS_TITLES.items()):
+            self.charts[chart_name] = TimeSeriesChart(chart_title, window)
+            self.charts[chart_name].setGeometry(
+                QtCore.QRect(
+                    UIConfig.CHARTS_X, UIConfig.CHARTS_Y + idx * UIConfig.CHARTS_DISTANCE,
+                    UIConfig.CHART_WIDTH, UIConfig.CHART_HEIGHT,
+                )
+            )
+            self.charts[chart_name].setObjectName(f"{chart_name}_chart")
+
     def setup_checkouts(self, window):
 
         self.checkouts_current_load = dict()
         self.checkouts_customer_progress = dict()
         self.checkouts_labels: tp.Dict[int, QtWidgets.QLabel] = dict()
+        self.shown_checkouts = 0
 
-        for q_idx in range(7):
-            self.checkouts_current_load[q_idx] = QtWidgets.QLCDNumber(window)
-            self.checkouts_current_load[q_idx].setGeometry(
-                QtCore.QRect(UIConfig.CHECKOUTS_X, UIConfig.CHECKOUTS_Y + UIConfig.CHECKOUTS_DISTANCE * q_idx, 65,
-                             25)
-            )
-            self.checkouts_current_load[q_idx].setPalette(gen_queue_palette())
-            self.checkouts_current_load[q_idx].setAutoFillBackground(True)
-            self.checkouts_current_load[q_idx].setObjectName(f"queue_{q_idx}")
-            if q_idx > 0:
-                self.checkouts_current_load[q_idx].hide()
-            self.mainLayout.addWidget(self.checkouts_current_load[q_idx])
-
-            self.checkouts_customer_progress[q_idx] = QtWidgets.QProgressBar(window)
-            self.checkouts_customer_progress[q_idx].setGeometry(
-                QtCore.QRect(
-                    UIConfig.CHECKOUTS_X + 90, UIConfig.CHECKOUTS_Y + UIConfig.CHECKOUTS_DISTANCE * q_idx, 120, 25
-                )
-            )
-            self.checkouts_customer_progress[q_idx].setProperty("value", 0)
-            self.checkouts_customer_progress[q_idx].setObjectName(f"checkout{q_idx}_load")
-            if q_idx > 0:
-                self.checkouts_customer_progress[q_idx].hide()
-            self.mainLayout.addWidget(self.checkouts_customer_progress[q_idx])
-
-            self.checkouts_labels[q_idx] = QtWidgets.QLabel(window)
-            self.checkouts_labels[q_idx].setGeometry(
-                QtCore.QRect(
-                    UIConfig.CHECKOUTS_X + 110, UIConfig.CHECKOUTS_Y + UIConfig.CHECKOUTS_DISTANCE * q_idx - 30,
-                    120, 25
-                )
-            )
-            self.checkouts_labels[q_idx].setObjectName(f"checkout_{q_idx}")
-            if q_idx > 0:
-                self.checkouts_labels[q_idx].hide()
-            self.mainLayout.addWidget(self.checkouts_labels[q_idx])
+        #  Checkouts widgets are created on demand inside scroll area, so the store may have thousands of them
+        self.checkouts_area = QtWidgets.QScrollArea(window)
+        self.checkouts_area.setGeometry(
+            QtCore.QRect(UIConfig.CHECKOUTS_AREA_X, 0, UIConfig.CHECKOUTS_AREA_WIDTH, UIConfig.CHECKOUTS_AREA_HEIGHT)
+        )
+        self.checkouts_area.setFrameShape(QtWidgets.QFrame.NoFrame)
+        self.checkouts_area.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
+        self.checkouts_area.setObjectName("checkouts_area")
+        self.checkouts_container = QtWidgets.QWidget()
+        self.checkouts_container.setObjectName("checkouts_container")
+        self.checkouts_area.setWidget(self.checkouts_container)
+        self.mainLayout.addWidget(self.checkouts_area)
 
-    def show_checkouts(self, cnt):
-        for q_idx in self.checkouts_current_load:
-            self.checkouts_current_load[q_idx].hide()
-            self.checkouts_customer_progress[q_idx].hide()
-            self.checkouts_labels[q_idx].hide()
+        self.show_checkouts(1)
+
+    def create_checkout_widgets(self, q_idx):
+        _translate = QtCore.QCoreApplication.translate
+        checkouts_x = UIConfig.CHECKOUTS_X - UIConfig.CHECKOUTS_AREA_X
 
-        for i in range(cnt):
-            self.checkouts_current_load[i].show()
-            self.checkouts_customer_progress[i].show()
-            self.checkouts_labels[i].show()
+        self.checkouts_current_load[q_idx] = QtWidgets.QLCDNumber(self.checkouts_container)
+        self.checkouts_current_load[q_idx].setGeometry(
+            QtCore.QRect(checkouts_x, UIConfig.CHECKOUTS_Y + UIConfig.CHECKOUTS_DISTANCE * q_idx, 65, 25)
+        )
+        self.checkouts_current_load[q_idx].setPalette(gen_queue_palette())
+        self.checkouts_current_load[q_idx].setAutoFillBackground(True)
+        self.checkouts_current_load[q_idx].setObjectName(f"queue_{q_idx}")
+
+        self.checkouts_customer_progress[q_idx] = QtWidgets.QProgressBar(self.checkouts_container)
+        self.checkouts_customer_progress[q_idx].setGeometry(
+            QtCore.QRect(checkouts_x + 90, UIConfig.CHECKOUTS_Y + UIConfig.CHECKOUTS_DISTANCE * q_idx, 120, 25)
+        )
+        self.checkouts_customer_progress[q_idx].setProperty("value", 0)
+        self.checkouts_customer_progress[q_idx].setObjectName(f"checkout{q_idx}_load")
+
+        self.checkouts_labels[q_idx] = QtWidgets.QLabel(self.checkouts_container)
+        self.checkouts_labels[q_idx].setGeometry(
+            QtCore.QRect(
+                checkouts_x + 110, UIConfig.CHECKOUTS_Y + UIConfig.CHECKOUTS_DISTANCE * q_idx - 30,
+                120, 25
+            )
+        )
+        self.checkouts_labels[q_idx].setObjectName(f"checkout_{q_idx}")
+        self.checkouts_labels[q_idx].setText(_translate("SupermarketModelUI", f"Касса {q_idx + 1}"))
 
+    def show_checkouts(self, cnt):
+        for q_idx in range(len(self.checkouts_current_load), cnt):
+            self.create_checkout_widgets(q_idx)
+
+        #  Only checkouts between old and new count change visibility
+        for q_idx in range(min(cnt, self.shown_checkouts), max(cnt, self.shown_checkouts)):
+            is_visible = q_idx < cnt
+            self.checkouts_current_load[q_idx].setVisible(is_visible)
+            self.checkouts_customer_progress[q_idx].setVisible(is_visible)
+            self.checkouts_labels[q_idx].setVisible(is_visible)
+        self.shown_checkouts = cnt
+
+        self.checkouts_container.setFixedSize(
+            UIConfig.CHECKOUTS_AREA_WIDTH - 20, UIConfig.CHECKOUTS_Y + UIConfig.CHECKOUTS_DISTANCE * cnt
+        )
         self.mainLayout.update()
 
     def setupUi(self, window):
@@ -187,6 +261,7 @@ class Ui_SupermarketModelUI(object):
 
         self.setup_results(window)
         self.setup_checkouts(window)
+        self.setup_charts(window)
 
         window.setObjectName("SupermarketModelUI")
         window.resize(1200, 800)
@@ -203,12 +278,12 @@ class Ui_SupermarketModelUI(object):
         self.left_line.setFrameShadow(QtWidgets.QFrame.Sunken)
         self.left_line.setObjectName("left_line")
         self.total_checkouts = QtWidgets.QSpinBox(window)
-        self.total_checkouts.setGeometry(QtCore.QRect(350, 80, 50, 30))
+        self.total_checkouts.setGeometry(QtCore.QRect(330, 80, 70, 30))
         font = QtGui.QFont()
         font.setPointSize(11)
         self.total_checkouts.setFont(font)
         self.total_checkouts.setMinimum(1)
-        self.total_checkouts.setMaximum(7)
+        self.total_checkouts.setMaximum(UIConfig.MAX_CHECKOUTS)
         self.total_checkouts.setObjectName("total_checkouts")
 
         self.total_checkouts_label = QtWidgets.QLabel(window)
@@ -442,6 +517,17 @@ class Ui_SupermarketModelUI(object):
         self.exit.setGeometry(QtCore.QRect(1080, 720, 100, 50))
         self.exit.setObjectName("exit")
 
+        self.cancel_run = QtWidgets.QPushButton(window)
+        self.cancel_run.setGeometry(QtCore.QRect(795, 720, 100, 50))
+        self.cancel_run.setObjectName("cancel_run")
+        self.cancel_run.setDisabled(True)
+
+        self.run_progress = QtWidgets.QProgressBar(window)
+        self.run_progress.setGeometry(QtCore.QRect(200, 730, 280, 30))
+        self.run_progress.setValue(0)
+        self.run_progress.setObjectName("run_progress")
+        self.model_run: tp.Optional[ModelRun] = None
+
         self.label_18 = QtWidgets.QLabel(window)
         self.label_18.setGeometry(QtCore.QRect(10, 670, 300, 20))
         font = QtGui.QFont()
@@ -460,11 +546,31 @@ class Ui_SupermarketModelUI(object):
         self.tick_minutes.setSingleStep(7)
         self.tick_minutes.setObjectName("tick_minutes")
 
+        self.modelling_days_label = QtWidgets.QLabel(window)
+        self.modelling_days_label.setGeometry(QtCore.QRect(10, 180, 300, 30))
+        self.modelling_days_label.setFont(UIConfig.settings_font())
+        self.modelling_days_label.setObjectName("modelling_days_label")
+        self.modelling_days = QtWidgets.QSpinBox(window)
+        self.modelling_days.setGeometry(QtCore.QRect(330, 180, 70, 30))
+        font = QtGui.QFont()
+        font.setPointSize(11)
+        self.modelling_days.setFont(font)
+        self.modelling_days.setMinimum(1)
+        self.modelling_days.setMaximum(UIConfig.MAX_MODELLING_DAYS)
+        self.modelling_days.setValue(DEFAULT_MODELLING_DAYS)
+        self.modelling_days.setObjectName("modelling_days")
+
+        self.renderer = ThrottledRenderer(
+            self.results, self.checkouts_current_load, self.checkouts_customer_progress,
+            max_fps=UIConfig.MAX_FPS, charts=self.charts, parent=window,
+        )
+
         self.retranslateUi(window)
         self.total_checkouts.valueChanged['int'].connect(self.show_checkouts)
 
         self.config_buttons = [
             self.tick_minutes,
+            self.modelling_days,
             self.salary_per_day,
             self.profit_percent,
             self.adv_per_day,
@@ -488,7 +594,7 @@ class Ui_SupermarketModelUI(object):
 
         self.tick.clicked['bool'].connect(self.model_tick)
         self.to_end.clicked['bool'].connect(self.to_the_end)
-        self.to_end.clicked['bool'].connect(self.tick.setEnabled)  # type: ignore
+        self.cancel_run.clicked.connect(lambda: self.model_run is not None and self.model_run.cancel())
 
         self.restart.clicked.connect(self.restart_modelling)
         for button in self.config_buttons:
@@ -498,6 +604,8 @@ class Ui_SupermarketModelUI(object):
         self.restart.clicked['bool'].connect(self.restart.setEnabled)
 
         self.exit.clicked.connect(window.close)  # type: ignore
+        #  Every way to close the window quits the app, background run must stop before its thread is destroyed
+        QtWidgets.QApplication.instance().aboutToQuit.connect(self.stop_run)
         QtCore.QMetaObject.connectSlotsByName(window)
 
     def retranslateUi(self, SupermarketModelUI):
@@ -532,5 +640,7 @@ class Ui_SupermarketModelUI(object):
         self.to_end.setText(_translate("SupermarketModelUI", "До конца"))
         self.exit.setText(_translate("SupermarketModelUI", "Выход"))
         self.restart.setText(_translate("SupermarketModelUI", "Заново"))
+        self.cancel_run.setText(_translate("SupermarketModelUI", "Отмена"))
 
         self.label_18.setText(_translate("SupermarketModelUI", "Минут в шаге"))
+        self.modelling_days_label.setText(_translate("SupermarketModelUI", "Дней моделирования"))
@@ -0,0 +1,160 @@
+import threading
+import time
+import typing as tp
+from dataclasses import dataclass
+
+from PyQt5 import QtCore
+
+from src.modelling import SupermarketModel
+from src.ui_charts import ChartsCollector, Series
+
+
+@dataclass
+class ModelView:
+    """Plain copy of everything UI shows, so widgets are updated without touching the running model"""
+    total_served: int
+    total_lost: int
+    total_profit: float
+    average_load: float
+    total_spent_ads: int
+    total_spent_salaries: int
+    total_spent_discount: int
+    checkouts_workload: tp.List[int]
+    checkouts_customer_progress: tp.List[int]
+    charts: tp.Optional[tp.Dict[str, Series]] = None  # None if charts weren't collected for this view
+
+
+def collect_view(
+    model: SupermarketModel,
+    charts: tp.Optional[ChartsCollector] = None,
+) -> ModelView:
+    """Values shown in UI, with charts data if charts collector is given"""
+    average_load = model.average_checkouts_workload()
+    return ModelView(
+        total_served=model.total_served_customers(),
+        total_lost=model.total_lost_customers(),
+        total_profit=model.total_profit(),
+        average_load=sum(average_load) / len(average_load),
+        total_spent_ads=model.total_spent_on_ads(),
+        total_spent_salaries=model.total_spent_on_salaries(),
+        total_spent_discount=model.total_spent_on_discounts(),
+        checkouts_workload=model.checkouts_current_workload(),
+        checkouts_customer_progress=model.current_checkouts_customer_progress(),
+        charts=None if charts is None else charts.collect(),
+    )
+
+
+class ModelWorker(QtCore.QObject):
+    """
+    Runs model ticks in background thread.
+    Progress and views of the model are emitted not more often than once per view_interval seconds,
+    so the GUI thread isn't flooded with signals. Charts are downsampled in this thread too,
+    not more often than once per chart_interval seconds. Model must not be used by other threads until `finished`.
+    """
+    progress = QtCore.pyqtSignal(int, int)  # done ticks, total ticks
+    view_ready = QtCore.pyqtSignal(object)  # ModelView
+    finished = QtCore.pyqtSignal(int, bool)  # done ticks, whether run was cancelled
+
+    def __init__(
+        self,
+        model: SupermarketModel,
+        ticks_num: int,
+        view_interval: float = 0.05,
+        charts: tp.Optional[ChartsCollector] = None,
+        chart_interval: float = 0.25,
+    ):
+        super().__init__()
+        self._model = model
+        self._ticks_num = ticks_num
+        self._view_interval = view_interval
+        self._charts = charts
+        self._chart_interval = chart_interval
+        self._cancel_requested = threading.Event()
+
+    def cancel(self):
+        """Thread-safe request to stop after the current tick"""
+        self._cancel_requested.set()
+
+    @QtCore.pyqtSlot()
+    def run(self):
+        done_ticks = 0
+        last_emit_time = last_chart_time = time.monotonic()
+        while done_ticks < self._ticks_num and not self._cancel_requested.is_set():
+            self._model.tick()
+            done_ticks += 1
+            now = time.monotonic()
+            if now - last_emit_time >= self._view_interval:
+                last_emit_time = now
+                is_chart_due = now - last_chart_time >= self._chart_interval
+                if is_chart_due:
+                    last_chart_time = now
+                self.progress.emit(done_ticks, self._ticks_num)
+                self.view_ready.emit(
+                    collect_view(self._model, self._charts if is_chart_due else None)
+                )
+        self.progress.emit(done_ticks, self._ticks_num)
+        self.view_ready.emit(collect_view(self._model, self._charts))
+        #  Event loop of the thread is stopped here, so waiting for the thread doesn't need the GUI event loop
+        self.thread().quit()
+        self.finished.emit(done_ticks, self._cancel_requested.is_set())
+
+
+class ModelRun(QtCore.QObject):
+    """
+    ModelWorker together with its QThread, the thread is stopped and cleaned up when the run finishes.
+    Signals of the worker are relayed through this object living in the GUI thread, so after discard()
+    signals of the run which are still queued don't reach UI.
+    """
+    progress = QtCore.pyqtSignal(int, int)
+    view_ready = QtCore.pyqtSignal(object)
+    finished = QtCore.pyqtSignal(int, bool)
+
+    def __init__(
+        self,
+        model: SupermarketModel,
+        ticks_num: int,
+        view_interval: float = 0.05,
+        parent: tp.Optional[QtCore.QObject] = None,
+        **worker_kwargs,
+    ):
+        super().__init__(parent)
+        self.worker_thread = QtCore.QThread()
+        self.worker = ModelWorker(model, ticks_num, view_interval=view_interval, **worker_kwargs)
+        self.worker.moveToThread(self.worker_thread)
+        self._is_discarded = False
+        self.worker_thread.started.connect(self.worker.run)
+        self.worker.progress.connect(self._on_worker_progress)
+        self.worker.view_ready.connect(self._on_worker_view_ready)
+        self.worker.finished.connect(self._on_worker_finished)
+
+    @QtCore.pyqtSlot(int, int)
+    def _on_worker_progress(self, done_ticks: int, total_ticks: int):
+        if not self._is_discarded:
+            self.progress.emit(done_ticks, total_ticks)
+
+    @QtCore.pyqtSlot(object)
+    def _on_worker_view_ready(self, view: ModelView):
+        if not self._is_discarded:
+            self.view_ready.emit(view)
+
+    @QtCore.pyqtSlot(int, bool)
+    def _on_worker_finished(self, done_ticks: int, is_cancelled: bool):
+        self.worker_thread.wait()
+        if not self._is_discarded:
+            self.finished.emit(done_ticks, is_cancelled)
+
+    def start(self):
+        self.worker_thread.start()
+
+    def cancel(self, wait: bool = False):
+        self.worker.cancel()
+        if wait:
+            self.worker_thread.wait()
+
+    def discard(self):
+        """Cancel run and wait for it, no more signals of this run are emitted, even already queued ones"""
+        self._is_discarded = True
+        self.cancel(wait=True)
+
+    def is_running(self) -> bool:
+        return self.worker_thread.isRunning()
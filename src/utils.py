@@ -2,13 +2,15 @@ import datetime
 from enum import Enum
 import logging
 import sys
+import typing as tp
 from pathlib import Path
 
 HOURS_PER_DAY = 24
 MINUTES_PER_HOUR = 60
 MINUTES_PER_DAY = HOURS_PER_DAY * MINUTES_PER_HOUR
 
-TOTAL_MODELLING_MINUTES = 2 * 7 * MINUTES_PER_DAY
+DEFAULT_MODELLING_DAYS = 2 * 7
+TOTAL_MODELLING_MINUTES = DEFAULT_MODELLING_DAYS * MINUTES_PER_DAY
 
 
 class Weekday(int, Enum):
@@ -22,22 +24,36 @@ class Weekday(int, Enum):
 
 
 def get_logger():
-    logs_path = Path('./logs')
-    logs_path.mkdir(exist_ok=True)
-    logging.basicConfig(
-        filemode='w',
-        format='[%(levelname)s] %(message)s',
-        filename=logs_path / f'{datetime.datetime.now().strftime("%m_%d_%Y_%H_%M_%S")}.txt',
-        level=logging.DEBUG,
-        encoding='utf-8',
-    )
-    logger = logging.getLogger(__name__)
-    # if not getattr(logger, 'handler_set', None):
-    #     logger.setLevel(logging.DEBUG)
-    #     handler.setFormatter(logging.Formatter(fmt='[%(levelname)s] %(message)s'))
-    #     logger.addHandler(handler)
-
+    """
+    Model logger. It has no handlers and logs nothing until configure_logging is called,
+    so disabled messages are dropped before formatting and nothing is written on import.
+    """
+    logger = logging.getLogger('src')
+    if not logger.handlers:
+        logger.addHandler(logging.NullHandler())
+        logger.setLevel(logging.WARNING)
+        logger.propagate = False
     return logger
 
 
+def configure_logging(level: int = logging.DEBUG, logs_path: tp.Optional[Path] = Path('./logs')):
+    """Write model logs of given level into new timestamped file in logs_path, or to stderr if logs_path is None"""
+    if logs_path is None:
+        handler = logging.StreamHandler(sys.stderr)
+    else:
+        logs_path = Path(logs_path)
+        logs_path.mkdir(exist_ok=True)
+        handler = logging.FileHandler(
+            logs_path / f'{datetime.datetime.now().strftime("%m_%d_%Y_%H_%M_%S")}.txt',
+            mode='w',
+            encoding='utf-8',
+        )
+    handler.setFormatter(logging.Formatter(fmt='[%(levelname)s] %(message)s'))
+    for old_handler in list(logger.handlers):
+        logger.removeHandler(old_handler)
+        old_handler.close()
+    logger.addHandler(handler)
+    logger.setLevel(level)
+
+
 logger = get_logger()
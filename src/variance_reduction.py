@@ -0,0 +1,136 @@
+"""
+Variance reduction for replications of SupermarketModel.
+
+Antithetic pairs: every replication seed is run twice, on common random numbers streams and on the same
+streams with every uniform u mirrored to 1 - u, and the estimate is the mean of pair averages.
+Control variates: the estimate is corrected by deviations of run quantities with known expectations,
+by default mean service time and mean purchase price of generated customers (midpoints of config ranges).
+
+Every estimate also reports variance reduction: how many times more plain replications would give the same
+confidence interval.
+"""
+import typing as tp
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.replications import run_jobs, spawn_seeds
+from src.stats import StatSummary, summarize, t_quantile
+from src.utils import TOTAL_MODELLING_MINUTES
+
+#  Controls are ratios of totals from stats: name -> (numerator, denominator)
+CONTROL_RATIOS: tp.Dict[str, tp.Tuple[str, str]] = {
+    'average_generated_service_time': ('total_generated_service_time', 'total_generated_customers'),
+    'average_generated_purchase_cost': ('total_generated_purchase_cost', 'total_generated_customers'),
+}
+
+
+@dataclass
+class ReducedEstimate:
+    estimate: StatSummary  # variance-reduced mean and its confidence interval
+    plain: StatSummary  # plain mean of the same runs as if they were independent
+    variance_reduction: float
+
+
+def model_controls(model_config: tp.Dict[str, tp.Any]) -> tp.Dict[str, float]:
+    """
+    Known expectations of CONTROL_RATIOS for config: service times and purchase prices are uniform integers,
+    so their means are midpoints of ranges. Valid while ranges aren't changed with set_levers during the run.
+    """
+    return {
+        'average_generated_service_time': sum(model_config['customer_service_time_range']) / 2,
+        'average_generated_purchase_cost': sum(model_config['customer_purchase_price_range']) / 2,
+    }
+
+
+def _stat_values(replications: tp.Sequence[tp.Dict[str, tp.Any]], name: str) -> np.ndarray:
+    if name in CONTROL_RATIOS:
+        numerator, denominator = CONTROL_RATIOS[name]
+        return np.array([replication[numerator] / max(replication[denominator], 1) for replication in replications])
+    return np.array([replication[name] for replication in replications], dtype=np.float64)
+
+
+def _variance_ratio(plain_variance: float, reduced_variance: float) -> float:
+    return plain_variance / reduced_variance if reduced_variance > 0 else float('inf')
+
+
+def control_variate_estimate(
+    replications: tp.Sequence[tp.Dict[str, tp.Any]],
+    name: str,
+    controls: tp.Dict[str, float],
+    confidence: float = 0.95,
+) -> ReducedEstimate:
+    """
+    Mean of stat corrected by controls: Y - beta * (X - E[X]) with beta fitted by least squares on the same runs.
+    Controls are stat names (or CONTROL_RATIOS names) with known expectations, see model_controls.
+    The interval uses residual variance with n - 1 - controls degrees of freedom.
+    """
+    values = _stat_values(replications, name)
+    samples_num = len(values)
+    plain = summarize(values.tolist(), confidence=confidence)
+    degrees_of_freedom = samples_num - 1 - len(controls)
+    if degrees_of_freedom < 1:
+        raise ValueError(f'{len(controls)} controls need at least {len(controls) + 2} replications, got {samples_num}')
+
+    deviations = np.column_stack([_stat_values(replications, control) - mean for control, mean in controls.items()])
+    centered_deviations = deviations - deviations.mean(axis=0)
+    beta, *_ = np.linalg.lstsq(centered_deviations, values - values.mean(), rcond=None)
+    corrected = values - deviations @ beta
+    mean = float(corrected.mean())
+    residuals = values - values.mean() - centered_deviations @ beta
+    variance = float(residuals @ residuals) / degrees_of_freedom
+    half_width = t_quantile((1 + confidence) / 2, degrees_of_freedom) * np.sqrt(variance / samples_num)
+    return ReducedEstimate(
+        estimate=StatSummary(
+            mean=mean, variance=variance, ci_low=mean - half_width, ci_high=mean + half_width, samples_num=samples_num,
+        ),
+        plain=plain,
+        variance_reduction=_variance_ratio(plain.variance, variance),
+    )
+
+
+def antithetic_estimate(
+    pairs: tp.Sequence[tp.Tuple[tp.Dict[str, tp.Any], tp.Dict[str, tp.Any]]],
+    name: str,
+    confidence: float = 0.95,
+) -> ReducedEstimate:
+    """
+    Mean of pair averages with interval over pairs. Variance reduction compares it with
+    the same number of independent runs: var(Y) / (2 * var(pair average)).
+    """
+    plain_values = _stat_values([run for pair in pairs for run in pair], name)
+    plain_runs, antithetic_runs = zip(*pairs)
+    pair_averages = (_stat_values(plain_runs, name) + _stat_values(antithetic_runs, name)) / 2
+    estimate = summarize(pair_averages.tolist(), confidence=confidence)
+    plain = summarize(plain_values.tolist(), confidence=confidence)
+    return ReducedEstimate(
+        estimate=estimate,
+        plain=plain,
+        variance_reduction=_variance_ratio(plain.variance, 2 * estimate.variance),
+    )
+
+
+@dataclass
+class AntitheticResults:
+    pairs: tp.List[tp.Tuple[tp.Dict[str, tp.Any], tp.Dict[str, tp.Any]]]
+
+    def estimate(self, name: str, confidence: float = 0.95) -> ReducedEstimate:
+        return antithetic_estimate(self.pairs, name, confidence=confidence)
+
+
+def run_antithetic(
+    model_config: tp.Dict[str, tp.Any],
+    pairs_num: int,
+    seed: tp.Union[int, np.random.SeedSequence, None] = None,
+    total_minutes: int = TOTAL_MODELLING_MINUTES,
+    max_workers: tp.Optional[int] = None,
+) -> AntitheticResults:
+    """Run pairs_num seeds twice: on common random numbers streams and on their mirrored (antithetic) copy"""
+    seeds = spawn_seeds(seed, pairs_num)
+    model_configs = [
+        {**model_config, 'random_state': pair_seed, 'common_random_numbers': True, 'antithetic': antithetic}
+        for antithetic in [False, True]
+        for pair_seed in seeds
+    ]
+    replications = run_jobs(model_configs, total_minutes=total_minutes, max_workers=max_workers)
+    return AntitheticResults(pairs=list(zip(replications[:pairs_num], replications[pairs_num:])))
@@ -0,0 +1,168 @@
+import typing as tp
+
+import numpy as np
+
+from src.customer import Customer
+from src.sketch import TDigest
+from src.supermarket import Supermarket
+from src.utils import logger
+
+
+class VectorizedSupermarket(Supermarket):
+    """
+    Supermarket that keeps all checkouts in numpy arrays (struct of arrays) instead of Checkout objects.
+    Every checkout queue is a ring buffer row of `_service_times` and `_purchase_costs`,
+    all checkouts are served with one vectorized step per served customer in a tick
+    and a batch of customers is dispatched with one vectorized step per queue size.
+    Stats are the same as in Supermarket.
+    """
+
+    def _create_checkouts(self, checkouts_num: int, max_checkout_capacity: int):
+        self._checkouts = []
+        self._service_times = np.zeros((checkouts_num, max_checkout_capacity), dtype=np.int64)
+        self._purchase_costs = np.zeros((checkouts_num, max_checkout_capacity), dtype=np.int64)
+        self._arrival_times = np.zeros((checkouts_num, max_checkout_capacity), dtype=np.int64)
+        self._queue_heads = np.zeros(checkouts_num, dtype=np.int64)
+        self._queue_sizes = np.zeros(checkouts_num, dtype=np.int64)
+        self._head_remaining_times = np.zeros(checkouts_num, dtype=np.int64)
+
+        self._checkouts_earnings = np.zeros(checkouts_num, dtype=np.int64)
+        self._checkouts_served_customers = np.zeros(checkouts_num, dtype=np.int64)
+        self._checkouts_idle_time = np.zeros(checkouts_num, dtype=np.int64)
+        self._checkouts_average_queue_size = np.zeros(checkouts_num, dtype=np.float64)
+        self._checkouts_waiting_times = [TDigest() for _ in range(checkouts_num)]
+        self._total_ticks = 0
+        self._clock = 0
+
+    def _receive_to_checkout(self, checkout_idx: int, service_time: int, purchase_cost: int) -> bool:
+        queue_size = self._queue_sizes[checkout_idx]
+        if queue_size == self.max_checkout_capacity:
+            return False
+        position = (self._queue_heads[checkout_idx] + queue_size) % self.max_checkout_capacity
+        self._service_times[checkout_idx, position] = service_time
+        self._purchase_costs[checkout_idx, position] = purchase_cost
+        self._arrival_times[checkout_idx, position] = self._clock
+        if queue_size == 0:
+            self._head_remaining_times[checkout_idx] = service_time
+            self._checkouts_waiting_times[checkout_idx].update(0)
+        self._queue_sizes[checkout_idx] = queue_size + 1
+        return True
+
+    def _dispatch(self, service_time: int, purchase_cost: int):
+        possible_checkout = int(np.argmin(self._queue_sizes))
+        is_customer_recieved = self._receive_to_checkout(possible_checkout, service_time, purchase_cost)
+        logger.debug("Sending customer in checkout № %s with status %s", possible_checkout, is_customer_recieved)
+        if not is_customer_recieved:
+            self._total_lost_customers.value += 1
+
+    def _dispatch_batch(self, service_times: np.ndarray, purchase_costs: np.ndarray):
+        """
+        Shortest queue dispatch of the whole batch at once. Sending customers one by one to the shortest queue
+        (ties to the smallest index) takes free places in order of (queue size before the place, checkout index),
+        so customers of the batch get the first free places in this order and the rest of them are lost.
+        """
+        customers_num = len(service_times)
+        checkouts_by_level, levels = [], []
+        places_num = 0
+        for level in range(int(self._queue_sizes.min()), self.max_checkout_capacity):
+            if places_num >= customers_num:
+                break
+            level_checkouts = np.flatnonzero(self._queue_sizes <= level)
+            checkouts_by_level.append(level_checkouts)
+            levels.append(np.full(len(level_checkouts), level, dtype=np.int64))
+            places_num += len(level_checkouts)
+
+        received_num = min(places_num, customers_num)
+        if received_num > 0:
+            checkouts = np.concatenate(checkouts_by_level)[:received_num]
+            queue_levels = np.concatenate(levels)[:received_num]
+            service_times = service_times[:received_num]
+            positions = (self._queue_heads[checkouts] + queue_levels) % self.max_checkout_capacity
+            self._service_times[checkouts, positions] = service_times
+            self._purchase_costs[checkouts, positions] = purchase_costs[:received_num]
+            self._arrival_times[checkouts, positions] = self._clock
+            #  Service starts right away in empty queues
+            started = queue_levels == 0
+            self._head_remaining_times[checkouts[started]] = service_times[started]
+            for checkout_idx in checkouts[started].tolist():
+                self._checkouts_waiting_times[checkout_idx].update(0)
+            self._queue_sizes += np.bincount(checkouts, minlength=self.checkouts_num)
+        if received_num < customers_num:
+            self._total_lost_customers.value += customers_num - received_num
+            logger.debug("All checkouts are full, lost %s customers", customers_num - received_num)
+
+    def _dispatch_customer(self, customer: Customer):
+        self._dispatch(customer.remaining_service_time, customer.purchase_cost)
+
+    def _current_total_workload(self) -> int:
+        return int(self._queue_sizes.sum())
+
+    def _tick_checkouts(self, tick_time: int):
+        self._checkouts_average_queue_size -= \
+            (self._checkouts_average_queue_size - self._queue_sizes) / (self._total_ticks + 1)
+        remaining_times = np.full(self.checkouts_num, tick_time, dtype=np.int64)
+
+        while True:
+            served = (self._queue_sizes > 0) & (remaining_times >= self._head_remaining_times)
+            if not served.any():
+                break
+            served_idx = np.flatnonzero(served)
+            heads = self._queue_heads[served_idx]
+
+            remaining_times[served_idx] -= self._head_remaining_times[served_idx]
+            served_purchase_costs = self._purchase_costs[served_idx, heads]
+            self._checkouts_earnings[served_idx] += served_purchase_costs
+            self._checkouts_served_customers[served_idx] += 1
+            self._total_earnings.value += int(served_purchase_costs.sum())
+            self._total_served_customers.value += len(served_idx)
+
+            heads = (heads + 1) % self.max_checkout_capacity
+            self._queue_heads[served_idx] = heads
+            self._queue_sizes[served_idx] -= 1
+            self._head_remaining_times[served_idx] = np.where(
+                self._queue_sizes[served_idx] > 0,
+                self._service_times[served_idx, heads],
+                0,
+            )
+            self._record_service_starts(served_idx, remaining_times, tick_time)
+
+        busy = self._queue_sizes > 0
+        self._head_remaining_times[busy] -= remaining_times[busy]
+        self._checkouts_idle_time[~busy] += remaining_times[~busy]
+        self._total_ticks += 1
+        self._clock += tick_time
+
+    def _record_service_starts(self, served_idx: np.ndarray, remaining_times: np.ndarray, tick_time: int):
+        """Waiting times of customers whose service started after served ones left"""
+        started_idx = served_idx[self._queue_sizes[served_idx] > 0]
+        if len(started_idx) == 0:
+            return
+        service_starts = self._clock + tick_time - remaining_times[started_idx]
+        waits = service_starts - self._arrival_times[started_idx, self._queue_heads[started_idx]]
+        for checkout_idx, wait in zip(started_idx.tolist(), waits.tolist()):
+            self._checkouts_waiting_times[checkout_idx].update(wait)
+
+    @property
+    def current_checkouts_workload(self) -> tp.List[int]:
+        return self._queue_sizes.tolist()
+
+    @property
+    def min_checkout_workload(self) -> int:
+        return int(self._queue_sizes.min())
+
+    @property
+    def current_checkouts_customer_progress(self) -> tp.List[int]:
+        heads_service_times = self._service_times[np.arange(self.checkouts_num), self._queue_heads]
+        progress = np.zeros(self.checkouts_num, dtype=np.int64)
+        busy = self._queue_sizes > 0
+        progress[busy] = (self._head_remaining_times[busy] / heads_service_times[busy] * 100.0).astype(np.int64)
+        return progress.tolist()
+
+    #  Stats section
+    @property
+    def average_checkouts_workload(self) -> tp.List[float]:
+        return self._checkouts_average_queue_size.tolist()
+
+    @property
+    def checkouts_waiting_times(self) -> tp.List[TDigest]:
+        return self._checkouts_waiting_times
@@ -0,0 +1,46 @@
+import heapq
+import typing as tp
+
+
+class WorkloadIndex:
+    """
+    Index of checkouts by current workload for shortest queue dispatch.
+
+    Min-heap of (workload, checkout_idx) entries with lazy deletion: update pushes new entry,
+    outdated entries are dropped when they reach the top. Ties go to the smallest checkout index, as with np.argmin.
+    """
+    COMPACT_FACTOR = 4
+
+    def __init__(self, checkouts_num: int):
+        self._workloads: tp.List[int] = [0] * checkouts_num
+        self._total_workload = 0
+        self._heap: tp.List[tp.Tuple[int, int]] = [(0, idx) for idx in range(checkouts_num)]
+
+    def update(self, checkout_idx: int, workload: int):
+        if self._workloads[checkout_idx] == workload:
+            return
+        self._total_workload += workload - self._workloads[checkout_idx]
+        self._workloads[checkout_idx] = workload
+        heapq.heappush(self._heap, (workload, checkout_idx))
+        if len(self._heap) > self.COMPACT_FACTOR * len(self._workloads):
+            self._heap = [(workload, idx) for idx, workload in enumerate(self._workloads)]
+            heapq.heapify(self._heap)
+
+    def min(self) -> tp.Tuple[int, int]:
+        """Return (workload, checkout_idx) of the least loaded checkout"""
+        heap = self._heap
+        workloads = self._workloads
+        while workloads[heap[0][1]] != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0]
+
+    @property
+    def total_workload(self) -> int:
+        """Customers in all checkouts"""
+        return self._total_workload
+
+    def __getitem__(self, checkout_idx: int) -> int:
+        return self._workloads[checkout_idx]
+
+    def __len__(self):
+        return len(self._workloads)
@@ -0,0 +1,22 @@
+import typing as tp
+
+import pytest
+
+
+@pytest.fixture
+def count_generated_customers() -> tp.Callable:
+    """Wraps customer generator of model, returned list gets size of every generated batch"""
+
+    def wrap(model) -> tp.List[int]:
+        batch_sizes = []
+        generate = model._customer_generator.generate
+
+        def counting_generate(*args, **kwargs):
+            batch = generate(*args, **kwargs)
+            batch_sizes.append(len(batch))
+            return batch
+
+        model._customer_generator.generate = counting_generate
+        return batch_sizes
+
+    return wrap
@@ -0,0 +1,27 @@
+import math
+
+import pytest
+
+from src.analytic import estimate, prescreen
+from src.run import DEFAULT_MODEL_CONFIG
+
+
+@pytest.mark.parametrize('max_checkout_capacity', [20, 21, 22, 25, 40])
+def test_estimate_with_large_capacity(max_checkout_capacity):
+    #  Shortest queue of 20 customers decreases flow by 100%, so there are no arrivals in such states
+    model_config = dict(DEFAULT_MODEL_CONFIG, max_checkout_capacity=max_checkout_capacity)
+    analytic_estimate = estimate(model_config)
+
+    assert all(math.isfinite(value) for value in analytic_estimate.stats.values())
+    assert 0 <= analytic_estimate.loss_probability < 0.05
+    assert analytic_estimate.stats['average_workload'] <= max_checkout_capacity
+    ranked, pruned = prescreen([model_config])
+    assert len(ranked) + len(pruned) == 1
+
+
+def test_large_capacity_doesnt_lose_more_customers():
+    losses = [
+        estimate(dict(DEFAULT_MODEL_CONFIG, max_checkout_capacity=capacity)).stats['total_lost_customers']
+        for capacity in range(15, 30)
+    ]
+    assert losses == sorted(losses, reverse=True)
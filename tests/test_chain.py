@@ -0,0 +1,20 @@
+import pytest
+
+from src.chain import ChainModel
+from src.run import DEFAULT_MODEL_CONFIG, run_model
+
+
+@pytest.mark.parametrize('workers_num', [0, 2])
+def test_chain_is_usable_after_shard_failure(workers_num):
+    store_configs = [dict(DEFAULT_MODEL_CONFIG, total_checkouts=checkouts) for checkouts in (1, 2, 3)]
+    with ChainModel(store_configs, workers_num=workers_num) as chain:
+        chain.advance_to(DEFAULT_MODEL_CONFIG['tick_time'] * 100)
+        #  Store 0 is in the first shard only, other shard (with workers) replies ok
+        with pytest.raises(RuntimeError, match='1 of [12] chain workers failed'):
+            chain.set_levers(store_idx=[0], unknown_lever=1)
+        chain.run(1440)
+        stores = chain.store_stats()
+
+    assert [store['total_served_customers'] for store in stores] == [
+        run_model(model_config, total_minutes=1440)['total_served_customers'] for model_config in store_configs
+    ]
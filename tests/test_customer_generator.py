@@ -0,0 +1,83 @@
+import typing as tp
+
+import numpy as np
+import pytest
+
+from src.customer_generator import common_random_streams, CustomerGenerator
+from src.replications import spawn_seeds
+from src.run import create_model, DEFAULT_MODEL_CONFIG
+
+
+def _record_customers(model) -> tp.List[tp.Tuple[np.ndarray, np.ndarray]]:
+    """Wraps customer generator of model, returned list gets (service times, purchase costs) of every batch"""
+    batches = []
+    draw_batch = model._customer_generator._draw_batch
+
+    def recording_draw_batch(customers_num):
+        batch = draw_batch(customers_num)
+        batches.append((batch.service_times, batch.purchase_costs))
+        return batch
+
+    model._customer_generator._draw_batch = recording_draw_batch
+    return batches
+
+
+@pytest.mark.parametrize('random_state', [3, np.random.SeedSequence(3)])
+def test_common_random_numbers_give_same_customers(random_state):
+    models, customers = [], []
+    for total_checkouts in [5, 6]:
+        model = create_model(dict(
+            DEFAULT_MODEL_CONFIG, total_checkouts=total_checkouts, max_checkout_capacity=2,
+            time_between_customers_range=(0, 2), random_state=random_state, common_random_numbers=True,
+        ))
+        batches = _record_customers(model)
+        for _ in range(500):
+            model.tick()
+        models.append(model)
+        customers.append([np.concatenate(values) for values in zip(*batches)])
+
+    #  Different queues change the flow, so the numbers of customers differ, but not the customers themselves
+    assert models[0].metrics()['total_lost_customers'] != models[1].metrics()['total_lost_customers']
+    customers_num = min(len(customers[0][0]), len(customers[1][0]))
+    assert customers_num > 1000
+    for first, second in zip(*customers):
+        assert np.array_equal(first[:customers_num], second[:customers_num])
+
+
+def test_common_random_streams_are_not_replication_seeds():
+    streams = common_random_streams(3)
+    for stream, replication_seed in zip(streams, spawn_seeds(3, len(streams))):
+        assert not np.array_equal(stream.peek(10), np.random.default_rng(replication_seed).random(10))
+
+
+def _reference_customers_num(rng: np.random.Generator, tick_time: int, low: int, high: int) -> int:
+    """The old per-customer loop: the first customer at the tick start, next ones while gaps fit into the tick"""
+    customers_num = 1
+    elapsed_time = int(rng.integers(low, high, endpoint=True))
+    while elapsed_time < tick_time:
+        customers_num += 1
+        elapsed_time += int(rng.integers(low, high, endpoint=True))
+    return customers_num
+
+
+@pytest.mark.parametrize('tick_time, time_between_customers_range', [(7, (1, 7)), (60, (0, 2))])
+def test_generated_gaps_are_used(tick_time, time_between_customers_range):
+    generator = CustomerGenerator(np.random.default_rng(0), (1, 7), (30, 9000))
+    drawn_gaps = []
+    draw_gaps = generator._draw_gaps
+
+    def counting_draw_gaps(*args):
+        gaps = draw_gaps(*args)
+        drawn_gaps.append(len(gaps))
+        return gaps
+
+    generator._draw_gaps = counting_draw_gaps
+    counts = [len(generator.generate(tick_time, time_between_customers_range)) for _ in range(5000)]
+
+    #  A tick takes one gap per customer: gaps between its customers and the gap overflowing the tick
+    assert sum(drawn_gaps) == sum(counts) + len(generator._gaps)
+    assert len(generator._gaps) <= generator._expected_gaps(time_between_customers_range, tick_time) + 1
+
+    rng = np.random.default_rng(1)
+    reference_counts = [_reference_customers_num(rng, tick_time, *time_between_customers_range) for _ in range(5000)]
+    assert np.mean(counts) == pytest.approx(np.mean(reference_counts), rel=0.02)
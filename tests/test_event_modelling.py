@@ -0,0 +1,73 @@
+import pytest
+
+from src.event_modelling import EventSupermarket
+from src.run import create_model, DEFAULT_MODEL_CONFIG
+from src.utils import MINUTES_PER_DAY
+
+
+@pytest.mark.parametrize('supermarket_engine', ['ring_buffer', 'vectorized', 'unknown'])
+def test_supermarket_engine_is_not_ignored(supermarket_engine):
+    with pytest.raises(ValueError, match='supermarket engine'):
+        create_model(dict(DEFAULT_MODEL_CONFIG, model_engine='events', supermarket_engine=supermarket_engine))
+
+
+@pytest.mark.parametrize('total_checkouts, max_checkout_capacity, time_between_customers_range', [
+    (1, 5, (1, 7)),
+    (2, 2, (0, 1)),
+    (10, 3, (0, 2)),
+])
+def test_customers_are_conserved(total_checkouts, max_checkout_capacity, time_between_customers_range):
+    model = create_model(dict(
+        DEFAULT_MODEL_CONFIG, model_engine='events', total_checkouts=total_checkouts,
+        max_checkout_capacity=max_checkout_capacity, time_between_customers_range=time_between_customers_range,
+    ))
+    for _ in range(1000):
+        model.tick()
+        metrics = model.metrics()
+        queued = sum(model.checkouts_current_workload())
+        assert metrics['total_generated_customers'] == \
+            metrics['total_served_customers'] + metrics['total_lost_customers'] + queued
+
+
+def test_workload_is_time_weighted():
+    supermarket = EventSupermarket(
+        checkouts_num=1, max_checkout_capacity=5, cashier_salary_per_day=0, ads_spend_per_day=0,
+        discount_percent=0, profit_per_sale_percent=10,
+    )
+    #  Queue size is 1 on [0, 2), 2 on [2, 4), 1 on [4, 7) and 0 on [7, 10)
+    assert supermarket.arrive(0, service_time=4, purchase_cost=100) == (0, 4)
+    assert supermarket.arrive(2, service_time=3, purchase_cost=100) is None
+    assert supermarket.complete_service(4, 0) == 7
+    supermarket.advance_to(5)
+    assert supermarket.average_checkouts_workload == [pytest.approx(7 / 5)]
+    assert supermarket.complete_service(7, 0) is None
+    supermarket.advance_to(10)
+
+    assert supermarket.average_checkouts_workload == [pytest.approx(0.9)]
+    assert supermarket.metrics['average_workload'] == pytest.approx(0.9)
+    assert supermarket.metrics['total_served_customers'] == 2
+    assert supermarket.checkouts_waiting_times[0].count == 2
+
+
+@pytest.mark.parametrize('tick_time, total_minutes', [
+    (60, MINUTES_PER_DAY),
+    (60, 3 * MINUTES_PER_DAY),
+    (60, 8 * MINUTES_PER_DAY + 300),
+    (7, 3 * MINUTES_PER_DAY),
+    (7, 8 * MINUTES_PER_DAY + 300),
+])
+def test_days_and_costs_are_the_same_as_in_ticks(tick_time, total_minutes):
+    accounting = []
+    for model_engine in ['ticks', 'events']:
+        model = create_model(dict(
+            DEFAULT_MODEL_CONFIG, model_engine=model_engine, tick_time=tick_time, total_checkouts=3,
+            ads_spend_per_day=100,
+        ))
+        for _ in range(total_minutes // tick_time):
+            model.tick()
+        metrics = model.metrics()
+        accounting.append((
+            model.passed_days(), model.current_weekday(), model.current_daytime_minutes(),
+            metrics['total_spent_on_salaries'], metrics['total_spent_on_ads'],
+        ))
+    assert accounting[0] == accounting[1]
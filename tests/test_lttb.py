@@ -0,0 +1,87 @@
+import math
+
+import numpy as np
+import pytest
+
+from src.lttb import lttb, lttb_indices, StreamingLTTB
+
+
+def reference_lttb_indices(x, y, threshold):
+    """Straightforward LTTB as in the original paper"""
+    points_num = len(x)
+    if threshold >= points_num or threshold < 3:
+        return list(range(points_num))
+    every = (points_num - 2) / (threshold - 2)
+    selected = [0]
+    previous = 0
+    for bucket_idx in range(threshold - 2):
+        next_start = math.floor((bucket_idx + 1) * every) + 1
+        next_end = min(math.floor((bucket_idx + 2) * every) + 1, points_num)
+        next_x = sum(x[next_start:next_end]) / (next_end - next_start)
+        next_y = sum(y[next_start:next_end]) / (next_end - next_start)
+
+        low = math.floor(bucket_idx * every) + 1
+        high = math.floor((bucket_idx + 1) * every) + 1
+        max_area, max_idx = -1.0, low
+        for idx in range(low, high):
+            area = abs(
+                (x[previous] - next_x) * (y[idx] - y[previous]) - (x[previous] - x[idx]) * (next_y - y[previous])
+            )
+            if area > max_area:
+                max_area, max_idx = area, idx
+        selected.append(max_idx)
+        previous = max_idx
+    selected.append(points_num - 1)
+    return selected
+
+
+@pytest.mark.parametrize('points_num, threshold', [(10, 5), (11, 4), (100, 7), (1000, 50), (1001, 333), (5000, 100)])
+def test_lttb_matches_reference(points_num, threshold):
+    rng = np.random.default_rng(points_num)
+    x = np.arange(points_num, dtype=np.float64)
+    y = np.cumsum(rng.normal(size=points_num))
+    assert lttb_indices(x, y, threshold).tolist() == reference_lttb_indices(x.tolist(), y.tolist(), threshold)
+
+
+def test_last_bucket_uses_only_its_points():
+    #  Last point far away from the last bucket, averaging it in moves the choice before the end
+    x = np.arange(10, dtype=np.float64)
+    y = np.array([0, 0, 0, 0, 0, 1, -1, 5, 9, 100], dtype=np.float64)
+    assert lttb_indices(x, y, 5).tolist() == reference_lttb_indices(x.tolist(), y.tolist(), 5)
+
+
+def test_lttb_keeps_short_series():
+    x, y = np.arange(5), np.arange(5) ** 2
+    assert lttb(x, y, 10)[1].tolist() == y.tolist()
+
+
+def test_streaming_lttb_is_bounded_and_keeps_peak():
+    rng = np.random.default_rng(0)
+    x = np.arange(50000)
+    y = np.cumsum(rng.normal(size=len(x)))
+    y[31234] += 1000
+    downsampler = StreamingLTTB(100)
+    for end in range(1, len(x) + 1, 777):
+        sampled_x, sampled_y = downsampler.downsample(x[:end], y[:end])
+        assert len(sampled_x) <= 100
+        assert (sampled_x[0], sampled_x[-1]) == (0, end - 1)
+        assert np.all(np.diff(sampled_x) > 0)
+        assert np.array_equal(sampled_y, y[sampled_x.astype(np.int64)])
+    sampled_x, _ = downsampler.downsample(x, y)
+    assert 31234 in sampled_x
+
+
+def test_streaming_lttb_doesnt_depend_on_refresh_points():
+    rng = np.random.default_rng(1)
+    x = np.arange(10000)
+    y = rng.normal(size=len(x))
+    refreshed = StreamingLTTB(50)
+    for end in sorted(rng.integers(1, len(x), size=30).tolist()):
+        refreshed.downsample(x[:end], y[:end])
+    for refreshed_values, values in zip(refreshed.downsample(x, y), StreamingLTTB(50).downsample(x, y)):
+        assert np.array_equal(refreshed_values, values)
+
+
+def test_streaming_lttb_keeps_short_series():
+    x, y = np.arange(10), np.arange(10) ** 2
+    assert StreamingLTTB(20).downsample(x, y)[1].tolist() == y.tolist()
@@ -0,0 +1,24 @@
+import json
+
+from src.chain import ChainModel
+from src.run import create_model, DEFAULT_MODEL_CONFIG
+
+WAITING_STATS = ['average_waiting_time', 'waiting_time_p50', 'waiting_time_p90', 'waiting_time_p99']
+
+
+def test_waiting_stats_without_customers_are_valid_json():
+    stats = create_model(DEFAULT_MODEL_CONFIG).stats()
+    assert [stats[name] for name in WAITING_STATS] == [None] * len(WAITING_STATS)
+    json.dumps(stats, allow_nan=False)
+
+    with ChainModel([DEFAULT_MODEL_CONFIG] * 2, workers_num=0) as chain:
+        json.dumps(chain.stats(), allow_nan=False)
+
+
+def test_waiting_stats_after_customers_came():
+    model = create_model(DEFAULT_MODEL_CONFIG)
+    for _ in range(100):
+        model.tick()
+    stats = model.stats()
+    assert all(isinstance(stats[name], float) for name in WAITING_STATS)
+    assert stats['waiting_time_p50'] <= stats['waiting_time_p90'] <= stats['waiting_time_p99']
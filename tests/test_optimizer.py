@@ -0,0 +1,31 @@
+import pytest
+
+from src.optimizer import optimize, Parameter, successive_halving_rungs
+from src.run import DEFAULT_MODEL_CONFIG
+
+
+@pytest.mark.parametrize('reduction_factor', [2, 3, 4, 5, 10])
+def test_rungs_for_exact_powers(reduction_factor):
+    #  Floating point log(reduction_factor ** power, reduction_factor) is above power for some of them, e.g. 5 ** 3
+    for power in range(8):
+        assert successive_halving_rungs(reduction_factor ** power, reduction_factor) == power + 1
+
+
+def test_rungs_follow_survivors_division():
+    assert successive_halving_rungs(10, 3) == 3  # 10 -> 3 -> 1
+    assert successive_halving_rungs(26, 3) == 4  # 26 -> 8 -> 2 -> 1
+    assert successive_halving_rungs(1, 3) == 1
+    assert successive_halving_rungs(27, 3) == 4
+
+
+def test_optimize_doesnt_exceed_last_rung():
+    result = optimize(
+        DEFAULT_MODEL_CONFIG,
+        search_space={'total_checkouts': Parameter(1, 3)},
+        configs_num=9,
+        min_replications=1,
+        reduction_factor=3,
+        total_minutes=DEFAULT_MODEL_CONFIG['tick_time'] * 20,
+        max_workers=1,
+    )
+    assert len(result.best.objective_values) <= 9
@@ -0,0 +1,69 @@
+import itertools
+
+import pytest
+
+from src.profiling import format_report, PhaseProfiler, PhaseStats
+from src.run import create_model, DEFAULT_MODEL_CONFIG, run_model
+
+
+def _step_clock():
+    """Clock which moves one second on every call"""
+    return itertools.count().__next__
+
+
+def test_phases_are_accumulated():
+    profiler = PhaseProfiler(clock=_step_clock())
+    profiler.add('generation', 2.0, 10)
+    profiler.add('dispatch', 1.0, 10)
+    profiler.add('generation', 4.0, 5)
+
+    assert list(profiler.stats()) == ['generation', 'dispatch']
+    generation = profiler.stats()['generation']
+    assert (generation.total_seconds, generation.calls, generation.items) == (6.0, 2, 15)
+    assert generation.seconds_per_call == 3.0
+    assert generation.seconds_per_item == pytest.approx(0.4)
+    assert profiler.total_seconds == 7.0
+    assert profiler.to_dict()['dispatch'] == {'total_seconds': 1.0, 'calls': 1, 'items': 10}
+    assert PhaseStats('empty').seconds_per_call == PhaseStats('empty').seconds_per_item == 0.0
+
+    profiler.reset()
+    assert profiler.stats() == {} and profiler.total_seconds == 0.0
+
+
+def test_format_report():
+    phases = {'serving': PhaseStats('serving', 3.0, 4, 8), 'clock': PhaseStats('clock', 1.0, 4)}
+    header, serving, clock = format_report(phases).split('\n')
+    assert header.split() == ['phase', 'seconds', 'share', 'calls', 'items', 'us/call']
+    assert serving.split() == ['serving', '3.0000', '75.0%', '4', '8', '750000.00']
+    assert clock.split() == ['clock', '1.0000', '25.0%', '4', '0', '250000.00']
+    assert format_report({}).split() == header.split()
+
+
+@pytest.mark.parametrize('model_engine', ['ticks', 'events'])
+def test_model_phases(model_engine):
+    model_config = dict(DEFAULT_MODEL_CONFIG, model_engine=model_engine)
+    model = create_model(model_config)
+    profiler = model.enable_profiling(PhaseProfiler(clock=_step_clock()))
+    model.add_observer(lambda model: None)
+    for _ in range(200):
+        model.tick()
+    metrics = model.metrics().snapshot()
+    model.disable_profiling()
+    model.tick()
+
+    phases = model.profile()
+    assert phases['clock'].calls == phases['observers'].calls == 200
+    assert phases['observers'].items == 200
+    if model_engine == 'ticks':
+        assert phases['generation'].items == phases['dispatch'].items == metrics['total_generated_customers']
+        assert phases['serving'].items == metrics['total_served_customers']
+    else:
+        assert phases['arrival'].calls == metrics['total_generated_customers']
+        assert phases['service_completion'].calls == metrics['total_served_customers']
+    #  Every phase takes one step of the clock
+    assert all(stats.total_seconds == stats.calls for stats in phases.values())
+    assert profiler.total_seconds == sum(stats.calls for stats in phases.values())
+
+    #  Profiling doesn't change results
+    assert run_model(model_config, total_minutes=200 * model.tick_time(), profile=True)['total_profit'] == \
+        run_model(model_config, total_minutes=200 * model.tick_time())['total_profit']
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from src.modelling import SUPERMARKET_ENGINES
+from src.recorder import TimeSeriesRecorder
+from src.run import create_model, DEFAULT_MODEL_CONFIG
+
+
+@pytest.mark.parametrize('supermarket_engine', sorted(SUPERMARKET_ENGINES))
+def test_arrivals_are_generated_customers(supermarket_engine, count_generated_customers):
+    #  Short queues, so some customers are lost
+    model = create_model(dict(
+        DEFAULT_MODEL_CONFIG, total_checkouts=2, max_checkout_capacity=2, supermarket_engine=supermarket_engine,
+    ))
+    batch_sizes = count_generated_customers(model)
+    recorder = TimeSeriesRecorder(model.total_checkouts())
+    model.add_observer(recorder)
+    for _ in range(300):
+        model.tick()
+
+    assert recorder['arrivals'].tolist() == batch_sizes
+    assert recorder['arrivals'].sum() == model.metrics()['total_generated_customers']
+    queued = sum(model.checkouts_current_workload())
+    assert recorder['arrivals'].sum() == recorder['served'].sum() + recorder['lost'].sum() + queued
+
+
+def test_total_columns_are_running_sums():
+    model = create_model(dict(DEFAULT_MODEL_CONFIG, total_checkouts=2, max_checkout_capacity=2))
+    recorder = TimeSeriesRecorder(model.total_checkouts(), capacity=16)
+    model.add_observer(recorder)
+    for _ in range(300):
+        model.tick()
+
+    assert recorder['total_lost'].tolist() == np.cumsum(recorder['lost']).tolist()
+    assert recorder['total_profit'] == pytest.approx(np.cumsum(recorder['profit']))
+    assert recorder['total_lost'][-1] == model.metrics()['total_lost_customers']
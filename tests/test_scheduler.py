@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from src.scenario import load_scenario_file
+from src.scheduler import run_scheduler
+
+
+def write_scenario(path, **scenario):
+    horizon = {} if 'days' in scenario else {'total_minutes': 700}
+    path.write_text(json.dumps({'replications': 2, **horizon, **scenario}), encoding='utf-8')
+    return path
+
+
+def test_dry_run_reports_pending_jobs(tmp_path):
+    scenarios_dir = tmp_path / 'scenarios'
+    scenarios_dir.mkdir()
+    write_scenario(scenarios_dir / 'checkouts.json', grid={'total_checkouts': [1, 2]})
+    output_dir = tmp_path / 'results'
+
+    report = run_scheduler([scenarios_dir], output_dir, dry_run=True)
+    assert report.pending == ['checkouts/total_checkouts=1', 'checkouts/total_checkouts=2']
+    assert report.done == report.skipped == []
+    assert not output_dir.exists()
+
+    report = run_scheduler([scenarios_dir], output_dir, max_workers=1)
+    assert report.done == ['checkouts/total_checkouts=1', 'checkouts/total_checkouts=2']
+    assert report.pending == []
+
+    report = run_scheduler([scenarios_dir], output_dir, dry_run=True)
+    assert report.pending == report.done == []
+    assert report.skipped == ['checkouts/total_checkouts=1', 'checkouts/total_checkouts=2']
+
+
+@pytest.mark.parametrize('name', ['seed', 'replications', 'priority', 'days'])
+def test_null_integer_fields_are_rejected(tmp_path, name):
+    path = write_scenario(tmp_path / 'scenario.json', **{name: None})
+    with pytest.raises(ValueError, match=f'{name} must be an integer'):
+        load_scenario_file(path)
+
+
+def test_variant_priority_is_validated(tmp_path):
+    path = write_scenario(tmp_path / 'scenario.json', variants=[{'priority': 'high'}])
+    with pytest.raises(ValueError, match='priority must be an integer'):
+        load_scenario_file(path)
@@ -0,0 +1,67 @@
+import pytest
+
+from src.modelling import SUPERMARKET_ENGINES
+from src.run import create_model, DEFAULT_MODEL_CONFIG
+from src.snapshot import fork, fork_many, restore, run_forks, snapshot
+
+ENGINE_CONFIGS = [
+    *({'supermarket_engine': engine} for engine in sorted(SUPERMARKET_ENGINES)),
+    {'model_engine': 'events'},
+]
+MODEL_CONFIG = dict(
+    DEFAULT_MODEL_CONFIG, total_checkouts=3, max_checkout_capacity=3, time_between_customers_range=(0, 3),
+)
+
+
+def _run(model, ticks_num: int = 300):
+    for _ in range(ticks_num):
+        model.tick()
+    return model
+
+
+@pytest.mark.parametrize('engine_config', ENGINE_CONFIGS)
+@pytest.mark.parametrize('common_random_numbers', [False, True])
+def test_restored_model_continues_as_original(engine_config, common_random_numbers):
+    model = _run(create_model(dict(MODEL_CONFIG, **engine_config, common_random_numbers=common_random_numbers)))
+    model.add_observer(lambda model: None)
+    restored = restore(snapshot(model))
+
+    assert restored.stats() == model.stats()
+    assert restored._observers == []
+    assert _run(restored).stats() == _run(model).stats()
+    assert restored.current_tick() == model.current_tick()
+
+
+def test_restore_rejects_other_data():
+    with pytest.raises(ValueError, match='Not a supermarket model snapshot'):
+        restore(b'not a snapshot')
+
+
+def test_fork_changes_levers_of_copy_only():
+    model = _run(create_model(dict(MODEL_CONFIG, common_random_numbers=True)))
+    levers = {'discount_percent': 20, 'ads_spend_per_day': 5000, 'customer_service_time_range': (2, 3)}
+    forked = fork(model, **levers)
+
+    assert forked._supermarket.discount_percent == 20
+    assert forked._supermarket.ads_spend_per_day == 5000
+    assert forked._customer_service_time_range == (2, 3)
+    assert model._supermarket.discount_percent == MODEL_CONFIG['discount_percent']
+    assert model._customer_service_time_range == MODEL_CONFIG['customer_service_time_range']
+
+    base_fork = fork(model)
+    forked_stats, base_stats = _run(forked).stats(), _run(base_fork).stats()
+    assert base_stats == _run(model).stats()
+    assert forked_stats['total_spent_on_ads'] > base_stats['total_spent_on_ads']
+    assert forked_stats['total_spent_on_discounts'] > 0
+    assert base_stats['total_spent_on_discounts'] == 0
+
+
+def test_forks_with_seeds():
+    data = snapshot(_run(create_model(MODEL_CONFIG)))
+    variants = [{}, {'discount_percent': 10}, {'random_state': 7}]
+    forks = fork_many(data, variants, seed=1)
+    stats = [_run(model, 200).stats() for model in forks]
+
+    assert stats == run_forks(data, variants, total_minutes=200 * MODEL_CONFIG['tick_time'], seed=1, max_workers=1)
+    assert stats[2] == _run(fork(data, random_state=7), 200).stats()
+    assert stats[0] != stats[2]
@@ -0,0 +1,30 @@
+import pytest
+
+from src.stats import summarize, t_cdf, t_quantile
+
+#  Two-sided 90%, 95% and 99% critical values of t-distribution
+T_CRITICAL_VALUES = {
+    1: (6.313751515, 12.706204736, 63.656741163),
+    2: (2.919985580, 4.302652730, 9.924843201),
+    3: (2.353363435, 3.182446305, 5.840909310),
+    4: (2.131846786, 2.776445105, 4.604094871),
+    5: (2.015048373, 2.570581836, 4.032142984),
+}
+
+
+@pytest.mark.parametrize('df', sorted(T_CRITICAL_VALUES))
+def test_t_quantile_critical_values(df):
+    for p, critical_value in zip((0.95, 0.975, 0.995), T_CRITICAL_VALUES[df]):
+        assert t_quantile(p, df) == pytest.approx(critical_value, abs=1e-8)
+        assert t_quantile(1 - p, df) == pytest.approx(-critical_value, abs=1e-8)
+
+
+@pytest.mark.parametrize('df', [3, 7, 30, 200])
+def test_t_quantile_inverts_cdf(df):
+    for p in (0.6, 0.9, 0.99, 0.9999):
+        assert t_cdf(t_quantile(p, df), df) == pytest.approx(p, abs=1e-12)
+
+
+def test_summarize_interval_of_few_samples():
+    summary = summarize([1.0, 2.0, 3.0, 6.0])
+    assert summary.half_width == pytest.approx(T_CRITICAL_VALUES[3][1] * (14 / 3 / 4) ** 0.5)
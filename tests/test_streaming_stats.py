@@ -0,0 +1,54 @@
+import json
+
+import numpy as np
+import pytest
+
+from src.run import create_model, DEFAULT_MODEL_CONFIG, main, run_model
+from src.streaming_stats import StreamingStatsObserver
+from src.utils import MINUTES_PER_DAY
+
+
+def test_arrivals_per_tick_are_generated_customers(count_generated_customers):
+    model = create_model(dict(DEFAULT_MODEL_CONFIG, total_checkouts=2, max_checkout_capacity=2))
+    batch_sizes = count_generated_customers(model)
+    streaming_stats = StreamingStatsObserver()
+    model.add_observer(streaming_stats)
+    for _ in range(500):
+        model.tick()
+
+    arrivals = streaming_stats.summary()['arrivals_per_tick']['all']
+    assert arrivals['count'] == len(batch_sizes)
+    assert arrivals['mean'] * arrivals['count'] == pytest.approx(sum(batch_sizes))
+    assert arrivals['std'] == pytest.approx(np.std(batch_sizes, ddof=1))
+    assert (arrivals['min'], arrivals['max']) == (min(batch_sizes), max(batch_sizes))
+
+
+def _reject_constant(name: str):
+    raise ValueError(f'{name} is not valid JSON')
+
+
+def test_cli_output_is_valid_json(capsys):
+    #  One day leaves most weekdays empty
+    main(['--days', '1', '--streaming-stats'])
+    stats = json.loads(capsys.readouterr().out, parse_constant=_reject_constant)
+
+    daily_profit = stats['streaming']['daily_profit']['by_weekday']
+    assert any(summary['count'] == 0 for summary in daily_profit.values())
+    assert all(
+        summary['mean'] is None and summary['p50'] is None
+        for summary in daily_profit.values() if summary['count'] == 0
+    )
+
+
+@pytest.mark.parametrize('tick_time', [1, 7, 60])
+def test_every_day_is_in_daily_profit(tick_time):
+    #  With 7 minutes ticks cross day boundaries, but the horizon is still the end of the last tick
+    days = 14
+    streaming_stats = StreamingStatsObserver()
+    run_model(
+        dict(DEFAULT_MODEL_CONFIG, tick_time=tick_time), total_minutes=days * MINUTES_PER_DAY,
+        observers=[streaming_stats],
+    )
+    daily_profit = streaming_stats.summary()['daily_profit']
+    assert daily_profit['all']['count'] == days
+    assert sum(summary['count'] for summary in daily_profit['by_weekday'].values()) == days
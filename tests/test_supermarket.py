@@ -0,0 +1,57 @@
+import copy
+
+import numpy as np
+import pytest
+
+from src.modelling import SUPERMARKET_ENGINES
+from src.run import create_model, DEFAULT_MODEL_CONFIG, run_model
+from src.supermarket import Supermarket
+
+
+@pytest.mark.parametrize('total_checkouts, max_checkout_capacity, time_between_customers_range', [
+    (1, 1, (0, 3)),
+    (3, 2, (0, 1)),
+    (17, 5, (0, 1)),
+    (60, 9, (0, 1)),
+    (4, 9, (1, 7)),
+])
+@pytest.mark.parametrize('common_random_numbers', [False, True])
+def test_engines_give_same_stats(
+    total_checkouts, max_checkout_capacity, time_between_customers_range, common_random_numbers,
+):
+    model_config = dict(
+        DEFAULT_MODEL_CONFIG,
+        total_checkouts=total_checkouts,
+        max_checkout_capacity=max_checkout_capacity,
+        time_between_customers_range=time_between_customers_range,
+        common_random_numbers=common_random_numbers,
+    )
+    stats = [
+        run_model(dict(model_config, supermarket_engine=engine), total_minutes=2 * 1440)
+        for engine in sorted(SUPERMARKET_ENGINES)
+    ]
+    assert all(engine_stats == stats[0] for engine_stats in stats[1:])
+
+
+@pytest.mark.parametrize('batch_size', [0, 1, 5, 12, 40])
+def test_vectorized_batch_dispatch_matches_one_by_one(batch_size):
+    model = create_model(dict(
+        DEFAULT_MODEL_CONFIG, total_checkouts=5, max_checkout_capacity=4, supermarket_engine='vectorized',
+    ))
+    supermarket = model._supermarket
+    rng = np.random.default_rng(0)
+    supermarket._dispatch_batch(rng.integers(1, 10, size=8), rng.integers(30, 9000, size=8))
+    supermarket.tick(4)
+    #  Queues of different sizes, so the batch fills several queue sizes and may overflow
+    supermarkets = [supermarket, copy.deepcopy(supermarket)]
+    service_times = rng.integers(1, 10, size=batch_size)
+    purchase_costs = rng.integers(30, 9000, size=batch_size)
+
+    supermarkets[0]._dispatch_batch(service_times, purchase_costs)
+    Supermarket._dispatch_batch(supermarkets[1], service_times, purchase_costs)
+
+    for name in ['_service_times', '_purchase_costs', '_arrival_times', '_queue_sizes', '_head_remaining_times']:
+        assert np.array_equal(getattr(supermarkets[0], name), getattr(supermarkets[1], name)), name
+    assert supermarkets[0]._total_lost_customers.value == supermarkets[1]._total_lost_customers.value
+    assert [digest.count for digest in supermarkets[0].checkouts_waiting_times] == \
+        [digest.count for digest in supermarkets[1].checkouts_waiting_times]
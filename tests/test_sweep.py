@@ -0,0 +1,24 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from src.sweep import MODEL_SOURCES
+
+SRC_DIR = Path(__file__).parent.parent / 'src'
+#  Imported by run.py for CLI outputs only, they don't change replication stats
+OUTPUT_MODULES = {'recorder', 'streaming_stats', 'stats'}
+
+
+def test_code_version_covers_modules_of_replications():
+    imported = subprocess.run(
+        [sys.executable, '-c', 'import json, sys, src.replications; print(json.dumps(list(sys.modules)))'],
+        cwd=SRC_DIR.parent, capture_output=True, text=True, check=True,
+    ).stdout
+    modules = {name[len('src.'):] for name in json.loads(imported) if name.startswith('src.')}
+    assert {f'{module}.py' for module in modules - OUTPUT_MODULES} <= set(MODEL_SOURCES)
+
+
+def test_code_version_doesnt_cover_ui():
+    assert all((SRC_DIR / source_name).exists() for source_name in MODEL_SOURCES)
+    assert not [source_name for source_name in MODEL_SOURCES if source_name.startswith('ui')]
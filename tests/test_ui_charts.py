@@ -0,0 +1,32 @@
+import numpy as np
+
+from src.recorder import TimeSeriesRecorder
+from src.run import create_model, DEFAULT_MODEL_CONFIG
+from src.ui_charts import ChartsCollector
+from src.utils import MINUTES_PER_DAY
+
+
+def test_charts_are_downsampled_recorder_columns():
+    model = create_model(dict(DEFAULT_MODEL_CONFIG, total_checkouts=3, max_checkout_capacity=2))
+    recorder = TimeSeriesRecorder(model.total_checkouts(), workload_checkouts=2)
+    model.add_observer(recorder)
+    charts_collector = ChartsCollector(recorder, model.total_checkouts(), model.tick_time(), points_num=60)
+    assert charts_collector.collect() == {}
+
+    for _ in range(20):
+        for _ in range(100):
+            model.tick()
+        charts = charts_collector.collect()
+
+    assert sorted(charts['queue']) == ['Касса 1', 'Касса 2', 'Средняя']
+    days = recorder['tick'] * model.tick_time() / MINUTES_PER_DAY
+    for (x, y), values in [
+        (charts['queue']['Средняя'], recorder['total_workload'] / model.total_checkouts()),
+        (charts['queue']['Касса 2'], recorder['workload'][:, 1]),
+        (charts['lost']['Упущено'], recorder['total_lost']),
+    ]:
+        assert len(x) <= 60
+        assert (x[0], x[-1]) == (days[0], days[-1])
+        indices = np.searchsorted(days, x)
+        assert np.allclose(days[indices], x) and np.allclose(values[indices], y)
+    assert charts['lost']['Упущено'][1][-1] == model.metrics()['total_lost_customers']
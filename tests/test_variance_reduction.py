@@ -0,0 +1,90 @@
+import math
+
+import numpy as np
+import pytest
+
+from src.run import DEFAULT_MODEL_CONFIG
+from src.stats import t_quantile
+from src.variance_reduction import antithetic_estimate, control_variate_estimate, model_controls, run_antithetic
+
+
+def _replications(**columns):
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+def test_perfect_control_removes_variance():
+    rng = np.random.default_rng(0)
+    control = rng.normal(size=20)
+    replications = _replications(profit=(2 * control + 5).tolist(), control=control.tolist())
+    reduced = control_variate_estimate(replications, 'profit', {'control': 0.0})
+
+    assert reduced.estimate.mean == pytest.approx(5)
+    assert reduced.estimate.variance == pytest.approx(0, abs=1e-20)
+    assert reduced.estimate.ci_low == pytest.approx(5) and reduced.estimate.ci_high == pytest.approx(5)
+    assert reduced.plain.mean == pytest.approx(2 * control.mean() + 5)
+    assert reduced.variance_reduction > 1e10
+
+
+def test_control_variate_matches_least_squares():
+    rng = np.random.default_rng(1)
+    control = rng.normal(3, 1, size=30)
+    values = 1.5 * control + rng.normal(size=30)
+    reduced = control_variate_estimate(
+        _replications(profit=values.tolist(), control=control.tolist()), 'profit', {'control': 3.0}, confidence=0.9,
+    )
+
+    beta, intercept = np.polyfit(control, values, 1)
+    residuals = values - beta * control - intercept
+    variance = residuals @ residuals / (30 - 2)
+    half_width = t_quantile(0.95, 28) * math.sqrt(variance / 30)
+    assert reduced.estimate.mean == pytest.approx(values.mean() - beta * (control.mean() - 3.0))
+    assert reduced.estimate.variance == pytest.approx(variance)
+    assert reduced.estimate.ci_high - reduced.estimate.mean == pytest.approx(half_width)
+    assert reduced.variance_reduction == pytest.approx(values.var(ddof=1) / variance)
+
+
+def test_control_ratios_and_degrees_of_freedom():
+    replications = _replications(
+        total_profit=[10.0, 12.0, 11.0, 13.0],
+        total_generated_service_time=[40, 44, 41, 47],
+        total_generated_customers=[10, 11, 10, 11],
+        total_generated_purchase_cost=[45000, 50000, 46000, 51000],
+    )
+    controls = model_controls(DEFAULT_MODEL_CONFIG)
+    assert controls == {'average_generated_service_time': 4.0, 'average_generated_purchase_cost': 4515.0}
+    reduced = control_variate_estimate(replications, 'total_profit', {'average_generated_service_time': 4.0})
+    assert reduced.estimate.samples_num == 4
+    with pytest.raises(ValueError, match='2 controls need at least 4 replications, got 3'):
+        control_variate_estimate(replications[:3], 'total_profit', controls)
+
+
+def test_antithetic_pairs_with_opposite_deviations():
+    deviations = [1.0, -3.0, 2.0, 0.5]
+    pairs = [({'profit': 7 + deviation}, {'profit': 7 - deviation}) for deviation in deviations]
+    reduced = antithetic_estimate(pairs, 'profit')
+
+    assert reduced.estimate.mean == 7
+    assert reduced.estimate.variance == 0
+    assert reduced.estimate.samples_num == 4
+    assert reduced.plain.samples_num == 8
+    assert reduced.variance_reduction == math.inf
+
+
+def test_antithetic_estimate_known_answer():
+    pairs = [({'profit': 1.0}, {'profit': 3.0}), ({'profit': 2.0}, {'profit': 6.0}), ({'profit': 5.0}, {'profit': 5.0})]
+    reduced = antithetic_estimate(pairs, 'profit')
+
+    pair_averages = np.array([2.0, 4.0, 5.0])
+    all_values = np.array([1.0, 3.0, 2.0, 6.0, 5.0, 5.0])
+    assert reduced.estimate.mean == pytest.approx(pair_averages.mean())
+    assert reduced.estimate.variance == pytest.approx(pair_averages.var(ddof=1))
+    assert reduced.plain.mean == pytest.approx(all_values.mean())
+    assert reduced.variance_reduction == pytest.approx(all_values.var(ddof=1) / (2 * pair_averages.var(ddof=1)))
+
+
+def test_antithetic_runs_reduce_variance_of_mirrored_values():
+    results = run_antithetic(DEFAULT_MODEL_CONFIG, pairs_num=4, seed=0, total_minutes=1440, max_workers=1)
+    assert len(results.pairs) == 4
+    reduced = results.estimate('average_generated_service_time')
+    assert reduced.estimate.mean == pytest.approx(4.0, abs=0.1)
+    assert reduced.variance_reduction > 1